@@ -13,3 +13,6 @@ python manage.py collectstatic --no-input
 # Run migrations
 echo "Running migrations..."
 python manage.py migrate
+
+# Table for the shared cache when Redis is not configured
+python manage.py createcachetable
@@ -82,6 +82,40 @@ else:
         }
     }
 
+# Cache (Redis when REDIS_URL is set, otherwise per-process memory).
+# 'shared' holds state every worker must see (background job results): it
+# falls back to a database table (`manage.py createcachetable`) without Redis.
+redis_url = os.getenv('REDIS_URL', '')
+if redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': redis_url,
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': redis_url,
+            'KEY_PREFIX': 'shared',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'routeguard_shared_cache',
+        }
+    }
+
+# Sessions are read on every request: with Redis, serve them from the cache,
+# with the database as the durable copy (so sessions survive cache restarts).
+# Per-process memory caches would keep serving a session after a logout on
+# another worker, so without Redis sessions are read from the database.
+if redis_url:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -112,6 +146,48 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Gemini AI Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 
+# Cache for AI explanations/tips: lifetime in seconds (shared through CACHES)
+# and number of entries kept in each process
+AI_ADVICE_CACHE_TIMEOUT = int(os.getenv('AI_ADVICE_CACHE_TIMEOUT', '21600'))
+AI_ADVICE_LOCAL_CACHE_SIZE = int(os.getenv('AI_ADVICE_LOCAL_CACHE_SIZE', '256'))
+
+# AI explanations: background threads per web worker (in each of the pools for
+# deferred explanations and for explanation + tips), and seconds to wait for
+# the model (deferred explanations, and explanation + tips in get_ai_explanation)
+# before answering with the rule-based texts
+AI_EXPLANATION_WORKERS = int(os.getenv('AI_EXPLANATION_WORKERS', '4'))
+AI_EXPLANATION_TIMEOUT = float(os.getenv('AI_EXPLANATION_TIMEOUT', '8'))
+
+# AI text backend: 'gemini', or 'local' for a deterministic offline stand-in
+# with simulated latency (seconds) and failure rate (0-1)
+AI_BACKEND = os.getenv('AI_BACKEND', 'gemini')
+AI_LOCAL_BACKEND_LATENCY = float(os.getenv('AI_LOCAL_BACKEND_LATENCY', '0'))
+AI_LOCAL_BACKEND_FAILURE_RATE = float(os.getenv('AI_LOCAL_BACKEND_FAILURE_RATE', '0'))
+
+# Circuit breaker: calls slower than this count as failures; once open, the
+# backend is skipped for this many seconds before a trial call
+AI_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('AI_BREAKER_SLOW_CALL_SECONDS', '5'))
+AI_BREAKER_RESET_SECONDS = float(os.getenv('AI_BREAKER_RESET_SECONDS', '30'))
+
+# Keys accepted in the X-Feed-Key header of the bulk crime ingestion API (comma-separated)
+CRIME_FEED_API_KEYS = [key for key in os.getenv('CRIME_FEED_API_KEYS', '').split(',') if key]
+
+# Crime density tiles: server cache lifetime and browser max-age (seconds).
+# Invalidation only reaches other workers through Redis; with per-process
+# memory caches, tiles are kept briefly instead.
+CRIME_TILE_CACHE_TIMEOUT = int(os.getenv('CRIME_TILE_CACHE_TIMEOUT', '86400' if redis_url else '60'))
+CRIME_TILE_MAX_AGE = int(os.getenv('CRIME_TILE_MAX_AGE', '300'))
+
+# Geo queries: 'auto' uses PostGIS geometry columns when the database has
+# them, 'geohash' forces the plain-SQL fallback
+GEO_BACKEND = os.getenv('GEO_BACKEND', 'auto')
+
+# Background crime data imports (0 = leave jobs for `manage.py process_import_jobs`)
+CRIME_IMPORT_WORKERS = int(os.getenv('CRIME_IMPORT_WORKERS', '2'))
+
+# Running imports that report no progress for this long are marked failed (seconds)
+CRIME_IMPORT_STALE_SECONDS = int(os.getenv('CRIME_IMPORT_STALE_SECONDS', '900'))
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -18,6 +18,10 @@ def run_migrations():
         print("2️⃣ Running migrate...")
         call_command('migrate')
         
+        # 3. Shared cache table (used when REDIS_URL is not set)
+        print("3️⃣ Running createcachetable...")
+        call_command('createcachetable')
+        
         print("✅ Migrations completed successfully!")
     except Exception as e:
         print(f"❌ Migration failed: {e}")
@@ -11,6 +11,7 @@ from .models import (
     TravelHistory,
     EmergencyAlert
 )
+from .signals import crime_points_changed
 
 
 @admin.register(CrimePoint)
@@ -37,6 +38,16 @@ class CrimePointAdmin(admin.ModelAdmin):
             'fields': ('is_sample_data', 'source')
         }),
     )
+    
+    # Saves notify derived caches through post_save; deletes must do it here
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        crime_points_changed.send(sender=CrimePoint, points=[obj])
+    
+    def delete_queryset(self, request, queryset):
+        points = list(queryset.only('latitude', 'longitude'))
+        super().delete_queryset(request, queryset)
+        crime_points_changed.send(sender=CrimePoint, points=points)
 
 
 @admin.register(SafetyZone)
@@ -91,3 +102,11 @@ from .models import SafetyNews
 class SafetyNewsAdmin(admin.ModelAdmin):
     list_display = ['title', 'priority', 'author', 'created_at']
     list_filter = ['priority', 'created_at']
+
+
+from .models import ImportJob
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'status', 'rows_read', 'imported_count', 'updated_count', 'skipped_count', 'created_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['rows_read', 'imported_count', 'updated_count', 'duplicate_count', 'skipped_count', 'date_fallback_count', 'errors', 'started_at', 'finished_at']
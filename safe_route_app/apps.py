@@ -5,3 +5,8 @@ class SafeRouteAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'safe_route_app'
     verbose_name = 'RouteGuard Safety System'
+    
+    def ready(self):
+        # Register signal receivers
+        from . import signals  # noqa: F401
+        from .utils import tiles  # noqa: F401
@@ -1,8 +1,11 @@
-import firebase_admin
-from firebase_admin import credentials, auth, storage
+import hashlib
 import os
+import threading
+import time
 from pathlib import Path
 
+from .utils.lru_cache import LRUCache
+
 # Initialize Firebase Admin SDK
 # We look for serviceAccountKey.json in the project root
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -10,8 +13,41 @@ cred_path = BASE_DIR / 'serviceAccountKey.json'
 
 import json
 
+# The firebase_admin SDK takes a noticeable share of worker startup, so it is
+# imported on first use inside the functions below rather than at module load.
+
+# Decoded ID tokens by SHA-256 of the token, kept until the token expires, so
+# login retries and several tabs signing in skip signature verification
+VERIFIED_TOKEN_CACHE_SIZE = 1024
+_verified_tokens = LRUCache(VERIFIED_TOKEN_CACHE_SIZE, ttl=3600)
+
+# Google rotates the token signing certificates every few hours; refetching
+# them more often than this is pointless
+CERTIFICATE_PREFETCH_INTERVAL = 15 * 60
+_certificates_prefetched_at = None
+_prefetch_lock = threading.Lock()
+
+# The prefetch reaches into SDK internals that are not part of its public
+# API; it only runs on the major versions it was checked against
+CERTIFICATE_PREFETCH_SDK_MAJOR_VERSIONS = ('6',)
+
+# Request threads and the prefetch thread may initialize at the same time;
+# without this the loser gets "The default Firebase app already exists"
+_init_lock = threading.Lock()
+
 def initialize_firebase():
     """Initialize Firebase Admin SDK if not already initialized"""
+    import firebase_admin
+    
+    if firebase_admin._apps:
+        return
+    with _init_lock:
+        _initialize_app()
+
+def _initialize_app():
+    import firebase_admin
+    from firebase_admin import credentials
+    
     if not firebase_admin._apps:
         # Check for credentials in environment variable (Production)
         service_account_json = os.getenv('FIREBASE_SERVICE_ACCOUNT')
@@ -41,17 +77,87 @@ def initialize_firebase():
 
 def verify_firebase_token(id_token):
     """Verify Firebase ID token and return user info"""
+    if not id_token:
+        return None
+    
+    token_hash = hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+    cached = _verified_tokens.get(token_hash)
+    if cached is not None:
+        return dict(cached)
+    
+    from firebase_admin import auth
+    
     try:
         initialize_firebase()
         # Add 60 seconds clock skew tolerance to handle time sync issues
         decoded_token = auth.verify_id_token(id_token, clock_skew_seconds=60)
-        return decoded_token
     except Exception as e:
         print(f"Token verification error: {e}")
         return None
+    
+    # Only until the token's own expiry, never beyond
+    remaining = decoded_token.get('exp', 0) - time.time()
+    if remaining > 0:
+        _verified_tokens.set(token_hash, dict(decoded_token), ttl=remaining)
+    return decoded_token
+
+def prefetch_signing_certificates():
+    """
+    Warm the SDK's cache of token signing certificates in the background,
+    so the next login does not wait for the certificate download.
+    Does nothing if it ran recently.
+    """
+    global _certificates_prefetched_at
+    with _prefetch_lock:
+        now = time.monotonic()
+        if (_certificates_prefetched_at is not None
+                and now - _certificates_prefetched_at < CERTIFICATE_PREFETCH_INTERVAL):
+            return
+        _certificates_prefetched_at = now
+    
+    threading.Thread(target=_fetch_signing_certificates, name='firebase-certs', daemon=True).start()
+
+def _fetch_signing_certificates():
+    try:
+        import firebase_admin
+        
+        if firebase_admin.__version__.split('.')[0] not in CERTIFICATE_PREFETCH_SDK_MAJOR_VERSIONS:
+            return
+        initialize_firebase()
+        if not firebase_admin._apps:
+            return
+        request, cert_uri = _sdk_certificate_request()
+        if request is None:
+            return
+        request(cert_uri)
+    except Exception as e:
+        print(f"Certificate prefetch error: {e}")
+
+def _sdk_certificate_request():
+    """
+    The request object verify_id_token fetches certificates with, and the
+    certificate URL, or (None, None) if this SDK build lays them out
+    differently. The certificates are cached (per HTTP cache headers) by
+    that object, so prefetching only helps when it goes through it.
+    """
+    import firebase_admin
+    from firebase_admin import auth
+    try:
+        from firebase_admin import _token_gen
+        client = auth._get_client(firebase_admin.get_app())
+        request = client._token_verifier.request
+        cert_uri = _token_gen.ID_TOKEN_CERT_URI
+    except (ImportError, AttributeError) as e:
+        print(f"Certificate prefetch unavailable for this firebase_admin version: {e}")
+        return None, None
+    if not callable(request):
+        return None, None
+    return request, cert_uri
 
 def get_storage_bucket():
     """Get Firebase Storage bucket"""
+    from firebase_admin import storage
+    
     try:
         initialize_firebase()
         return storage.bucket()
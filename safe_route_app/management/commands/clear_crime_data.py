@@ -0,0 +1,36 @@
+"""
+Delete crime points in small batches without blocking readers.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from safe_route_app.models import CrimePoint
+from safe_route_app.utils.bulk_delete import delete_crime_points, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Delete sample and/or imported crime points in short primary-key batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', action='store_true', help='Delete sample (generated) crime points')
+        parser.add_argument('--imported', action='store_true', help='Delete real (imported/reported) crime points')
+        parser.add_argument('--source', help='Only delete points from this source (e.g. csv_upload)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per transaction')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        if not options['sample'] and not options['imported']:
+            raise CommandError('Pass --sample, --imported or both')
+
+        queryset = CrimePoint.objects.all()
+        if not (options['sample'] and options['imported']):
+            queryset = queryset.filter(is_sample_data=options['sample'])
+        if options['source']:
+            queryset = queryset.filter(source=options['source'])
+
+        deleted = delete_crime_points(
+            queryset,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            progress_callback=lambda count: self.stdout.write(f"Deleted {count} crime points")
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} crime points"))
@@ -0,0 +1,49 @@
+"""
+Export crime points to CSV or NDJSON without loading them into memory.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from safe_route_app.utils.crime_export import (
+    EXPORT_FORMATS, PAGE_SIZE, CHUNK_SIZE, parse_export_filters, export_crime_points
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream crime points to a CSV or NDJSON file (keyset-paginated, constant memory)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+        parser.add_argument('--bbox', nargs=4, type=float, metavar=('MIN_LAT', 'MAX_LAT', 'MIN_LON', 'MAX_LON'),
+                            help='Only export points inside this bounding box')
+        parser.add_argument('--type', help='Crime type(s), comma separated')
+        parser.add_argument('--since', help='ISO date or datetime (inclusive)')
+        parser.add_argument('--until', help='ISO date or datetime (exclusive)')
+        parser.add_argument('--after', help='"<occurred_at>,<id>" of the last row of an earlier export, to resume')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Rows per keyset query')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in ('type', 'since', 'until', 'after')}
+        if options['bbox']:
+            params.update(zip(('min_lat', 'max_lat', 'min_lon', 'max_lon'), map(str, options['bbox'])))
+
+        try:
+            filters = parse_export_filters(params)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        pieces = export_crime_points(
+            options['format'], filters,
+            page_size=options['page_size'],
+            chunk_size=options['chunk_size']
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                for piece in pieces:
+                    f.write(piece)
+            self.stderr.write(self.style.SUCCESS(f"Exported crime points to {options['output']}"))
+        else:
+            for piece in pieces:
+                self.stdout.write(piece, ending='')
@@ -0,0 +1,59 @@
+"""
+Generate a synthetic city scenario for capacity testing.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from safe_route_app.utils.scenario_generator import CityScenarioGenerator, clear_scenario
+
+
+class Command(BaseCommand):
+    help = 'Generate users, officers, trips, alerts and news for a synthetic city (deterministic per seed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lat', type=float, default=12.9716, help='City center latitude')
+        parser.add_argument('--lon', type=float, default=77.5946, help='City center longitude')
+        parser.add_argument('--radius-km', type=float, default=10.0, help='City radius in kilometers')
+        parser.add_argument('--users', type=int, default=1000, help='Number of users')
+        parser.add_argument('--officers', type=int, default=50, help='Number of police officers')
+        parser.add_argument('--on-duty-share', type=float, default=0.7, help='Share of officers on duty')
+        parser.add_argument('--active-trips', type=int, default=200, help='Trips in progress')
+        parser.add_argument('--completed-trips', type=int, default=0, help='Finished trips')
+        parser.add_argument('--trail-points', type=int, default=30, help='Location history points per trip')
+        parser.add_argument('--alert-rate', type=float, default=0.05, help='Share of active trips with an SOS alert')
+        parser.add_argument('--news', type=int, default=20, help='Number of safety news posts')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+        parser.add_argument('--clear-all', action='store_true', help='Only delete all scenario data and exit')
+
+    def handle(self, *args, **options):
+        if options['clear_all']:
+            deleted = clear_scenario()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} scenario user profiles"))
+            return
+
+        generator = CityScenarioGenerator(
+            options['lat'],
+            options['lon'],
+            radius_km=options['radius_km'],
+            seed=options['seed'],
+            batch_size=options['batch_size']
+        )
+
+        started = time.monotonic()
+        counts = generator.generate(
+            users=options['users'],
+            officers=options['officers'],
+            active_trips=options['active_trips'],
+            completed_trips=options['completed_trips'],
+            alert_rate=options['alert_rate'],
+            news=options['news'],
+            trail_points=options['trail_points'],
+            on_duty_share=options['on_duty_share']
+        )
+
+        summary = ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Scenario {options['seed']}: {summary} in {time.monotonic() - started:.1f}s"
+        ))
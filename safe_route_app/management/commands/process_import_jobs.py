@@ -0,0 +1,49 @@
+"""
+Run pending crime data import jobs outside the web workers.
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from safe_route_app.models import ImportJob
+from safe_route_app.utils.import_jobs import run_import_job, fail_stale_import_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run pending crime data import jobs (use with CRIME_IMPORT_WORKERS=0)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new jobs')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Parser processes for large CSV files (default: CPU count)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stale = fail_stale_import_jobs()
+            if stale:
+                self.stdout.write(f"Marked {stale} stalled import job(s) as failed")
+
+            job_ids = list(
+                ImportJob.objects.filter(status='pending')
+                .order_by('created_at')
+                .values_list('id', flat=True)
+            )
+
+            for job_id in job_ids:
+                job = run_import_job(job_id, processes=options['processes'])
+                if job is None:
+                    continue
+                self.stdout.write(
+                    f"{job.file_name}: {job.status} - read {job.rows_read}, "
+                    f"imported {job.imported_count}, updated {job.updated_count}, "
+                    f"duplicates {job.duplicate_count}, skipped {job.skipped_count}, "
+                    f"{job.date_fallback_count} dates defaulted to now"
+                )
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
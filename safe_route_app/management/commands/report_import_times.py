@@ -0,0 +1,80 @@
+"""
+Report what a fresh worker spends its startup time importing.
+"""
+from collections import defaultdict
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# What a gunicorn worker loads before serving its first request
+WORKER_BOOT_CODE = (
+    "from core.wsgi import application\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Integrations that should only be imported on first real use
+LAZY_MODULES = ['firebase_admin', 'google.generativeai', 'numpy', 'redis']
+
+
+class Command(BaseCommand):
+    help = 'Measure module import times of a fresh worker process (python -X importtime)'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', help='Import this module instead of booting a WSGI worker')
+        parser.add_argument('--top', type=int, default=15, help='Number of packages to list')
+
+    def handle(self, *args, **options):
+        code = f"import {options['module']}\n" if options['module'] else WORKER_BOOT_CODE
+
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Import failed:\n{result.stderr[-2000:]}")
+
+        imports = parse_import_times(result.stderr)
+        if not imports:
+            raise CommandError('No import timings were reported')
+
+        total_us = sum(self_us for _, self_us, _ in imports)
+        by_package = defaultdict(int)
+        for module, self_us, _ in imports:
+            by_package[module.split('.')[0]] += self_us
+
+        self.stdout.write(f"Total import time: {total_us / 1000:.1f} ms ({len(imports)} modules)")
+        self.stdout.write("Self time by top-level package:")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {package:<30} {self_us / 1000:8.1f} ms")
+
+        loaded = {module for module, _, _ in imports}
+        eager = [module for module in LAZY_MODULES if module in loaded]
+        if eager:
+            self.stdout.write(self.style.WARNING(f"Imported at startup but meant to be lazy: {', '.join(eager)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('No heavy SDKs imported at startup'))
+
+
+def parse_import_times(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        list of (module, self microseconds, cumulative microseconds)
+    """
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            imports.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return imports
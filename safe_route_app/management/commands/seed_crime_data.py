@@ -0,0 +1,64 @@
+"""
+Seed large volumes of sample crime data for load testing.
+Needs NumPy, a development dependency (pip install -r requirements-dev.txt).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Generate sample crime points around a location with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lat', type=float, required=True, help='Center latitude')
+        parser.add_argument('--lon', type=float, required=True, help='Center longitude')
+        parser.add_argument('--points', type=int, default=100000, help='Number of crime points')
+        parser.add_argument('--radius-km', type=float, default=10.0, help='Radius in kilometers')
+        parser.add_argument('--distribution', choices=('uniform', 'hotspot'), default='uniform')
+        parser.add_argument('--hotspots', type=int, default=20, help='Number of hotspots (hotspot distribution)')
+        parser.add_argument('--hotspot-spread-km', type=float, default=0.4, help='Spread around each hotspot')
+        parser.add_argument('--days-back', type=int, default=90, help='How many days back to spread incidents')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--clear', action='store_true', help='Delete existing sample data in the area first')
+
+    def handle(self, *args, **options):
+        # NumPy is only installed for development, so import it on use
+        try:
+            from safe_route_app.utils.bulk_data_generator import BulkSampleDataGenerator
+        except ImportError as e:
+            raise CommandError(f"{e}. Install the development requirements: pip install -r requirements-dev.txt")
+
+        generator = BulkSampleDataGenerator(
+            options['lat'],
+            options['lon'],
+            radius_km=options['radius_km'],
+            distribution=options['distribution'],
+            hotspots=options['hotspots'],
+            hotspot_spread_km=options['hotspot_spread_km'],
+            seed=options['seed'],
+            batch_size=options['batch_size']
+        )
+
+        started = time.monotonic()
+        report_every = max(options['points'] // 20, options['batch_size'])
+        next_report = [report_every]
+
+        def report(created):
+            if created >= next_report[0]:
+                next_report[0] += report_every
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"{created}/{options['points']} points ({created / max(elapsed, 1e-6):.0f}/s)")
+
+        created = generator.generate(
+            options['points'],
+            days_back=options['days_back'],
+            clear_existing=options['clear'],
+            progress_callback=report
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} {options['distribution']} sample crime points in {elapsed:.1f}s"
+        ))
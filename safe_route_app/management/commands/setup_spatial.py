@@ -0,0 +1,20 @@
+"""
+Add geometry columns and spatial indexes once PostGIS is available.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from safe_route_app.utils.spatial_schema import install_spatial_columns
+
+
+class Command(BaseCommand):
+    help = 'Install geometry columns for the spatial geo backend (run after enabling PostGIS)'
+
+    def handle(self, *args, **options):
+        flavor = install_spatial_columns(connection)
+        if flavor is None:
+            self.stdout.write(self.style.WARNING(
+                'No spatial extension on this database; the geohash backend will be used'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Geometry columns ready ({flavor})'))
@@ -4,6 +4,75 @@ Authentication middleware to protect routes
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from .models import UserProfile, PoliceAuthority
+
+
+_UNSET = object()
+
+
+class RequestIdentity:
+    """
+    Who is making the request, resolved lazily and at most once.
+    
+    The Firebase UID and police flag come from the session; the UserProfile
+    and PoliceAuthority rows are loaded on first use and reused for the rest
+    of the request.
+    """
+    def __init__(self, session):
+        self.session = session
+        self._profile = _UNSET
+        self._police = _UNSET
+    
+    @property
+    def uid(self):
+        return self.session.get('firebase_uid')
+    
+    @property
+    def is_police(self):
+        """Police flag stored in the session at login."""
+        return self.session.get('is_police', False)
+    
+    def get_profile(self):
+        """
+        The user's profile.
+        
+        Raises:
+            UserProfile.DoesNotExist
+        """
+        if self._profile is _UNSET:
+            if self._police not in (_UNSET, None):
+                self._profile = self._police.user_profile
+            else:
+                self._profile = UserProfile.objects.filter(firebase_uid=self.uid).first() if self.uid else None
+        if self._profile is None:
+            raise UserProfile.DoesNotExist('No profile for this session')
+        return self._profile
+    
+    def get_police(self):
+        """
+        The officer's PoliceAuthority, with its user profile.
+        
+        Raises:
+            PoliceAuthority.DoesNotExist
+        """
+        if self._police is _UNSET:
+            self._police = (
+                PoliceAuthority.objects.select_related('user_profile').filter(firebase_uid=self.uid).first()
+                if self.uid else None
+            )
+        if self._police is None:
+            raise PoliceAuthority.DoesNotExist('No police profile for this session')
+        return self._police
+    
+    @property
+    def has_police_profile(self):
+        try:
+            self.get_police()
+            return True
+        except PoliceAuthority.DoesNotExist:
+            return False
+
+
 class LoginRequiredMiddleware:
     """
     Middleware that requires users to be authenticated to access the site.
@@ -19,13 +88,17 @@ class LoginRequiredMiddleware:
             '/auth/firebase-register/',
             '/police/dashboard/',
             '/api/police/',
+            '/tiles/',  # Aggregated crime density, shared by all users
             '/static/',
             '/admin/',
         ]
     
     def __call__(self, request):
+        # Views use request.identity instead of querying the profiles themselves
+        request.identity = RequestIdentity(request.session)
+        
         # Check if user is authenticated via session
-        firebase_uid = request.session.get('firebase_uid')
+        firebase_uid = request.identity.uid
         
         # Check if current path is exempt
         path = request.path
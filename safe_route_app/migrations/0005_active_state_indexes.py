@@ -0,0 +1,25 @@
+# Generated by Django 4.2.10 on 2026-10-19 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safe_route_app', '0004_emergencyalert_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emergencyalert',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['assigned_officer', '-alert_time'], name='alert_active_officer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='policeauthority',
+            index=models.Index(condition=models.Q(('is_on_duty', True)), fields=['verified_by_admin', 'last_updated'], name='police_on_duty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='travelhistory',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['-start_time'], name='travel_active_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safe_route_app', '0006_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='date_fallback_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
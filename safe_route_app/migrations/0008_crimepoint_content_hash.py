@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safe_route_app', '0007_importjob_date_fallback_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crimepoint',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='duplicate_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='updated_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='upsert',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.10 on 2026-10-19 04:24
+
+from django.db import migrations, models, transaction
+
+from safe_route_app.utils import geohash
+
+
+BATCH_SIZE = 5000
+
+
+def backfill_geohash(apps, schema_editor):
+    """Fill the geohash of existing crime points in short primary-key batches."""
+    CrimePoint = apps.get_model('safe_route_app', 'CrimePoint')
+    last_pk = 0
+    while True:
+        batch = list(
+            CrimePoint.objects.filter(pk__gt=last_pk, geohash__isnull=True)
+            .order_by('pk')
+            .only('pk', 'latitude', 'longitude')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for point in batch:
+            point.geohash = geohash.encode(point.latitude, point.longitude)
+        with transaction.atomic():
+            CrimePoint.objects.bulk_update(batch, ['geohash'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # The backfill commits per batch instead of holding one long transaction
+    atomic = False
+
+    dependencies = [
+        ('safe_route_app', '0008_crimepoint_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crimepoint',
+            name='geohash',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
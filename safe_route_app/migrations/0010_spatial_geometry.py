@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from safe_route_app.utils.spatial_schema import install_spatial_columns, drop_spatial_columns
+
+
+def install(apps, schema_editor):
+    # Only does something on PostGIS databases
+    install_spatial_columns(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    drop_spatial_columns(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safe_route_app', '0009_crimepoint_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-19 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safe_route_app', '0010_spatial_geometry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crimepoint',
+            index=models.Index(fields=['occurred_at', 'id'], name='crime_occurred_keyset_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='crimepoint',
+            name='safe_route__occurre_22c9bd_idx',
+        ),
+    ]
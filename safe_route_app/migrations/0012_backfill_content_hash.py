@@ -0,0 +1,77 @@
+# Generated by Django 4.2.10 on 2026-10-19 09:40
+
+from datetime import timezone as dt_timezone
+import hashlib
+
+from django.db import migrations, transaction
+from django.utils import timezone
+
+
+BATCH_SIZE = 5000
+
+
+def content_hash(latitude, longitude, crime_type, occurred_at, source):
+    """
+    Copy of CrimePoint.build_content_hash, so the backfill keeps producing
+    the same hashes if the model method changes later.
+    """
+    if occurred_at is None:
+        when = 'undated'
+    else:
+        if timezone.is_aware(occurred_at):
+            occurred_at = occurred_at.astimezone(dt_timezone.utc)
+        when = occurred_at.isoformat()
+    key = f"{latitude:.5f}|{longitude:.5f}|{crime_type}|{when}|{source}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def backfill_content_hash(apps, schema_editor):
+    """
+    Hash crime points created before content_hash existed, in short
+    primary-key batches, so the next refresh of a dataset matches them.
+    
+    Points that duplicate an earlier (lower pk) point keep a null hash,
+    since content_hash is unique.
+    """
+    CrimePoint = apps.get_model('safe_route_app', 'CrimePoint')
+    last_pk = 0
+    while True:
+        batch = list(
+            CrimePoint.objects.filter(pk__gt=last_pk, content_hash__isnull=True)
+            .order_by('pk')
+            .only('pk', 'latitude', 'longitude', 'crime_type', 'occurred_at', 'source')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        
+        hashes = {}
+        for point in batch:
+            hashes.setdefault(content_hash(
+                point.latitude, point.longitude, point.crime_type, point.occurred_at, point.source
+            ), point)
+        taken = set(
+            CrimePoint.objects.filter(content_hash__in=list(hashes)).values_list('content_hash', flat=True)
+        )
+        
+        changed = []
+        for point_hash, point in hashes.items():
+            if point_hash not in taken:
+                point.content_hash = point_hash
+                changed.append(point)
+        with transaction.atomic():
+            CrimePoint.objects.bulk_update(changed, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    # The backfill commits per batch instead of holding one long transaction
+    atomic = False
+
+    dependencies = [
+        ('safe_route_app', '0011_crimepoint_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
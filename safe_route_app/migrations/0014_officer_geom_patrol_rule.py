@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-19 11:05
+
+from django.db import migrations
+
+from safe_route_app.utils.spatial_schema import reinstall_spatial_column
+
+
+def rebuild_officer_geom(apps, schema_editor):
+    # Officers now use their patrol position only when both coordinates are set
+    reinstall_spatial_column(schema_editor.connection, 'safe_route_app_policeauthority')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('safe_route_app', '0013_importjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_officer_geom, migrations.RunPython.noop),
+    ]
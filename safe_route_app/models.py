@@ -1,11 +1,53 @@
 """
 Database models for RouteGuard application.
 """
+from datetime import timezone as dt_timezone
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
+import hashlib
 import random
 import uuid
 
+from .utils import geohash
+
+
+class CrimePointQuerySet(models.QuerySet):
+    """
+    Crime point queries that keep the geohash column in sync and use it
+    for bounding box lookups.
+    """
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save(), so the geohash is filled in here
+        objs = list(objs)
+        for obj in objs:
+            obj.geohash = geohash.encode(obj.latitude, obj.longitude)
+        return super().bulk_create(objs, *args, **kwargs)
+    
+    def in_geohash_ranges(self, ranges):
+        """Crime points whose geohash falls in any of the (low, high) ranges."""
+        cells = Q()
+        for low, high in ranges:
+            cells |= Q(geohash__gte=low, geohash__lt=high)
+        if not cells:
+            return self.none()
+        return self.filter(cells)
+    
+    def within_bbox(self, min_lat, max_lat, min_lon, max_lon):
+        """
+        Crime points inside a bounding box, found through a few geohash
+        index range scans instead of a two-column float range scan.
+        """
+        return self.in_geohash_ranges(
+            geohash.cover_bbox(min_lat, max_lat, min_lon, max_lon)
+        ).filter(
+            latitude__gte=min_lat,
+            latitude__lte=max_lat,
+            longitude__gte=min_lon,
+            longitude__lte=max_lon
+        )
+
 
 class CrimePoint(models.Model):
     """
@@ -28,6 +70,17 @@ class CrimePoint(models.Model):
         (4, 'Critical'),
     ]
     
+    # Danger of each crime type, multiplied by severity (see risk_weight)
+    RISK_BASE_WEIGHTS = {
+        'theft': 2,
+        'assault': 4,
+        'robbery': 3,
+        'harassment': 3,
+        'vandalism': 1,
+        'burglary': 2,
+        'other': 1,
+    }
+    
     # Geographic location (latitude, longitude)
     latitude = models.FloatField()
     longitude = models.FloatField()
@@ -45,36 +98,61 @@ class CrimePoint(models.Model):
     is_sample_data = models.BooleanField(default=False)
     source = models.CharField(max_length=100, default='manual')
     
+    # Identity of imported incidents, used to skip re-imported rows (see build_content_hash)
+    content_hash = models.CharField(max_length=40, unique=True, null=True, blank=True, editable=False)
+    
+    # Location as a 60-bit integer geohash, for index range scans (see utils/geohash.py)
+    geohash = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CrimePointQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-occurred_at']
         indexes = [
-            models.Index(fields=['occurred_at']),
+            # (occurred_at, id) also serves keyset pagination (utils/crime_export.py)
+            models.Index(fields=['occurred_at', 'id'], name='crime_occurred_keyset_idx'),
             models.Index(fields=['crime_type']),
         ]
     
     def __str__(self):
         return f"{self.crime_type} at {self.location} on {self.occurred_at.date()}"
     
+    def save(self, *args, **kwargs):
+        self.geohash = geohash.encode(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+    
     @property
     def risk_weight(self):
         """
         Calculate risk weight based on crime type and severity.
         Higher weight = more dangerous.
         """
-        base_weights = {
-            'theft': 2,
-            'assault': 4,
-            'robbery': 3,
-            'harassment': 3,
-            'vandalism': 1,
-            'burglary': 2,
-            'other': 1,
-        }
-        return base_weights.get(self.crime_type, 1) * self.severity
+        return self.RISK_BASE_WEIGHTS.get(self.crime_type, 1) * self.severity
+    
+    @staticmethod
+    def build_content_hash(latitude, longitude, crime_type, occurred_at, source):
+        """
+        Hash of the fields that identify an incident: coordinates rounded
+        to ~1 m, crime type, occurrence time (in UTC) and data source.
+        
+        Pass occurred_at=None for rows without a usable date; they hash with
+        a fixed marker instead of the import time, so re-uploads still match.
+        """
+        if occurred_at is None:
+            when = 'undated'
+        else:
+            if timezone.is_aware(occurred_at):
+                occurred_at = occurred_at.astimezone(dt_timezone.utc)
+            when = occurred_at.isoformat()
+        key = f"{latitude:.5f}|{longitude:.5f}|{crime_type}|{when}|{source}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
 
 
 class SafetyZone(models.Model):
@@ -186,6 +264,16 @@ class PoliceAuthority(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Dispatch and the live police map only ever look at on-duty officers
+            models.Index(
+                fields=['verified_by_admin', 'last_updated'],
+                condition=Q(is_on_duty=True),
+                name='police_on_duty_idx',
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.badge_number} - {self.station_name}"
 
@@ -235,6 +323,12 @@ class TravelHistory(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['expires_at']),
+            # Active trips (no end_time) for the police dashboard
+            models.Index(
+                fields=['-start_time'],
+                condition=Q(end_time__isnull=True),
+                name='travel_active_idx',
+            ),
         ]
     
     def __str__(self):
@@ -280,6 +374,12 @@ class EmergencyAlert(models.Model):
         indexes = [
             models.Index(fields=['status', '-alert_time']),
             models.Index(fields=['assigned_officer', 'status']),
+            # Active alerts per officer; NULL officer is the unassigned broadcast queue
+            models.Index(
+                fields=['assigned_officer', '-alert_time'],
+                condition=Q(status='active'),
+                name='alert_active_officer_idx',
+            ),
         ]
     
     def __str__(self):
@@ -315,3 +415,53 @@ class SafetyNews(models.Model):
     
     def __str__(self):
         return self.title
+
+
+class ImportJob(models.Model):
+    """
+    Crime data import running outside the HTTP request.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    # Uploaded file, saved to storage until the import finishes
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    clear_existing = models.BooleanField(default=False)
+    upsert = models.BooleanField(default=False)  # Update changed rows instead of skipping them
+    requested_by = models.CharField(max_length=128, blank=True)
+    
+    # Progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    rows_read = models.IntegerField(default=0)
+    imported_count = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    duplicate_count = models.IntegerField(default=0)
+    date_fallback_count = models.IntegerField(default=0)  # Rows with unparseable dates
+    errors = models.JSONField(default=list)  # First row errors reported by the importer
+    error_message = models.TextField(blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    # Last progress report of a running job; jobs whose worker died stop
+    # reporting and are failed (see utils/import_jobs.fail_stale_import_jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Import {self.file_name} - {self.status}"
@@ -0,0 +1,35 @@
+"""
+Application signals for RouteGuard.
+"""
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import Signal, receiver
+
+
+# Sent once per batch of new, updated or deleted crime points (bulk_create
+# skips post_save), so derived caches are refreshed per batch rather than per
+# row. Arguments: points (list of CrimePoint; deleted ones only carry their
+# location)
+crime_points_changed = Signal()
+
+
+# Single-row saves (admin edits, manual reports) are forwarded as a batch of
+# one. Deletes are not: a post_delete receiver would make every queryset
+# delete load its rows one by one, so deleting code sends the signal itself
+# (see utils/bulk_delete.py and CrimePointAdmin).
+
+@receiver(pre_save, sender='safe_route_app.CrimePoint')
+def _remember_crime_point_location(sender, instance, raw=False, **kwargs):
+    # A moved point also changes the caches at its old location
+    if instance.pk is not None and not raw:
+        instance._previous_location = (
+            sender.objects.filter(pk=instance.pk).values_list('latitude', 'longitude').first()
+        )
+
+
+@receiver(post_save, sender='safe_route_app.CrimePoint')
+def _crime_point_saved(sender, instance, **kwargs):
+    points = [instance]
+    previous = instance.__dict__.pop('_previous_location', None)
+    if previous and previous != (instance.latitude, instance.longitude):
+        points.append(sender(latitude=previous[0], longitude=previous[1]))
+    crime_points_changed.send(sender=sender, points=points)
@@ -13,7 +13,9 @@ const state = {
     routingControl: null,
     currentRoutes: [],
     crimeLayer: null,
-    safetyZoneLayer: null
+    crimeDensityLayer: null,
+    safetyZoneLayer: null,
+    aiExplanationUrl: null
 };
 
 // ========== Initialization ==========
@@ -53,6 +55,7 @@ function initializeMap() {
     // Initialize layers
     state.crimeLayer = L.layerGroup().addTo(state.map);
     state.safetyZoneLayer = L.layerGroup().addTo(state.map);
+    state.crimeDensityLayer = createCrimeDensityLayer().addTo(state.map);
     
     // Mobile-specific map setup
     if (window.innerWidth <= 768) {
@@ -119,6 +122,60 @@ function initializeMap() {
     });
 }
 
+// ========== Crime Density Tiles ==========
+function createCrimeDensityLayer() {
+    // Tiles are grids of uint16 crime counts (little-endian, north row first)
+    const CrimeDensityLayer = L.GridLayer.extend({
+        createTile(coords, done) {
+            const tile = document.createElement('canvas');
+            const size = this.getTileSize();
+            tile.width = size.x;
+            tile.height = size.y;
+            
+            fetch(`/tiles/crime/${coords.z}/${coords.x}/${coords.y}`)
+                .then(response => {
+                    if (!response.ok) throw new Error(`Tile request failed: ${response.status}`);
+                    return response.arrayBuffer();
+                })
+                .then(buffer => {
+                    drawCrimeDensity(tile, new DataView(buffer));
+                    done(null, tile);
+                })
+                .catch(error => done(error, tile));
+            
+            return tile;
+        }
+    });
+    
+    return new CrimeDensityLayer({
+        opacity: 0.6,
+        minZoom: 10,
+        maxZoom: 18,
+        updateWhenIdle: true
+    });
+}
+
+function drawCrimeDensity(canvas, data) {
+    const grid = Math.round(Math.sqrt(data.byteLength / 2));
+    if (!grid) return;
+    
+    const ctx = canvas.getContext('2d');
+    const cellWidth = canvas.width / grid;
+    const cellHeight = canvas.height / grid;
+    
+    for (let row = 0; row < grid; row++) {
+        for (let col = 0; col < grid; col++) {
+            const count = data.getUint16((row * grid + col) * 2, true);
+            if (!count) continue;
+            
+            // Log scale so single incidents stay visible next to hotspots
+            const intensity = Math.min(Math.log2(count + 1) / 6, 1);
+            ctx.fillStyle = `rgba(220, ${Math.round(180 * (1 - intensity))}, 40, ${0.25 + 0.6 * intensity})`;
+            ctx.fillRect(col * cellWidth, row * cellHeight, Math.ceil(cellWidth), Math.ceil(cellHeight));
+        }
+    }
+}
+
 // ========== Event Listeners ==========
 function attachEventListeners() {
     document.getElementById('use-current-location').addEventListener('click', useCurrentLocation);
@@ -379,8 +436,18 @@ async function processRoutes(routes) {
         
         displayRouteResults(result.routes, result.recommended_index);
         
+        state.aiExplanationUrl = result.ai_explanation_url;
         if (result.ai_explanation) {
             displayAIExplanation(result.ai_explanation);
+        } else if (result.ai_explanation_url) {
+            // Scores are shown already; the explanation follows when ready
+            const statusUrl = result.ai_explanation_url;
+            pollAIExplanation(statusUrl)
+                .then(explanation => {
+                    // Skip answers for routes that were replaced meanwhile
+                    if (state.aiExplanationUrl === statusUrl) displayAIExplanation(explanation);
+                })
+                .catch(error => console.error('AI explanation error:', error));
         }
         
         showToast('Routes calculated successfully!', 'success');
@@ -481,6 +548,19 @@ function chooseRoute(index, route) {
     }
 }
 
+async function pollAIExplanation(statusUrl, intervalMs = 1000) {
+    // Wait for a deferred route explanation (the server falls back to a basic one after its timeout)
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        
+        if (!response.ok) throw new Error(job.error || 'Failed to get AI explanation');
+        if (job.status === 'ready') return job.explanation;
+        
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
 function displayAIExplanation(explanation) {
     const aiSection = document.getElementById('ai-section');
     const aiContent = document.getElementById('ai-explanation');
@@ -511,6 +591,7 @@ function clearRoute() {
     state.startCoords = null;
     state.endCoords = null;
     state.currentRoutes = [];
+    state.aiExplanationUrl = null;
     
     document.getElementById('start-location').value = '';
     document.getElementById('end-location').value = '';
@@ -560,8 +641,8 @@ async function handleCSVUpload(event) {
     const file = event.target.files[0];
     if (!file) return;
     
-    if (!file.name.endsWith('.csv')) {
-        showToast('Please upload a CSV file', 'error');
+    if (!/\.(csv|geojson|json|ndjson|jsonl)(\.gz)?$/i.test(file.name)) {
+        showToast('Please upload a CSV, GeoJSON or NDJSON file', 'error');
         return;
     }
     
@@ -579,11 +660,22 @@ async function handleCSVUpload(event) {
         
         const result = await response.json();
         
-        if (result.success) {
-            showToast(`Imported ${result.imported} crime records`, 'success');
+        if (!result.success) {
+            showToast(`Import failed: ${result.error}`, 'error');
+            return;
+        }
+        
+        showToast('Upload received, importing in the background...', 'info');
+        const job = await pollImportJob(result.status_url);
+        
+        if (job.status === 'completed') {
+            const undated = job.date_fallbacks ? ` (${job.date_fallbacks} without a valid date)` : '';
+            showToast(`Imported ${job.imported} crime records${undated}`, 'success');
             setTimeout(() => location.reload(), 1500);
+        } else if (job.status !== 'failed') {
+            showToast(`Import is still running (${job.rows_read} rows read), check back later`, 'info');
         } else {
-            showToast(`Import failed: ${result.error}`, 'error');
+            showToast(`Import failed: ${job.error}`, 'error');
         }
     } catch (error) {
         console.error('CSV upload error:', error);
@@ -594,6 +686,23 @@ async function handleCSVUpload(event) {
     }
 }
 
+async function pollImportJob(statusUrl, intervalMs = 2000, maxIntervalMs = 15000, maxWaitMs = 30 * 60 * 1000) {
+    // Wait for a background import job to finish, backing off between polls.
+    // Gives up after maxWaitMs and returns the last (unfinished) job status.
+    const deadline = Date.now() + maxWaitMs;
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        
+        if (!response.ok) throw new Error(job.error || 'Failed to get import status');
+        if (job.status === 'completed' || job.status === 'failed') return job;
+        if (Date.now() + intervalMs > deadline) return job;
+        
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        intervalMs = Math.min(intervalMs * 1.5, maxIntervalMs);
+    }
+}
+
 // ========== Location Search ==========
 async function searchLocation() {
     const query = document.getElementById('location-search').value.trim();
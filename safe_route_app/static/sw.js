@@ -1,4 +1,5 @@
 const CACHE_NAME = 'routeguard-v1.0.0';
+const TILE_CACHE_NAME = 'routeguard-tiles-v1';
 const urlsToCache = [
   '/',
   '/static/css/style.css',
@@ -29,6 +30,14 @@ self.addEventListener('install', event => {
 
 // Fetch event
 self.addEventListener('fetch', event => {
+  const url = new URL(event.request.url);
+
+  // Crime density tiles: answer from cache right away, refresh in the background
+  if (url.origin === self.location.origin && url.pathname.startsWith('/tiles/')) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then(response => {
@@ -47,7 +56,7 @@ self.addEventListener('activate', event => {
     caches.keys().then(cacheNames => {
       return Promise.all(
         cacheNames.map(cacheName => {
-          if (cacheName !== CACHE_NAME) {
+          if (cacheName !== CACHE_NAME && cacheName !== TILE_CACHE_NAME) {
             console.log('RouteGuard: Deleting old cache', cacheName);
             return caches.delete(cacheName);
           }
@@ -57,6 +66,25 @@ self.addEventListener('activate', event => {
   );
 });
 
+async function staleWhileRevalidate(event) {
+  const cache = await caches.open(TILE_CACHE_NAME);
+  const cached = await cache.match(event.request);
+
+  const refresh = fetch(event.request)
+    .then(response => {
+      if (response.ok) {
+        cache.put(event.request, response.clone());
+      }
+      return response;
+    });
+
+  if (cached) {
+    event.waitUntil(refresh.catch(() => {}));
+    return cached;
+  }
+  return refresh;
+}
+
 // Background sync for offline route requests
 self.addEventListener('sync', event => {
   if (event.tag === 'background-sync-route') {
@@ -1,8 +1,1000 @@
 """
 Tests for RouteGuard application.
-Note: Tests are temporarily disabled during local development.
-For production, these should be updated to work with the current database schema.
 """
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+from unittest import SkipTest
 
-# Tests will be added after the application is fully functional
+from django.apps import apps
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, SimpleTestCase, RequestFactory, override_settings
+
+from .models import ImportJob, PoliceAuthority, EmergencyAlert, TravelHistory, CrimePoint, SafetyZone, UserProfile
+from .utils.geo_backend import GeohashGeoBackend, SpatialGeoBackend, haversine_km, officer_location
+from .utils.spatial_schema import has_spatial_columns
+from .utils.csv_importer import CSVCrimeDataImporter
+from .utils.clustering import get_crime_clusters, MAX_RAW_POINTS
+from .utils.columnar import encode_items, to_columnar
+from .utils.crime_export import export_crime_points, filter_crime_points, iter_crime_rows, parse_export_filters
+from .utils.crime_ingest import ingest_incidents
+from .signals import crime_points_changed
+from . import firebase_config
+from .utils import import_jobs
+from .utils.import_jobs import fail_stale_import_jobs, requeue_stale_pending_jobs, run_import_job
+from .utils.json_importer import GeoJSONCrimeDataImporter, NDJSONCrimeDataImporter
+from .utils.ai_backends import AIBackend, GeminiBackend, LocalBackend, CircuitBreaker, CircuitOpenError
+from .utils.gemini_service import AdviceCache, GeminiSafetyAdvisor, advice_cache_key, route_features
+from .utils import explanation_jobs
+
+
+class ActiveStateIndexTests(TestCase):
+    """
+    The dashboard and dispatch queries should be answered from the
+    partial indexes on active rows instead of scanning whole tables.
+    """
+
+    def _plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Empty test tables always favour a seq scan, so take it off the table
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+            try:
+                return queryset.explain()
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET enable_seqscan = on')
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = self._plan(queryset)
+        if index_name:
+            self.assertIn(index_name, plan)
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+        elif connection.vendor == 'sqlite':
+            table = queryset.model._meta.db_table
+            for line in plan.splitlines():
+                if f'SCAN {table}' in line:
+                    self.assertIn('USING', line, plan)
+
+    def test_on_duty_police_lookup(self):
+        self.assertUsesIndex(
+            PoliceAuthority.objects.filter(verified_by_admin=True, is_on_duty=True),
+            'police_on_duty_idx',
+        )
+        self.assertUsesIndex(
+            PoliceAuthority.objects.filter(is_on_duty=True),
+            'police_on_duty_idx',
+        )
+
+    def test_unassigned_active_alerts(self):
+        self.assertUsesIndex(
+            EmergencyAlert.objects.filter(
+                status='active', assigned_officer__isnull=True
+            ).order_by('-alert_time'),
+            'alert_active_officer_idx',
+        )
+
+    def test_officer_active_alerts(self):
+        self.assertUsesIndex(
+            EmergencyAlert.objects.filter(
+                Q(assigned_officer='officer-1') | Q(assigned_officer__isnull=True),
+                status='active',
+            ).order_by('-alert_time'),
+        )
+
+    def test_active_travels(self):
+        self.assertUsesIndex(
+            TravelHistory.objects.filter(end_time__isnull=True).order_by('-start_time')[:50],
+            'travel_active_idx',
+        )
+
+
+class GeoBackendTestsMixin:
+    """
+    Every geo backend must return exactly what a brute-force haversine
+    check against all rows returns.
+    """
+
+    backend = None
+
+    # Around Bengaluru, with a few points near the route edges
+    CENTER = (12.97, 77.59)
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        lat0, lon0 = cls.CENTER
+        occurred_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+        CrimePoint.objects.bulk_create([
+            CrimePoint(
+                latitude=lat0 + rng.uniform(-0.1, 0.1),
+                longitude=lon0 + rng.uniform(-0.1, 0.1),
+                crime_type='theft',
+                occurred_at=occurred_at,
+            )
+            for _ in range(600)
+        ])
+        SafetyZone.objects.bulk_create([
+            SafetyZone(
+                name=f'Zone {i}',
+                zone_type='police_station',
+                latitude=lat0 + rng.uniform(-0.1, 0.1),
+                longitude=lon0 + rng.uniform(-0.1, 0.1),
+                is_active=i % 5 != 0,
+            )
+            for i in range(80)
+        ])
+        for i in range(30):
+            profile = UserProfile.objects.create(
+                firebase_uid=f'officer-{i}', email=f'officer{i}@example.com',
+                phone='0', full_name=f'Officer {i}'
+            )
+            on_patrol = i % 2 == 0
+            PoliceAuthority.objects.create(
+                firebase_uid=profile.firebase_uid,
+                user_profile=profile,
+                badge_number=f'B{i}',
+                station_name='Station',
+                rank='Constable',
+                jurisdiction_area='Area',
+                jurisdiction_lat=lat0 + rng.uniform(-0.4, 0.4),
+                jurisdiction_lng=lon0 + rng.uniform(-0.4, 0.4),
+                current_lat=lat0 + rng.uniform(-0.1, 0.1) if on_patrol else None,
+                current_lng=lon0 + rng.uniform(-0.1, 0.1) if on_patrol else None,
+                verified_by_admin=i % 7 != 0,
+                is_on_duty=i % 3 != 0,
+            )
+
+        # A route crossing the area diagonally with a short detour
+        cls.route = [
+            [lat0 - 0.08 + 0.004 * step, lon0 - 0.08 + 0.004 * step + (0.01 if 10 <= step < 15 else 0)]
+            for step in range(41)
+        ]
+
+    def _brute_force_near_route(self, items, radius_m):
+        return sorted(
+            item.pk for item in items
+            if any(
+                haversine_km(lat, lon, item.latitude, item.longitude) <= radius_m / 1000
+                for lat, lon in self.route
+            )
+        )
+
+    def test_crimes_near_route(self):
+        for radius_m in (100, 500, 1500):
+            found = self.backend.crimes_near_route(self.route, radius_m)
+            expected = self._brute_force_near_route(CrimePoint.objects.all(), radius_m)
+            self.assertTrue(expected)
+            self.assertEqual(sorted(c.pk for c in found), expected)
+
+    def test_safety_zones_near_route(self):
+        for radius_m in (500, 2000):
+            found = self.backend.safety_zones_near_route(self.route, radius_m)
+            expected = self._brute_force_near_route(SafetyZone.objects.filter(is_active=True), radius_m)
+            self.assertTrue(expected)
+            self.assertEqual(sorted(z.pk for z in found), expected)
+
+    def test_empty_route_neighbourhood(self):
+        far_route = [[-33.86, 151.2], [-33.87, 151.21]]
+        self.assertEqual(self.backend.crimes_near_route(far_route, 500), [])
+
+    def test_nearest_on_duty_officers(self):
+        lat0, lon0 = self.CENTER
+        for max_km in (10, 30):
+            found = self.backend.nearest_on_duty_officers(lat0, lon0, max_km)
+            expected = sorted(
+                (haversine_km(lat0, lon0, *officer_location(o)), o.pk)
+                for o in PoliceAuthority.objects.filter(verified_by_admin=True, is_on_duty=True)
+                if haversine_km(lat0, lon0, *officer_location(o)) <= max_km
+            )
+            self.assertTrue(expected)
+            self.assertEqual([(d, o.pk) for d, o in found], expected)
+
+
+    def _officer(self, uid, jurisdiction, current):
+        profile = UserProfile.objects.create(firebase_uid=uid, email=f'{uid}@example.com', phone='0', full_name=uid)
+        return PoliceAuthority.objects.create(
+            firebase_uid=uid, user_profile=profile, badge_number=uid, station_name='Station',
+            rank='Constable', jurisdiction_area='Area', verified_by_admin=True, is_on_duty=True,
+            jurisdiction_lat=jurisdiction[0], jurisdiction_lng=jurisdiction[1],
+            current_lat=current[0], current_lng=current[1],
+        )
+
+    def test_officer_location_rule(self):
+        # Patrol position only when both coordinates are set; 0.0 is a coordinate
+        at_equator = self._officer('equator', (1.0, 1.0), (0.0, 0.0))
+        half_known = self._officer('half', (0.0, 0.0025), (5.0, None))
+
+        self.assertEqual(officer_location(at_equator), (0.0, 0.0))
+        self.assertEqual(officer_location(half_known), (0.0, 0.0025))
+        found = self.backend.nearest_on_duty_officers(0.0, 0.001, 1)
+        self.assertEqual([o.pk for _, o in found], [at_equator.pk, half_known.pk])
+
+
+class GeohashGeoBackendTests(GeoBackendTestsMixin, TestCase):
+    backend = GeohashGeoBackend()
+
+
+class SpatialGeoBackendTests(GeoBackendTestsMixin, TestCase):
+    """Runs on a PostGIS database (DATABASE_URL) once setup_spatial has run."""
+
+    @classmethod
+    def setUpClass(cls):
+        if not has_spatial_columns(connection):
+            raise SkipTest('Database has no spatial geometry columns')
+        super().setUpClass()
+        cls.backend = SpatialGeoBackend()
+
+
+class CrimeImportTests(TestCase):
+    """Behaviour of the crime data importers on small in-memory files."""
+
+    def _import(self, text, importer_class=CSVCrimeDataImporter, **options):
+        return importer_class().import_file(io.BytesIO(text.encode('utf-8')), **options)
+
+    CSV = (
+        'Latitude,Longitude,Offense,Incident_Date,Severity\n'
+        '28.6139,77.2090,Larceny,25/12/2023,2\n'
+        '28.6140,77.2091,Burglary - theft from dwelling,31/12/2023,3\n'
+        '28.6141,77.2092,Armed robbery with assault,13/01/2024,4\n'
+        '28.6142,77.2093,Graffiti,yesterday,1\n'
+        '91.0000,77.2094,Theft,01/01/2024,2\n'
+    )
+
+    def test_rows_are_inserted_in_chunks(self):
+        importer = CSVCrimeDataImporter(batch_size=2)
+        with mock.patch.object(CrimePoint.objects, 'bulk_create', wraps=CrimePoint.objects.bulk_create) as bulk_create:
+            result = importer.import_file(io.BytesIO(self.CSV.encode('utf-8')))
+
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2])
+        self.assertEqual((result['rows_read'], result['imported'], result['skipped']), (5, 4, 1))
+        self.assertTrue(result['errors'][0].startswith('Row 6: Invalid coordinates'))
+
+    def test_date_format_detection_and_fallbacks(self):
+        result = self._import(self.CSV)
+
+        self.assertEqual(result['date_format'], '%d/%m/%Y')
+        self.assertEqual(result['date_fallbacks'], 1)
+        dates = dict(CrimePoint.objects.values_list('crime_type', 'occurred_at__date'))
+        self.assertEqual(dates['theft'].isoformat(), '2023-12-25')
+        self.assertEqual(dates['robbery'].isoformat(), '2024-01-13')
+
+    def test_crime_type_priority(self):
+        importer = CSVCrimeDataImporter()
+        self.assertEqual(importer._normalize_crime_type('Burglary'), 'burglary')
+        self.assertEqual(importer._normalize_crime_type('Burglary - theft from dwelling'), 'burglary')
+        self.assertEqual(importer._normalize_crime_type('Armed robbery with assault'), 'robbery')
+        self.assertEqual(importer._normalize_crime_type('Jaywalking'), 'other')
+
+    def test_reimport_deduplicates_and_upserts(self):
+        self._import(self.CSV)
+        again = self._import(self.CSV)
+        self.assertEqual((again['imported'], again['duplicates'], again['updated']), (0, 4, 0))
+
+        changed = self.CSV.replace('Larceny,25/12/2023,2', 'Larceny,25/12/2023,4')
+        plain = self._import(changed)
+        self.assertEqual((plain['updated'], plain['duplicates']), (0, 4))
+        upserted = self._import(changed, upsert=True)
+        self.assertEqual((upserted['imported'], upserted['updated'], upserted['duplicates']), (0, 1, 3))
+
+        self.assertEqual(CrimePoint.objects.count(), 4)
+        self.assertEqual(CrimePoint.objects.get(crime_type='theft').severity, 4)
+
+    def test_rows_stored_concurrently_count_as_duplicates(self):
+        importer = CSVCrimeDataImporter()
+        insert_new_points = importer._insert_new_points
+
+        def racing_insert(points):
+            # Another import stores the first row between our lookup and insert
+            if not CrimePoint.objects.exists():
+                rival = points[0]
+                CrimePoint.objects.create(latitude=rival.latitude, longitude=rival.longitude,
+                                          crime_type=rival.crime_type, occurred_at=rival.occurred_at,
+                                          source=rival.source, content_hash=rival.content_hash)
+            return insert_new_points(points)
+
+        with mock.patch.object(importer, '_insert_new_points', side_effect=racing_insert):
+            result = importer.import_file(io.BytesIO(self.CSV.encode('utf-8')))
+
+        self.assertEqual((result['imported'], result['duplicates']), (3, 1))
+        self.assertEqual(CrimePoint.objects.count(), 4)
+
+    def test_gzip_input(self):
+        result = CSVCrimeDataImporter().import_file(io.BytesIO(gzip.compress(self.CSV.encode('utf-8'))))
+        self.assertEqual(result['imported'], 4)
+
+        ndjson = '{"lat": 28.6139, "lon": 77.2090, "type": "theft", "date": "2024-01-08"}\n'
+        result = NDJSONCrimeDataImporter().import_file(io.BytesIO(gzip.compress(ndjson.encode('utf-8'))))
+        self.assertEqual(result['imported'], 1)
+
+    @override_settings(CRIME_FEED_API_KEYS=['feed-secret'])
+    def test_ingest_endpoint_checks_feed_key(self):
+        url = '/api/police/report-crimes/bulk/'
+        body = json.dumps({'incidents': [
+            {'lat': 28.6139, 'lon': 77.2090, 'type': 'Mugging', 'occurred_at': '2024-01-08T22:30:00'},
+            {'lat': 28.6139, 'lon': 77.2090, 'type': 'Mugging', 'occurred_at': '2024-01-08T22:30:00'},
+            {'lat': 95, 'lon': 77.2090, 'type': 'theft'},
+        ]})
+
+        for headers in ({}, {'HTTP_X_FEED_KEY': 'wrong'}):
+            response = self.client.post(url, body, content_type='application/json', **headers)
+            self.assertEqual(response.status_code, 401)
+
+        response = self.client.post(url, body, content_type='application/json', HTTP_X_FEED_KEY='feed-secret')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['created'], data['duplicates'], data['errors']), (1, 1, 1))
+        point = CrimePoint.objects.get()
+        self.assertEqual((point.crime_type, point.source), ('robbery', 'partner_feed'))
+
+    def test_undated_rows_are_deduplicated_on_reupload(self):
+        csv_text = (
+            'latitude,longitude,crime_type,date\n'
+            '28.6139,77.2090,theft,\n'
+            '28.6140,77.2091,assault,not a date\n'
+        )
+        first = self._import(csv_text)
+        self.assertEqual((first['imported'], first['date_fallbacks']), (2, 2))
+
+        second = self._import(csv_text)
+        self.assertEqual((second['imported'], second['duplicates']), (0, 2))
+        self.assertEqual(CrimePoint.objects.count(), 2)
+
+    def test_malformed_geojson_feature_is_skipped(self):
+        feature = ('{"type": "Feature", "geometry": {"type": "Point", "coordinates": [%s]},'
+                   ' "properties": {"crime_type": "theft", "description": "left \\" } ] here"}}')
+        geojson = ('{"type": "FeatureCollection", "features": [%s, %s, %s]}'
+                   % (feature % '77.2090, 28.6139', feature % '77.2091, 28.6140,', feature % '77.2092, 28.6141'))
+
+        with mock.patch('safe_route_app.utils.json_importer._JSONStreamReader.READ_SIZE', 16):
+            result = self._import(geojson, GeoJSONCrimeDataImporter)
+
+        self.assertEqual((result['rows_read'], result['imported'], result['skipped']), (3, 2, 1))
+        self.assertTrue(result['errors'][0].startswith('Feature 2: Invalid JSON'))
+        self.assertEqual(set(CrimePoint.objects.values_list('description', flat=True)), {'left " } ] here'})
+
+    def test_json_keys_are_mapped_per_record(self):
+        ndjson = (
+            '{"lat": 28.6139, "lon": 77.2090, "type": "theft"}\n'
+            '{"latitude": 28.6140, "longitude": 77.2091, "offense": "Burglary", "incident_date": "2024-02-01"}\n'
+        )
+        result = self._import(ndjson, NDJSONCrimeDataImporter)
+
+        self.assertEqual((result['imported'], result['date_fallbacks']), (2, 1))
+        burglary = CrimePoint.objects.get(crime_type='burglary')
+        self.assertEqual(burglary.occurred_at.date().isoformat(), '2024-02-01')
+
+    def _write_csv(self, text):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+            f.write(text)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    @mock.patch.object(CSVCrimeDataImporter, 'PARALLEL_MIN_BYTES', 0)
+    def test_parallel_parsing_only_when_safe(self):
+        plain = self._write_csv('latitude,longitude,description\n28.6139,77.2090,one line\n')
+        multiline = self._write_csv('latitude,longitude,description\n28.6139,77.2090,"two\nlines"\n')
+        importer = CSVCrimeDataImporter(processes=2)
+
+        self.assertTrue(importer._should_parse_in_parallel(plain))
+        self.assertFalse(importer._should_parse_in_parallel(multiline))
+        self.assertFalse(CSVCrimeDataImporter()._should_parse_in_parallel(plain))
+
+        # Never fork from a worker thread
+        in_thread = []
+        thread = threading.Thread(target=lambda: in_thread.append(importer._should_parse_in_parallel(plain)))
+        thread.start()
+        thread.join()
+        self.assertEqual(in_thread, [False])
+
+        result = importer.import_file(multiline)
+        self.assertEqual(result['imported'], 1)
+        self.assertEqual(CrimePoint.objects.get().description, 'two\nlines')
+
+    def test_undated_pushes_are_separate_incidents(self):
+        incident = {'lat': 28.6139, 'lon': 77.2090, 'type': 'theft'}
+        first = ingest_incidents([incident])
+        second = ingest_incidents([incident])
+
+        self.assertEqual([first[0]['status'], second[0]['status']], ['created', 'created'])
+        self.assertEqual(CrimePoint.objects.count(), 2)
+
+    def test_ingest_survives_concurrent_duplicate_push(self):
+        incident = {'lat': 28.6139, 'lon': 77.2090, 'type': 'theft', 'occurred_at': '2024-01-08T22:30:00'}
+        bulk_create = CrimePoint.objects.bulk_create
+
+        def racing_bulk_create(points, **kwargs):
+            # Another request stores the same incident between our check and insert
+            rival = points[0]
+            CrimePoint.objects.create(latitude=rival.latitude, longitude=rival.longitude,
+                                      crime_type=rival.crime_type, occurred_at=rival.occurred_at,
+                                      source=rival.source, content_hash=rival.content_hash)
+            return bulk_create(points, **kwargs)
+
+        with mock.patch.object(CrimePoint.objects, 'bulk_create', side_effect=racing_bulk_create):
+            results = ingest_incidents([incident])
+
+        stored = CrimePoint.objects.get()
+        self.assertEqual(results, [{'index': 0, 'status': 'created', 'id': stored.pk}])
+
+    def test_stalled_import_jobs_are_failed(self):
+        now = datetime.now(timezone.utc)
+        stalled = ImportJob.objects.create(file_name='a.csv', file_path='crime_imports/missing_a.csv',
+                                           status='running', started_at=now - timedelta(hours=2),
+                                           heartbeat_at=now - timedelta(hours=1))
+        busy = ImportJob.objects.create(file_name='b.csv', file_path='crime_imports/missing_b.csv',
+                                        status='running', started_at=now - timedelta(hours=2),
+                                        heartbeat_at=now)
+
+        self.assertEqual(fail_stale_import_jobs(), 1)
+        stalled.refresh_from_db()
+        busy.refresh_from_db()
+        self.assertEqual((stalled.status, busy.status), ('failed', 'running'))
+        self.assertIn('stopped responding', stalled.error_message)
+
+    def test_clearing_existing_data_reports_progress(self):
+        self._import(self.CSV)
+        progress = []
+        importer = CSVCrimeDataImporter(progress_callback=lambda imp: progress.append(imp.rows_read))
+        importer.import_file(io.BytesIO(self.CSV.encode('utf-8')), clear_existing=True)
+
+        # The delete reports before any row is read
+        self.assertEqual(progress[0], 0)
+        self.assertEqual(CrimePoint.objects.count(), 4)
+
+    def test_finishing_job_keeps_stale_failure(self):
+        job = ImportJob.objects.create(file_name='a.csv', file_path='crime_imports/missing_a.csv')
+
+        class SweptImporter(CSVCrimeDataImporter):
+            def import_file(self, source, clear_existing=False, upsert=False):
+                # The stale-job sweep fails the job while it is still importing
+                ImportJob.objects.filter(id=job.id).update(status='failed', error_message='stalled')
+                return {'success': True}
+
+        with mock.patch.object(import_jobs, 'get_importer_class', return_value=SweptImporter), \
+                mock.patch.object(import_jobs.default_storage, 'path', return_value='/nonexistent.csv'):
+            finished = run_import_job(job.id)
+
+        self.assertEqual((finished.status, finished.error_message), ('failed', 'stalled'))
+
+    @override_settings(CRIME_IMPORT_WORKERS=2)
+    def test_stale_pending_jobs_are_requeued_once(self):
+        job = ImportJob.objects.create(file_name='a.csv', file_path='crime_imports/missing_a.csv')
+        ImportJob.objects.filter(id=job.id).update(created_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        ImportJob.objects.create(file_name='b.csv', file_path='crime_imports/missing_b.csv')
+        self.addCleanup(import_jobs._queued_job_ids.clear)
+
+        executor = mock.Mock()
+        with mock.patch.object(import_jobs, '_get_executor', return_value=executor):
+            self.assertEqual(requeue_stale_pending_jobs(), 1)
+            requeue_stale_pending_jobs()
+
+        executor.submit.assert_called_once_with(import_jobs._run_queued_job, job.id)
+
+    def test_backfill_hashes_existing_points_once(self):
+        occurred_at = datetime(2024, 1, 8, 22, 30, tzinfo=timezone.utc)
+        for _ in range(2):
+            CrimePoint.objects.create(latitude=28.6139, longitude=77.2090, crime_type='theft',
+                                      occurred_at=occurred_at, source='csv_import')
+
+        migration = importlib.import_module('safe_route_app.migrations.0012_backfill_content_hash')
+        migration.backfill_content_hash(apps, None)
+
+        first, second = CrimePoint.objects.order_by('pk')
+        self.assertEqual(first.content_hash, CrimePoint.build_content_hash(
+            28.6139, 77.2090, 'theft', occurred_at, 'csv_import'))
+        self.assertIsNone(second.content_hash)
+
+
+class CrimeExportTests(TestCase):
+    """Keyset-paginated crime export: page boundaries, resuming and filters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+        # Several rows share each occurred_at, so pages often end inside a tie
+        points = []
+        for i in range(13):
+            points.append(CrimePoint(
+                latitude=28.61 + 0.01 * (i % 4),
+                longitude=77.20 + 0.01 * (i % 3),
+                crime_type=('theft', 'assault', 'robbery')[i % 3],
+                occurred_at=base + timedelta(days=(i * 7) % 4),
+                content_hash=f'export-{i}',
+            ))
+        CrimePoint.objects.bulk_create(points)
+        cls.rows = list(
+            CrimePoint.objects.order_by('occurred_at', 'id').values_list('id', 'occurred_at')
+        )
+
+    def setUp(self):
+        session = self.client.session
+        session['firebase_uid'] = 'exporter'
+        session.save()
+
+    def _ids(self, queryset=None, **kwargs):
+        queryset = CrimePoint.objects.all() if queryset is None else queryset
+        return [row[0] for row in iter_crime_rows(queryset, **kwargs)]
+
+    def test_page_boundaries_inside_ties(self):
+        expected = [pk for pk, _ in self.rows]
+        self.assertGreater(len(expected), len({at for _, at in self.rows}))
+        for page_size in (1, 2, 3, 5, 13, 100):
+            self.assertEqual(self._ids(page_size=page_size, chunk_size=2), expected, page_size)
+
+    def test_resume_after_last_row(self):
+        expected = [pk for pk, _ in self.rows]
+        for position, (pk, occurred_at) in enumerate(self.rows):
+            self.assertEqual(self._ids(after=(occurred_at, pk), page_size=2), expected[position + 1:])
+
+        # The same through the "<occurred_at>,<id>" cursor string
+        pk, occurred_at = self.rows[4]
+        filters = parse_export_filters({'after': f'{occurred_at.isoformat()},{pk}'})
+        lines = ''.join(export_crime_points('ndjson', filters, page_size=3)).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], expected[5:])
+
+    def test_filter_combinations(self):
+        points = list(CrimePoint.objects.order_by('occurred_at', 'id'))
+        since = datetime(2024, 3, 2, tzinfo=timezone.utc)
+        until = datetime(2024, 3, 4, tzinfo=timezone.utc)
+        cases = [
+            ({'type': 'theft, robbery'}, lambda p: p.crime_type in ('theft', 'robbery')),
+            ({'since': '2024-03-02', 'until': '2024-03-03'}, lambda p: since <= p.occurred_at < until),
+            ({'min_lat': '28.605', 'max_lat': '28.625', 'min_lon': '77.205', 'max_lon': '77.215', 'type': 'assault'},
+             lambda p: 28.605 <= p.latitude <= 28.625 and 77.205 <= p.longitude <= 77.215
+             and p.crime_type == 'assault'),
+            ({'type': 'theft', 'since': '2024-03-02T00:00:00', 'after': f'{points[3].occurred_at.isoformat()},{points[3].pk}'},
+             lambda p: p.crime_type == 'theft' and p.occurred_at >= since
+             and (p.occurred_at, p.pk) > (points[3].occurred_at, points[3].pk)),
+        ]
+        for params, matches in cases:
+            filters = parse_export_filters(params)
+            after = filters.pop('after', None)
+            expected = [p.pk for p in points if matches(p)]
+            self.assertTrue(expected, params)
+            self.assertEqual(self._ids(filter_crime_points(**filters), after=after, page_size=2), expected, params)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'after': 'garbage'},
+            {'after': '2024-03-01T12:00:00'},
+            {'after': '2024-03-01T12:00:00,abc'},
+            {'after': 'yesterday,5'},
+            {'since': 'last week'},
+            {'min_lat': '28.6', 'max_lat': '28.7'},
+            {'min_lat': 'north', 'max_lat': '28.7', 'min_lon': '77.2', 'max_lon': '77.3'},
+        ):
+            with self.assertRaises(ValueError, msg=params):
+                parse_export_filters(params)
+
+        response = self.client.get('/api/export-crime-data/', {'after': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/export-crime-data/', {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_view_streams_csv_from_cursor(self):
+        pk, occurred_at = self.rows[-3]
+        response = self.client.get('/api/export-crime-data/', {'after': f'{occurred_at.isoformat()},{pk}'})
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'id')
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]], [pk for pk, _ in self.rows[-2:]])
+
+
+class CrimeClusterTests(TestCase):
+    """Server-side clustering of crime points for the map."""
+
+    def test_cluster_risk_uses_type_weights(self):
+        occurred_at = datetime(2024, 1, 8, 22, 30, tzinfo=timezone.utc)
+        points = [
+            CrimePoint(latitude=28.61 + i * 1e-5, longitude=77.20, crime_type=crime_type,
+                       severity=severity, occurred_at=occurred_at)
+            for i, (crime_type, severity) in enumerate(
+                [('assault', 1)] * 300 + [('theft', 2)] * (MAX_RAW_POINTS - 299)
+            )
+        ]
+        CrimePoint.objects.bulk_create(points)
+
+        result = get_crime_clusters(28.6, 28.7, 77.1, 77.3, zoom=10)
+
+        self.assertEqual(result['mode'], 'clusters')
+        [cluster] = result['clusters']
+        self.assertEqual(cluster['risk'], sum(point.risk_weight for point in points))
+        self.assertEqual(cluster['types'], {'assault': 300, 'theft': MAX_RAW_POINTS - 299})
+
+
+class CrimePointSignalTests(TestCase):
+    """Single-row changes reach crime_points_changed receivers (tile cache)."""
+
+    def setUp(self):
+        self.batches = []
+        receiver = lambda sender, points, **kwargs: self.batches.append(
+            sorted((p.latitude, p.longitude) for p in points))
+        crime_points_changed.connect(receiver, weak=False)
+        self.addCleanup(crime_points_changed.disconnect, receiver)
+
+    def test_save_move_and_admin_delete_notify(self):
+        point = CrimePoint.objects.create(latitude=28.61, longitude=77.20, crime_type='theft',
+                                          occurred_at=datetime(2024, 1, 8, tzinfo=timezone.utc))
+        point.latitude = 28.70
+        point.save()
+        site._registry[CrimePoint].delete_queryset(None, CrimePoint.objects.all())
+
+        self.assertEqual(self.batches, [
+            [(28.61, 77.20)],
+            [(28.61, 77.20), (28.70, 77.20)],
+            [(28.70, 77.20)],
+        ])
+
+
+class TrackingTests(TestCase):
+    """Trip tracking endpoints."""
+
+    def test_end_tracking_saves_trip_without_extra_queries(self):
+        profile = UserProfile.objects.create(firebase_uid='rider-1', email='rider@example.com',
+                                             phone='0', full_name='Rider')
+        started = datetime.now(timezone.utc) - timedelta(minutes=42, seconds=10)
+        travel = TravelHistory.objects.create(
+            user=profile, start_latitude=28.61, start_longitude=77.20, start_address='A',
+            end_latitude=28.70, end_longitude=77.10, end_address='B', distance_km=0,
+            duration_minutes=0, safety_score='B', route_data={'location_history': []},
+            start_time=started, expires_at=started + timedelta(days=30)
+        )
+        session = self.client.session
+        session['firebase_uid'] = profile.firebase_uid
+        session.save()
+
+        # One read of the trip and one UPDATE of the ended fields
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/tracking/end/', {'travel_id': str(travel.id), 'distance_km': 5.5},
+                                        content_type='application/json')
+        trip_queries = [q['sql'].split()[0] for q in queries if 'travelhistory' in q['sql']]
+        self.assertEqual(trip_queries, ['SELECT', 'UPDATE'])
+
+        self.assertEqual(response.json()['duration_minutes'], 42)
+        travel.refresh_from_db()
+        self.assertEqual((travel.duration_minutes, travel.distance_km), (42, 5.5))
+        self.assertIsNotNone(travel.end_time)
+        self.assertEqual(travel.route_data, {'location_history': []})
+
+
+class ColumnarEncodingTests(SimpleTestCase):
+    """Columnar payloads for bulk geo endpoints."""
+
+    ITEMS = [
+        {'lat': 28.61391, 'lng': 77.20902, 'occurred_at': '2024-01-08T22:30:00+00:00'},
+        {'lat': 28.61402, 'lng': None, 'occurred_at': '2024-01-08T22:45:00+00:00'},
+    ]
+
+    def _encode(self, query):
+        request = RequestFactory().get('/api/crimes/', query)
+        return encode_items(request, self.ITEMS, time_fields=('occurred_at',))
+
+    def test_quantized_delta_round_trip(self):
+        result = self._encode({'format': 'columnar'})
+        self.assertEqual(result['columns']['lat'], [2861391, 11])
+        self.assertEqual(result['columns']['lng'], [7720902, None])
+        self.assertEqual(result['columns']['occurred_at'], [1704753000, 900])
+        self.assertTrue(result['encoding']['coordinates']['delta'])
+
+    def test_delta_needs_quantize(self):
+        result = self._encode({'format': 'columnar', 'quantize': 'false', 'delta': 'true'})
+        self.assertEqual(result['columns']['lat'], [28.61391, 28.61402])
+        self.assertEqual(result['encoding'], {})
+
+        with self.assertRaises(ValueError):
+            to_columnar(self.ITEMS, quantize=False, delta=True)
+
+
+class CountingBackend(AIBackend):
+    """Local backend that records how often it was called."""
+
+    def __init__(self, **options):
+        self.local = LocalBackend(**options)
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        return self.local.generate(prompt)
+
+
+class AIAdvisorFailoverTests(TestCase):
+    """Latency and failover of the AI advisor, using the offline backend."""
+
+    ROUTE = {'score': 72, 'grade': 'B', 'crime_count': 4, 'safety_zone_count': 1,
+             'time_of_day': 'night', 'distance_km': 3.2}
+
+    def test_local_backend_is_deterministic(self):
+        advisor = GeminiSafetyAdvisor(backend=LocalBackend())
+        explanation = advisor.explain_route_choice(self.ROUTE)
+        self.assertIn('70-74', explanation)
+        self.assertEqual(LocalBackend().generate('- Score: 5'), LocalBackend().generate('- Score: 5'))
+
+        failures = [LocalBackend(failure_rate=0.5, seed=7) for _ in range(2)]
+        outcomes = []
+        for backend in failures:
+            run = []
+            for _ in range(20):
+                try:
+                    backend.generate('- Score: 5')
+                    run.append(True)
+                except Exception:
+                    run.append(False)
+            outcomes.append(run)
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertIn(False, outcomes[0])
+
+    def test_breaker_opens_on_failures_and_recovers(self):
+        breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4, reset_seconds=0.05)
+        failing = LocalBackend(failure_rate=1.0)
+        for _ in range(4):
+            with self.assertRaises(Exception):
+                breaker.call(failing.generate, 'prompt')
+        self.assertEqual(breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(LocalBackend().generate, 'prompt')
+
+        # After the reset time one trial call decides
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, 'half-open')
+        with self.assertRaises(Exception):
+            breaker.call(failing.generate, 'prompt')
+        self.assertEqual(breaker.state, 'open')
+
+        time.sleep(0.06)
+        breaker.call(LocalBackend().generate, 'prompt')
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_slow_calls_open_the_breaker(self):
+        breaker = CircuitBreaker(slow_call_seconds=0.01, window=2, min_calls=2)
+        slow = LocalBackend(latency=0.02)
+        breaker.call(slow.generate, 'prompt')
+        breaker.call(slow.generate, 'prompt')
+        self.assertEqual(breaker.state, 'open')
+
+    def test_open_breaker_skips_backend(self):
+        backend = CountingBackend(failure_rate=1.0)
+        advisor = GeminiSafetyAdvisor(backend=backend)
+        advisor.breaker = CircuitBreaker(window=3, min_calls=3, reset_seconds=60)
+        fallback = advisor._fallback_explanation(self.ROUTE)
+
+        for _ in range(3):
+            self.assertEqual(advisor.explain_route_choice(self.ROUTE), fallback)
+        self.assertEqual(backend.calls, 3)
+
+        started = time.monotonic()
+        self.assertEqual(advisor.explain_route_choice(self.ROUTE), fallback)
+        self.assertEqual(advisor.generate_safety_tips(self.ROUTE), advisor._fallback_safety_tips(self.ROUTE))
+        self.assertEqual(advisor.cached_explanation(self.ROUTE), fallback)
+        self.assertEqual(backend.calls, 3)
+        self.assertLess(time.monotonic() - started, 0.05)
+
+    def test_gemini_backend_request_matches_sdk(self):
+        # Goes through the real SDK request building; only the transport is replaced
+        import google.ai.generativelanguage as glm
+
+        backend = GeminiBackend('test-key')
+        transport = mock.Mock()
+        transport.generate_content.return_value = glm.GenerateContentResponse(candidates=[
+            glm.Candidate(content=glm.Content(parts=[glm.Part(text='Stay on main roads.')]))
+        ])
+        backend.model._client = transport
+
+        self.assertEqual(backend.generate('Explain this route'), 'Stay on main roads.')
+        request = transport.generate_content.call_args.args[0]
+        self.assertEqual(request.contents[0].parts[0].text, 'Explain this route')
+
+
+class AdviceCacheTests(TestCase):
+    """Model answers are cached per bucketed route features, across workers."""
+
+    ROUTE = AIAdvisorFailoverTests.ROUTE
+
+    def test_similar_routes_share_a_key(self):
+        key = advice_cache_key('explanation', route_features(self.ROUTE), [])
+        similar = dict(self.ROUTE, score=74.6, crime_count=5, distance_km=3.1)
+        different = dict(self.ROUTE, score=75)
+
+        self.assertEqual(route_features(similar)['score'], '70-74')
+        self.assertEqual(advice_cache_key('explanation', route_features(similar), []), key)
+        self.assertNotEqual(advice_cache_key('explanation', route_features(different), []), key)
+        self.assertNotEqual(advice_cache_key('tips', route_features(self.ROUTE)), key)
+
+    def test_hits_misses_and_sharing_between_workers(self):
+        backend = CountingBackend()
+        advisor = GeminiSafetyAdvisor(backend=backend)
+
+        first = advisor.explain_route_choice(self.ROUTE)
+        self.assertEqual(advisor.explain_route_choice(dict(self.ROUTE, score=73)), first)
+        self.assertEqual(backend.calls, 1)
+
+        advisor.explain_route_choice(dict(self.ROUTE, score=90))
+        self.assertEqual(backend.calls, 2)
+
+        # Another worker has an empty local LRU but reads the shared cache
+        other_backend = CountingBackend()
+        other = GeminiSafetyAdvisor(backend=other_backend)
+        self.assertEqual(other.cached_explanation(self.ROUTE), first)
+        self.assertEqual(other.explain_route_choice(self.ROUTE), first)
+        self.assertEqual(other_backend.calls, 0)
+
+
+class InlineExecutor:
+    """Collects submitted calls so a test can run them when it chooses."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, func, *args):
+        self.calls.append((func, args))
+
+    def run_all(self):
+        for func, args in self.calls:
+            func(*args)
+        self.calls = []
+
+
+class ExplanationJobTests(TestCase):
+    """Deferred route explanations: the job, polling and the timeout fallback."""
+
+    ROUTE = AIAdvisorFailoverTests.ROUTE
+
+    def _start(self, backend):
+        advisor = GeminiSafetyAdvisor(backend=backend)
+        executor = InlineExecutor()
+        with mock.patch.object(explanation_jobs, 'get_gemini_advisor', return_value=advisor), \
+                mock.patch.object(explanation_jobs, '_get_executor', return_value=executor):
+            explanation, token = explanation_jobs.request_explanation(self.ROUTE)
+        self.assertIsNone(explanation)
+        return advisor, executor, token
+
+    def _run(self, advisor, executor):
+        with mock.patch.object(explanation_jobs, 'get_gemini_advisor', return_value=advisor):
+            executor.run_all()
+
+    def test_deferred_job_is_polled_until_ready(self):
+        advisor, executor, token = self._start(CountingBackend())
+        self.assertEqual(explanation_jobs.get_explanation_job(token), {'status': 'pending'})
+
+        self._run(advisor, executor)
+        job = explanation_jobs.get_explanation_job(token)
+        self.assertEqual(job, {'status': 'ready', 'fallback': False,
+                               'explanation': advisor.explain_route_choice(self.ROUTE)})
+        self.assertIn('Route summary', job['explanation'])
+
+        # The answer is cached now, so the next request needs no job
+        with mock.patch.object(explanation_jobs, 'get_gemini_advisor', return_value=advisor):
+            self.assertEqual(explanation_jobs.request_explanation(self.ROUTE), (job['explanation'], None))
+        self.assertEqual(advisor.backend.calls, 1)
+
+    def test_failed_model_call_is_marked_as_fallback(self):
+        advisor, executor, token = self._start(LocalBackend(failure_rate=1.0))
+        self._run(advisor, executor)
+
+        self.assertEqual(explanation_jobs.get_explanation_job(token), {
+            'status': 'ready', 'fallback': True,
+            'explanation': advisor._fallback_explanation(self.ROUTE),
+        })
+
+    def test_job_past_the_timeout_answers_with_fallback(self):
+        advisor, executor, token = self._start(CountingBackend())
+
+        with override_settings(AI_EXPLANATION_TIMEOUT=0), \
+                mock.patch.object(explanation_jobs, 'get_gemini_advisor', return_value=advisor):
+            job = explanation_jobs.get_explanation_job(token)
+        expected = {'status': 'ready', 'fallback': True,
+                    'explanation': advisor._fallback_explanation(self.ROUTE)}
+        self.assertEqual(job, expected)
+
+        # The model answering late does not replace the answer already given
+        self._run(advisor, executor)
+        self.assertEqual(explanation_jobs.get_explanation_job(token), expected)
+        self.assertIsNone(explanation_jobs.get_explanation_job('unknown-token'))
+
+    def test_explain_with_tips_falls_back_only_for_the_late_call(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        class SlowTipsBackend(LocalBackend):
+            def generate(self, prompt):
+                if 'safety tips' in prompt:
+                    release.wait(5)
+                return super().generate(prompt)
+
+        advisor = GeminiSafetyAdvisor(backend=SlowTipsBackend())
+        # Worker threads do not share the test transaction, so keep answers in memory
+        advisor.cache = AdviceCache(60, 16, cache_alias='default')
+        route = dict(self.ROUTE, distance_km=7.4)
+
+        started = time.monotonic()
+        with mock.patch.object(explanation_jobs, 'get_gemini_advisor', return_value=advisor):
+            explanation, tips = explanation_jobs.explain_with_tips(route, timeout=0.2)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(explanation, LocalBackend().generate(
+            advisor._build_explanation_prompt(route_features(route), [])
+        ))
+        self.assertEqual(tips, advisor._fallback_safety_tips(route))
+
+    def test_jobs_and_explain_with_tips_use_separate_pools(self):
+        self.assertIsNot(explanation_jobs._get_executor('jobs'), explanation_jobs._get_executor('advice'))
+
+
+class FirebaseTokenCacheTests(SimpleTestCase):
+    """Verified ID tokens are reused only until the token's own expiry."""
+
+    def setUp(self):
+        firebase_config._verified_tokens.clear()
+        self.addCleanup(firebase_config._verified_tokens.clear)
+
+    def _verify(self, token, exp):
+        decoded = {'uid': 'user-1', 'exp': exp}
+        with mock.patch.object(firebase_config, 'initialize_firebase'), \
+                mock.patch('firebase_admin.auth.verify_id_token', return_value=decoded) as verify:
+            result = firebase_config.verify_firebase_token(token)
+        return result, verify.call_count
+
+    def test_verified_token_is_cached(self):
+        exp = time.time() + 600
+        self.assertEqual(self._verify('token-a', exp), ({'uid': 'user-1', 'exp': exp}, 1))
+        self.assertEqual(self._verify('token-a', exp), ({'uid': 'user-1', 'exp': exp}, 0))
+        self.assertEqual(self._verify('token-b', exp)[1], 1)
+
+    def test_cached_token_expires_with_the_token(self):
+        exp = time.time() + 600
+        self._verify('token-a', exp)
+
+        later = time.monotonic() + 601
+        with mock.patch('safe_route_app.utils.lru_cache.time.monotonic', return_value=later):
+            self.assertEqual(self._verify('token-a', exp)[1], 1)
+
+    def test_expired_token_is_not_cached(self):
+        # Still accepted within the clock skew tolerance, but never stored
+        exp = time.time() - 30
+        self._verify('token-a', exp)
+        self.assertEqual(self._verify('token-a', exp)[1], 1)
+
+    def test_concurrent_initialization_creates_one_app(self):
+        import firebase_admin
+
+        created = []
+
+        def slow_initialize_app(cred, options=None):
+            time.sleep(0.05)
+            if firebase_admin._apps:
+                raise ValueError('The default Firebase app already exists.')
+            created.append(cred)
+            firebase_admin._apps['[DEFAULT]'] = cred
+
+        with mock.patch.dict(firebase_admin._apps, clear=True), \
+                mock.patch.dict(os.environ, {'FIREBASE_SERVICE_ACCOUNT': '{}'}), \
+                mock.patch('firebase_admin.credentials.Certificate', side_effect=lambda info: object()), \
+                mock.patch('firebase_admin.initialize_app', side_effect=slow_initialize_app):
+            errors = []
+
+            def initialize():
+                try:
+                    firebase_config.initialize_firebase()
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=initialize) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual((len(created), errors), (1, []))
@@ -18,9 +18,13 @@ urlpatterns = [
     # API endpoints
     path('api/calculate-route/', views.calculate_safe_route, name='calculate_route'),
     path('api/get-crime-data/', views.get_crime_data, name='get_crime_data'),
+    path('tiles/crime/<int:z>/<int:x>/<int:y>', views.get_crime_tile, name='crime_tile'),
+    path('api/export-crime-data/', views.export_crime_data, name='export_crime_data'),
     path('api/generate-sample-data/', views.generate_sample_data, name='generate_sample_data'),
     path('api/upload-csv/', views.upload_crime_csv, name='upload_csv'),
+    path('api/import-jobs/<uuid:job_id>/', views.get_import_job_status, name='import_job_status'),
     path('api/get-ai-explanation/', views.get_ai_explanation, name='get_ai_explanation'),
+    path('api/ai-explanations/<uuid:token>/', views.get_ai_explanation_status, name='ai_explanation_status'),
     
     # Auth Routes
     path('auth/login/', views_auth.login_page, name='login_page'),
@@ -37,6 +41,7 @@ urlpatterns = [
     path('api/police/active-alerts/', views_police.get_active_alerts, name='get_active_alerts'),
     path('api/police/history/', views_police.get_alert_history, name='get_alert_history'),
     path('api/police/report-crime/', views_police.add_crime_report, name='add_crime_report'),
+    path('api/police/report-crimes/bulk/', views_police.add_crime_reports_bulk, name='add_crime_reports_bulk'),
     path('api/police/post-news/', views_police.post_news_update, name='post_news_update'),
     path('api/news/latest/', views_police.get_safety_news, name='get_safety_news'),
     path('api/police/nearby/', views_police.get_nearby_police, name='get_nearby_police'),
@@ -0,0 +1,213 @@
+"""
+Text generation backends for the AI safety advisor.
+
+- GeminiBackend: Google Gemini (needs GEMINI_API_KEY)
+- LocalBackend: deterministic offline stand-in with configurable latency
+  and failure rate, for development and for testing timeouts and failover
+
+Calls go through a CircuitBreaker: when too many recent calls failed or
+were slow, the breaker opens and callers go straight to their fallback
+instead of waiting for the remote API to time out again.
+"""
+from collections import deque
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+
+
+class AIBackendError(Exception):
+    """A backend call failed."""
+
+
+class CircuitOpenError(AIBackendError):
+    """The circuit breaker is open; the backend was not called."""
+
+
+class AIBackend:
+    """Interface: turn a prompt into text."""
+    
+    name = None
+    
+    def generate(self, prompt):
+        """
+        Generate text for a prompt.
+        
+        Raises:
+            Exception: on any failure (callers fall back)
+        """
+        raise NotImplementedError
+
+
+class GeminiBackend(AIBackend):
+    """Google Gemini through the google-generativeai SDK."""
+    
+    name = 'gemini'
+    
+    def __init__(self, api_key, model_name='gemini-2.0-flash-exp'):
+        # Imported here: the SDK is only needed when Gemini is configured
+        import google.generativeai as genai
+        
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+    
+    def generate(self, prompt):
+        # The pinned SDK takes no per-call timeout; callers enforce their own
+        # deadline (explanation_jobs) and the breaker counts slow calls
+        response = self.model.generate_content(prompt)
+        return response.text
+
+
+class LocalBackend(AIBackend):
+    """
+    Offline stand-in for the remote model.
+    
+    Answers are built from the "- Label: value" lines of the prompt, so the
+    same prompt always gives the same text. Latency and failures are
+    simulated from a seeded random sequence, which makes runs repeatable.
+    """
+    
+    name = 'local'
+    
+    FACT_PATTERN = re.compile(r'^- ([^:\n]+): (.+)$', re.MULTILINE)
+    
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def generate(self, prompt):
+        with self._lock:
+            fails = self._random.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fails:
+            raise AIBackendError('Simulated backend failure')
+        
+        facts = self.FACT_PATTERN.findall(prompt)
+        if 'safety tips' in prompt:
+            return "\n".join(
+                f"{i}. Keep in mind: {label.lower()} is {value}"
+                for i, (label, value) in enumerate(facts, 1)
+            )
+        return "Route summary: " + "; ".join(f"{label.lower()} {value}" for label, value in facts) + "."
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent calls and opens when too many failed or
+    were slower than slow_call_seconds.
+    
+    closed -> open: failure_rate reached over the last `window` calls
+                    (once at least min_calls were made)
+    open -> half-open: after reset_seconds, one trial call is let through
+    half-open -> closed on success, back to open on failure
+    """
+    
+    def __init__(self, failure_rate=0.5, slow_call_seconds=5.0, window=20, min_calls=5, reset_seconds=30.0):
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.reset_seconds = reset_seconds
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+    
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+    
+    def acquire(self):
+        """
+        Ask to make a call.
+        
+        Returns:
+            None if the breaker is open, 'trial' for the half-open trial
+            call, else 'call'; pass it back to record()
+        """
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return 'call'
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return 'trial'
+            return None
+    
+    def record(self, permit, success, duration):
+        """Record the outcome of a call allowed by acquire()."""
+        ok = success and duration <= self.slow_call_seconds
+        with self._lock:
+            if permit == 'trial':
+                self._trial_running = False
+                if ok:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+            
+            if self._opened_at is not None:
+                # Late result of a call made before the breaker opened
+                return
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if (len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._opened_at = time.monotonic()
+    
+    def call(self, func, *args):
+        """
+        Call func through the breaker.
+        
+        Raises:
+            CircuitOpenError: when the breaker is open
+        """
+        permit = self.acquire()
+        if permit is None:
+            raise CircuitOpenError('AI backend unavailable (circuit open)')
+        started = time.monotonic()
+        try:
+            result = func(*args)
+        except Exception:
+            self.record(permit, False, time.monotonic() - started)
+            raise
+        self.record(permit, True, time.monotonic() - started)
+        return result
+
+
+def create_backend():
+    """
+    Backend selected by settings.AI_BACKEND ('gemini' or 'local').
+    
+    Returns:
+        The backend, or None when Gemini is not configured
+    """
+    if settings.AI_BACKEND == 'local':
+        return LocalBackend(
+            latency=settings.AI_LOCAL_BACKEND_LATENCY,
+            failure_rate=settings.AI_LOCAL_BACKEND_FAILURE_RATE
+        )
+    
+    if not settings.GEMINI_API_KEY:
+        return None
+    try:
+        # Use Gemini 2.0 Flash (experimental but available)
+        backend = GeminiBackend(settings.GEMINI_API_KEY)
+        print("✅ Gemini AI initialized with gemini-2.0-flash-exp")
+        return backend
+    except Exception as e:
+        print(f"❌ Gemini AI initialization failed: {e}")
+        return None
@@ -0,0 +1,172 @@
+"""
+High-volume sample crime data for load testing.
+Locations, types, severities and times are drawn as NumPy arrays per chunk
+and written with bulk_create, so millions of points can be seeded in minutes.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import CrimePoint
+from ..signals import crime_points_changed
+from .data_generator import SampleDataGenerator
+
+
+KM_PER_DEGREE = 111.0
+
+
+class BulkSampleDataGenerator(SampleDataGenerator):
+    """
+    Generate large sample crime datasets around a center point.
+
+    Distributions:
+    - uniform: points spread evenly over the disk
+    - hotspot: most points clustered (Gaussian) around a few random hotspots
+      of uneven weight, the rest spread evenly as background noise
+    """
+
+    DISTRIBUTIONS = ('uniform', 'hotspot')
+    SEVERITY_WEIGHTS = [10, 40, 35, 15]
+
+    # Share of points not attached to any hotspot
+    BACKGROUND_SHARE = 0.2
+
+    # Points drawn per NumPy pass; each pass is written in batch_size inserts
+    CHUNK_SIZE = 50000
+
+    def __init__(self, center_lat, center_lon, radius_km=5, distribution='uniform',
+                 hotspots=20, hotspot_spread_km=0.4, seed=None, batch_size=5000):
+        """
+        Initialize generator for a specific area.
+
+        Args:
+            center_lat: Center latitude
+            center_lon: Center longitude
+            radius_km: Radius to generate data within (km)
+            distribution: 'uniform' or 'hotspot'
+            hotspots: Number of hotspots for the hotspot distribution
+            hotspot_spread_km: Standard deviation around each hotspot (km)
+            seed: Random seed for reproducible datasets
+            batch_size: Rows per INSERT
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {distribution}")
+
+        super().__init__(center_lat, center_lon, radius_km)
+        self.distribution = distribution
+        self.hotspot_spread_km = hotspot_spread_km
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+
+        self._lon_km_per_degree = KM_PER_DEGREE * max(np.cos(np.radians(center_lat)), 0.01)
+
+        # Hotspot centers and their (uneven) share of the clustered points
+        self._hotspot_offsets = self._uniform_disk_offsets(max(hotspots, 1))
+        weights = self.rng.pareto(1.5, size=len(self._hotspot_offsets[0])) + 0.1
+        self._hotspot_weights = weights / weights.sum()
+
+        # Crime type choice per area pattern, as lookup tables
+        self._area_names = list(self.AREA_PATTERNS.keys())
+        self._type_names = sorted({t for p in self.AREA_PATTERNS.values() for t in p['types']})
+        type_index = {name: i for i, name in enumerate(self._type_names)}
+        max_types = max(len(p['types']) for p in self.AREA_PATTERNS.values())
+        self._area_type_counts = np.array([len(self.AREA_PATTERNS[a]['types']) for a in self._area_names])
+        self._area_type_table = np.zeros((len(self._area_names), max_types), dtype=np.int64)
+        for a, area in enumerate(self._area_names):
+            for t, crime_type in enumerate(self.AREA_PATTERNS[area]['types']):
+                self._area_type_table[a, t] = type_index[crime_type]
+
+        self._descriptions = {
+            (a, t): f"Sample {crime_type} incident in {area} area"
+            for a, area in enumerate(self._area_names)
+            for t, crime_type in enumerate(self._type_names)
+        }
+
+    def generate(self, num_points, days_back=90, clear_existing=False, progress_callback=None):
+        """
+        Generate and insert sample crime points.
+
+        Args:
+            num_points: Number of crime points to generate
+            days_back: How many days back to generate data
+            clear_existing: Delete existing sample data in the area first
+            progress_callback: Called with the number of points written so far
+
+        Returns:
+            Number of points created
+        """
+        if clear_existing:
+            self._clear_existing_sample_data()
+
+        now = timezone.now()
+        created = 0
+        while created < num_points:
+            size = min(self.CHUNK_SIZE, num_points - created)
+            points = self._build_chunk(size, now, days_back)
+
+            for start in range(0, len(points), self.batch_size):
+                batch = points[start:start + self.batch_size]
+                with transaction.atomic():
+                    CrimePoint.objects.bulk_create(batch)
+                crime_points_changed.send(sender=CrimePoint, points=batch)
+                created += len(batch)
+                if progress_callback:
+                    progress_callback(created)
+
+        return created
+
+    def _build_chunk(self, size, now, days_back):
+        """Draw one chunk of points as arrays and turn them into CrimePoint objects."""
+        if self.distribution == 'hotspot':
+            x_km, y_km = self._hotspot_offsets_km(size)
+        else:
+            x_km, y_km = self._uniform_disk_offsets(size)
+
+        lats = (self.center_lat + y_km / KM_PER_DEGREE).tolist()
+        lons = (self.center_lon + x_km / self._lon_km_per_degree).tolist()
+
+        areas = self.rng.integers(0, len(self._area_names), size=size)
+        slots = (self.rng.random(size) * self._area_type_counts[areas]).astype(np.int64)
+        types = self._area_type_table[areas, slots]
+
+        severities = self.rng.choice(
+            [1, 2, 3, 4], size=size, p=np.array(self.SEVERITY_WEIGHTS) / sum(self.SEVERITY_WEIGHTS)
+        ).tolist()
+        seconds_ago = self.rng.integers(0, max(days_back, 1) * 86400, size=size).tolist()
+
+        type_names = self._type_names
+        descriptions = self._descriptions
+        return [
+            CrimePoint(
+                latitude=lat,
+                longitude=lon,
+                crime_type=type_names[crime_type],
+                severity=severity,
+                description=descriptions[(area, crime_type)],
+                occurred_at=now - timedelta(seconds=ago),
+                is_sample_data=True,
+                source='auto_generated'
+            )
+            for lat, lon, area, crime_type, severity, ago in zip(
+                lats, lons, areas.tolist(), types.tolist(), severities, seconds_ago
+            )
+        ]
+
+    def _uniform_disk_offsets(self, size):
+        """East/north offsets (km) uniformly distributed over the disk."""
+        angle = self.rng.uniform(0, 2 * np.pi, size)
+        distance = self.radius_km * np.sqrt(self.rng.random(size))
+        return distance * np.cos(angle), distance * np.sin(angle)
+
+    def _hotspot_offsets_km(self, size):
+        """East/north offsets (km) clustered around the hotspots."""
+        x_km, y_km = self._uniform_disk_offsets(size)
+
+        clustered = self.rng.random(size) >= self.BACKGROUND_SHARE
+        count = int(clustered.sum())
+        spots = self.rng.choice(len(self._hotspot_weights), size=count, p=self._hotspot_weights)
+        x_km[clustered] = self._hotspot_offsets[0][spots] + self.rng.normal(0, self.hotspot_spread_km, count)
+        y_km[clustered] = self._hotspot_offsets[1][spots] + self.rng.normal(0, self.hotspot_spread_km, count)
+        return x_km, y_km
@@ -0,0 +1,87 @@
+"""
+Chunked deletes for large tables.
+A single queryset.delete() on millions of rows runs as one long transaction
+(and the delete collector may load every row first). Here rows are removed
+in primary-key ranges, each in its own short transaction, so readers such
+as route scoring are never stuck behind one giant delete.
+"""
+import time
+
+from django.db import transaction
+
+from ..models import CrimePoint
+from ..signals import crime_points_changed
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def chunked_delete(queryset, batch_size=DEFAULT_BATCH_SIZE, progress_callback=None,
+                   batch_callback=None, only=(), pause=0):
+    """
+    Delete the rows of a queryset in primary-key ordered batches.
+
+    Args:
+        queryset: Rows to delete (unsliced)
+        batch_size: Rows per batch/transaction
+        progress_callback: Called with the number of rows deleted so far
+        batch_callback: Called with each batch of (partially loaded) instances
+            after it was deleted
+        only: Fields to load for batch_callback (the primary key is always loaded)
+        pause: Seconds to sleep between batches to leave room for other writers
+
+    Returns:
+        Number of rows deleted (not counting cascades)
+    """
+    model = queryset.model
+    pk_name = model._meta.pk.name
+    ordered = queryset.order_by('pk')
+    deleted = 0
+    last_pk = None
+
+    while True:
+        batch_qs = ordered if last_pk is None else ordered.filter(pk__gt=last_pk)
+        if batch_callback:
+            batch = list(batch_qs.only(pk_name, *only)[:batch_size])
+            pks = [obj.pk for obj in batch]
+        else:
+            batch = None
+            pks = list(batch_qs.values_list('pk', flat=True)[:batch_size])
+
+        if not pks:
+            break
+
+        # Delete by key range rather than an IN list of thousands of ids;
+        # re-applying the filter keeps rows in the range that don't match
+        with transaction.atomic():
+            _, per_model = queryset.filter(pk__gte=pks[0], pk__lte=pks[-1]).delete()
+        deleted += per_model.get(model._meta.label, 0)
+        last_pk = pks[-1]
+
+        if batch_callback:
+            batch_callback(batch)
+        if progress_callback:
+            progress_callback(deleted)
+        if len(pks) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return deleted
+
+
+def delete_crime_points(queryset, batch_size=DEFAULT_BATCH_SIZE, progress_callback=None, pause=0):
+    """
+    Chunked delete of crime points that notifies derived caches per batch.
+
+    Returns:
+        Number of crime points deleted
+    """
+    return chunked_delete(
+        queryset,
+        batch_size=batch_size,
+        progress_callback=progress_callback,
+        batch_callback=lambda batch: crime_points_changed.send(sender=CrimePoint, points=batch),
+        only=('latitude', 'longitude'),
+        pause=pause
+    )
@@ -0,0 +1,121 @@
+"""
+Zoom-aware clustering of crime points for the map.
+Points are aggregated in the database with a GROUP BY on grid-quantized
+coordinates, so the payload is bounded at every zoom level and every
+crime in the area is counted, not just an arbitrary subset.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Sum, Avg, F
+from django.db.models.functions import Floor
+
+from ..models import CrimePoint
+
+
+# Grid cells across one 256px map tile (~32px per cell)
+CELLS_PER_TILE = 8
+
+# Below this many crimes in the area, raw points are returned instead
+MAX_RAW_POINTS = 500
+
+# Upper bound on the number of grid cells in one response
+MAX_CLUSTERS = 2000
+
+MIN_ZOOM = 0
+MAX_ZOOM = 20
+
+
+def cell_size_for_zoom(zoom):
+    """Grid cell size in degrees for a web map zoom level."""
+    zoom = max(MIN_ZOOM, min(MAX_ZOOM, int(zoom)))
+    return 360.0 / (2 ** zoom * CELLS_PER_TILE)
+
+
+def get_crime_clusters(min_lat, max_lat, min_lon, max_lon, zoom):
+    """
+    Aggregate the crimes in a bounding box for a zoom level.
+
+    Returns:
+        dict with "mode" ("points" or "clusters"), "total" and either
+        "crimes" (raw points) or "clusters":
+        {"lat": 12.34, "lon": 56.78, "count": 42, "dominant_type": "theft",
+         "risk": 97, "types": {"theft": 30, ...}}
+
+        A cluster's risk is the sum of its crimes' risk_weight
+        (type base weight x severity).
+    """
+    crimes = CrimePoint.objects.within_bbox(min_lat, max_lat, min_lon, max_lon)
+
+    total = crimes.count()
+    cell_size = cell_size_for_zoom(zoom)
+
+    if total <= MAX_RAW_POINTS:
+        return {
+            'mode': 'points',
+            'total': total,
+            'cell_size_deg': cell_size,
+            'crimes': [
+                {
+                    'lat': crime['latitude'],
+                    'lon': crime['longitude'],
+                    'type': crime['crime_type'],
+                    'severity': crime['severity'],
+                    'occurred_at': crime['occurred_at'].isoformat(),
+                    'is_sample': crime['is_sample_data']
+                }
+                for crime in crimes.values(
+                    'latitude', 'longitude', 'crime_type', 'severity', 'occurred_at', 'is_sample_data'
+                )
+            ]
+        }
+
+    # Coarsen the grid when the box is large for this zoom
+    while ((max_lat - min_lat) / cell_size + 1) * ((max_lon - min_lon) / cell_size + 1) > MAX_CLUSTERS:
+        cell_size *= 2
+
+    rows = (
+        crimes
+        .annotate(
+            cell_y=Floor(F('latitude') / cell_size),
+            cell_x=Floor(F('longitude') / cell_size)
+        )
+        .values('cell_y', 'cell_x', 'crime_type')
+        .annotate(
+            count=Count('id'),
+            severity_sum=Sum('severity'),
+            avg_lat=Avg('latitude'),
+            avg_lon=Avg('longitude')
+        )
+        .order_by()
+    )
+
+    # One row per (cell, crime type); fold them into cells
+    cells = defaultdict(lambda: {'count': 0, 'risk': 0, 'lat_sum': 0.0, 'lon_sum': 0.0, 'types': {}})
+    for row in rows:
+        cell = cells[(row['cell_y'], row['cell_x'])]
+        cell['count'] += row['count']
+        cell['risk'] += CrimePoint.RISK_BASE_WEIGHTS.get(row['crime_type'], 1) * (row['severity_sum'] or 0)
+        cell['lat_sum'] += row['avg_lat'] * row['count']
+        cell['lon_sum'] += row['avg_lon'] * row['count']
+        cell['types'][row['crime_type']] = row['count']
+
+    clusters = [
+        {
+            # Centroid of the crimes rather than the cell center
+            'lat': cell['lat_sum'] / cell['count'],
+            'lon': cell['lon_sum'] / cell['count'],
+            'count': cell['count'],
+            'dominant_type': max(cell['types'], key=cell['types'].get),
+            'risk': cell['risk'],
+            'types': cell['types']
+        }
+        for cell in cells.values()
+    ]
+    clusters.sort(key=lambda c: c['count'], reverse=True)
+
+    return {
+        'mode': 'clusters',
+        'total': total,
+        'cell_size_deg': cell_size,
+        'clusters': clusters
+    }
@@ -0,0 +1,197 @@
+"""
+Streaming export of crime points as CSV or NDJSON.
+
+Rows are read in keyset pages ordered by (occurred_at, id): each page is a
+short index range scan that continues after the last row of the previous
+page, so there is no OFFSET or COUNT(*) and no transaction held open for
+the whole export. Within a page rows come from a server-side cursor
+(QuerySet.iterator), so memory use stays flat whatever the export size.
+
+An interrupted export can be resumed with the occurred_at and id of the
+last row received (`after`).
+"""
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..models import CrimePoint
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXPORT_FIELDS = [
+    'id', 'latitude', 'longitude', 'crime_type', 'severity',
+    'occurred_at', 'source', 'is_sample_data', 'description',
+]
+
+# Rows per keyset query, and rows fetched per round trip within one
+PAGE_SIZE = 10000
+CHUNK_SIZE = 2000
+
+# Rows rendered into one piece of the response
+ROWS_PER_WRITE = 500
+
+_ID = EXPORT_FIELDS.index('id')
+_OCCURRED_AT = EXPORT_FIELDS.index('occurred_at')
+
+
+def parse_export_filters(params):
+    """
+    Read export filters from request/command parameters.
+
+    - min_lat, max_lat, min_lon, max_lon: bounding box (all four or none)
+    - type: crime type, or several separated by commas
+    - since, until: ISO date or datetime; until is exclusive (a date
+      means the end of that day)
+    - after: "<occurred_at>,<id>" of the last row already received
+
+    Raises:
+        ValueError: for malformed values
+    """
+    filters = {}
+
+    bbox = [params.get(name) for name in ('min_lat', 'max_lat', 'min_lon', 'max_lon')]
+    if any(value not in (None, '') for value in bbox):
+        if any(value in (None, '') for value in bbox):
+            raise ValueError('Bounding box needs min_lat, max_lat, min_lon and max_lon')
+        filters['bbox'] = tuple(float(value) for value in bbox)
+
+    if params.get('type'):
+        filters['crime_types'] = [t.strip() for t in params['type'].split(',') if t.strip()]
+
+    if params.get('since'):
+        filters['since'] = _parse_time(params['since'], end_of_day=False)
+    if params.get('until'):
+        filters['until'] = _parse_time(params['until'], end_of_day=True)
+
+    if params.get('after'):
+        occurred_at, _, pk = params['after'].rpartition(',')
+        if not occurred_at or not pk.strip().isdigit():
+            raise ValueError('after must be "<occurred_at>,<id>" of the last row received')
+        filters['after'] = (_parse_time(occurred_at, end_of_day=False), int(pk))
+
+    return filters
+
+
+def filter_crime_points(bbox=None, crime_types=None, since=None, until=None):
+    """Crime points matching the export filters."""
+    queryset = CrimePoint.objects.all()
+    if bbox:
+        queryset = queryset.within_bbox(*bbox)
+    if crime_types:
+        queryset = queryset.filter(crime_type__in=crime_types)
+    if since:
+        queryset = queryset.filter(occurred_at__gte=since)
+    if until:
+        queryset = queryset.filter(occurred_at__lt=until)
+    return queryset
+
+
+def iter_crime_rows(queryset, after=None, page_size=PAGE_SIZE, chunk_size=CHUNK_SIZE):
+    """
+    Yield rows (tuples in EXPORT_FIELDS order) ordered by (occurred_at, id).
+
+    Args:
+        after: (occurred_at, id) to start after, or None for the beginning
+    """
+    queryset = queryset.order_by('occurred_at', 'id').values_list(*EXPORT_FIELDS)
+
+    while True:
+        page = queryset
+        if after is not None:
+            occurred_at, pk = after
+            # The leading >= gives the index scan its start key
+            page = page.filter(occurred_at__gte=occurred_at).filter(
+                Q(occurred_at__gt=occurred_at) | Q(id__gt=pk)
+            )
+
+        count = 0
+        for row in page[:page_size].iterator(chunk_size=chunk_size):
+            count += 1
+            yield row
+
+        if count < page_size:
+            return
+        after = (row[_OCCURRED_AT], row[_ID])
+
+
+def render_rows(rows, export_format):
+    """Yield the export as text pieces of up to ROWS_PER_WRITE rows."""
+    if export_format == 'csv':
+        return _render_csv(rows)
+    if export_format == 'ndjson':
+        return _render_ndjson(rows)
+    raise ValueError(f"Unknown export format: {export_format}")
+
+
+def export_crime_points(export_format, filters, page_size=PAGE_SIZE, chunk_size=CHUNK_SIZE):
+    """
+    Stream crime points matching parse_export_filters() output.
+
+    Returns:
+        generator of text pieces
+    """
+    filters = dict(filters)
+    after = filters.pop('after', None)
+    rows = iter_crime_rows(filter_crime_points(**filters), after, page_size, chunk_size)
+    return render_rows(rows, export_format)
+
+
+def _render_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for row in rows:
+        row = list(row)
+        row[_OCCURRED_AT] = row[_OCCURRED_AT].isoformat()
+        writer.writerow(row)
+        count += 1
+        if count % ROWS_PER_WRITE == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def _render_ndjson(rows):
+    lines = []
+    for row in rows:
+        item = dict(zip(EXPORT_FIELDS, row))
+        item['occurred_at'] = item['occurred_at'].isoformat()
+        lines.append(json.dumps(item))
+        if len(lines) == ROWS_PER_WRITE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _drain(buffer):
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return text
+
+
+def _parse_time(value, end_of_day):
+    value = value.strip()
+    # Dates first: parse_datetime also accepts a bare date (as midnight)
+    day = parse_date(value)
+    if day is not None:
+        parsed = datetime.combine(day, time.min)
+        if end_of_day:
+            parsed += timedelta(days=1)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,137 @@
+"""
+Bulk ingestion of crime incidents pushed as JSON by police and partner feeds.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import CrimePoint
+from ..signals import crime_points_changed
+from .csv_importer import CSVCrimeDataImporter
+
+
+# Largest batch accepted in one request
+MAX_INCIDENTS_PER_REQUEST = 5000
+
+VALID_CRIME_TYPES = {crime_type for crime_type, _ in CrimePoint.CRIME_TYPES}
+
+
+def ingest_incidents(incidents, source='police_report'):
+    """
+    Validate a batch of incidents in one pass and insert the valid ones
+    with a single bulk_create.
+
+    Each incident:
+    {
+        "latitude": 12.34, "longitude": 56.78,   ("lat"/"lon"/"lng" also accepted)
+        "type": "theft",                          (free text is normalized)
+        "severity": 2,                            (optional, 1-4)
+        "description": "...",                     (optional)
+        "occurred_at": "2024-01-08T22:30:00"      (optional ISO 8601, default now)
+    }
+
+    Incidents already stored (same content hash) are reported as duplicates.
+    When two requests push the same new incident at once, both report it
+    as created with the id of the single stored row.
+
+    Returns:
+        list of per-item results in input order, e.g.
+        {"index": 0, "status": "created", "id": 123}
+        {"index": 1, "status": "duplicate", "id": 45}
+        {"index": 2, "status": "error", "error": "Invalid coordinates: 91.0, 10.0"}
+    """
+    results = [None] * len(incidents)
+    points_by_hash = {}
+
+    for index, item in enumerate(incidents):
+        try:
+            point = _build_point(item, source)
+        except (TypeError, ValueError, KeyError) as e:
+            results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+            continue
+
+        if point.content_hash in points_by_hash:
+            first_index = points_by_hash[point.content_hash][0]
+            results[index] = {'index': index, 'status': 'duplicate', 'duplicate_of': first_index}
+        else:
+            points_by_hash[point.content_hash] = (index, point)
+
+    new_points = []
+    with transaction.atomic():
+        existing = dict(
+            CrimePoint.objects.filter(content_hash__in=list(points_by_hash))
+            .values_list('content_hash', 'id')
+        )
+
+        for content_hash, (index, point) in points_by_hash.items():
+            if content_hash in existing:
+                results[index] = {'index': index, 'status': 'duplicate', 'id': existing[content_hash]}
+            else:
+                new_points.append((index, point))
+
+        # A concurrent push of the same incidents may insert them first;
+        # ignore_conflicts skips those rows instead of failing the batch
+        CrimePoint.objects.bulk_create([point for _, point in new_points], ignore_conflicts=True)
+
+    # Primary keys aren't returned with ignore_conflicts, so look them up
+    created_ids = dict(
+        CrimePoint.objects.filter(content_hash__in=[point.content_hash for _, point in new_points])
+        .values_list('content_hash', 'id')
+    )
+    for index, point in new_points:
+        results[index] = {'index': index, 'status': 'created', 'id': created_ids.get(point.content_hash)}
+
+    # Derived caches are refreshed once for the whole batch
+    if new_points:
+        crime_points_changed.send(sender=CrimePoint, points=[point for _, point in new_points])
+
+    return results
+
+
+def _build_point(item, source):
+    """Validate one incident and build an unsaved CrimePoint."""
+    if not isinstance(item, dict):
+        raise ValueError('Incident must be a JSON object')
+
+    lat = float(_first_present(item, 'latitude', 'lat'))
+    lon = float(_first_present(item, 'longitude', 'lon', 'lng'))
+    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        raise ValueError(f"Invalid coordinates: {lat}, {lon}")
+
+    raw_type = str(item.get('type') or item.get('crime_type') or '')
+    if raw_type in VALID_CRIME_TYPES:
+        crime_type = raw_type
+    else:
+        crime_type = CSVCrimeDataImporter._get_crime_type_normalizer().normalize(raw_type)
+
+    severity = int(item.get('severity', 2))
+    if not 1 <= severity <= 4:
+        raise ValueError(f"Invalid severity: {severity}")
+
+    # Live reports without a time happened now; their hash uses the stored
+    # time, so repeated reports of the same kind at one spot stay separate
+    occurred_at = timezone.now()
+    if item.get('occurred_at'):
+        occurred_at = datetime.fromisoformat(str(item['occurred_at']))
+        if timezone.is_naive(occurred_at):
+            occurred_at = timezone.make_aware(occurred_at)
+
+    return CrimePoint(
+        latitude=lat,
+        longitude=lon,
+        crime_type=crime_type,
+        severity=severity,
+        description=str(item.get('description') or '')[:500],
+        occurred_at=occurred_at,
+        is_sample_data=False,
+        source=source,
+        content_hash=CrimePoint.build_content_hash(lat, lon, crime_type, occurred_at, source)
+    )
+
+
+def _first_present(item, *keys):
+    for key in keys:
+        if item.get(key) is not None:
+            return item[key]
+    raise KeyError(f"Missing field: {keys[0]}")
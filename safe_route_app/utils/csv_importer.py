@@ -2,16 +2,40 @@
 CSV upload handler for crime data.
 Allows users to upload real crime data from government sources or other datasets.
 """
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, ExitStack
 import csv
+import gzip
+import io
+import itertools
+import multiprocessing
+import os
+import re
+import threading
 from datetime import datetime
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from ..models import CrimePoint
+from ..signals import crime_points_changed
+from .bulk_delete import delete_crime_points
+
+
+GZIP_MAGIC = b'\x1f\x8b'
 
 
 class CSVCrimeDataImporter:
     """
-    Import crime data from CSV files.
+    Import crime data from CSV files (optionally gzip-compressed).
     """
     
+    # Used in error messages
+    FORMAT_NAME = 'CSV'
+    RECORD_LABEL = 'Row'
+    
+    # Stored in CrimePoint.source (and part of the content hash)
+    SOURCE = 'csv_upload'
+    
     # Expected CSV columns (flexible mapping)
     COLUMN_MAPPINGS = {
         'latitude': ['latitude', 'lat', 'y', 'y_coord'],
@@ -24,7 +48,7 @@ class CSVCrimeDataImporter:
     
     # Crime type normalization
     CRIME_TYPE_MAPPING = {
-        'theft': ['theft', 'larceny', 'stealing', 'burglary'],
+        'theft': ['theft', 'larceny', 'stealing'],
         'assault': ['assault', 'battery', 'attack', 'violence'],
         'robbery': ['robbery', 'mugging', 'armed robbery'],
         'harassment': ['harassment', 'stalking', 'intimidation'],
@@ -32,58 +56,123 @@ class CSVCrimeDataImporter:
         'burglary': ['burglary', 'breaking and entering', 'break-in'],
     }
     
-    def __init__(self):
+    # When an offense matches keywords of several types, the first listed wins
+    # (e.g. "burglary - theft from dwelling" is a burglary)
+    CRIME_TYPE_PRIORITY = ['robbery', 'assault', 'burglary', 'harassment', 'theft', 'vandalism']
+    
+    # Accepted date formats, in order of preference when a sample is ambiguous
+    DATE_FORMATS = [
+        '%Y-%m-%d',
+        '%m/%d/%Y',
+        '%d/%m/%Y',
+        '%Y-%m-%d %H:%M:%S',
+        '%m/%d/%Y %H:%M:%S',
+        '%Y-%m-%dT%H:%M:%S',
+    ]
+    
+    # Rows sampled from the start of a file to pick its date format
+    DATE_SAMPLE_SIZE = 50
+    
+    # Rows are validated and inserted in chunks of this size
+    BATCH_SIZE = 2000
+    
+    # Only the first errors are kept for reporting; the rest are just counted
+    MAX_ERRORS = 100
+    
+    # Files on disk at least this big are parsed in a process pool,
+    # in byte ranges of roughly PARALLEL_CHUNK_BYTES aligned to line boundaries
+    PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+    PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024
+    
+    # Rows checked for quoted line breaks, which byte ranges would split
+    PARALLEL_SAMPLE_ROWS = 10000
+    
+    def __init__(self, batch_size=None, progress_callback=None, processes=None):
+        """
+        Args:
+            batch_size: Rows per validated chunk / bulk insert
+            progress_callback: Optional callable, called with the importer
+                after every chunk so callers can record progress
+            processes: Parser processes for large files (default 1, serial).
+                The pool is forked, so only pass more from a single-threaded
+                process such as the process_import_jobs command
+        """
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.progress_callback = progress_callback
+        self.processes = processes or 1
         self.errors = []
+        self.rows_read = 0
         self.imported_count = 0
         self.skipped_count = 0
+        self.updated_count = 0
+        self.duplicate_count = 0
+        self.date_fallback_count = 0
+        self.upsert = False
+        self.date_format = None
+        self._date_parser = None
     
-    def import_from_csv(self, csv_file, clear_existing=False):
+    def import_from_csv(self, csv_file, clear_existing=False, upsert=False):
         """
         Import crime data from CSV file.
         
         Args:
             csv_file: File object or path to CSV
             clear_existing: Whether to clear existing non-sample data
+            upsert: Whether to update changed rows that were imported before
+            
+        Returns:
+            dict with import statistics
+        """
+        return self.import_file(csv_file, clear_existing, upsert)
+    
+    def import_file(self, source, clear_existing=False, upsert=False):
+        """
+        Import crime data from a file in this importer's format.
+        Gzip-compressed input is detected and decompressed transparently.
+        
+        Rows already in the database (same content hash) are never inserted
+        twice. In upsert mode their severity and description are updated
+        when they changed; otherwise they are counted as duplicates.
+        
+        Args:
+            source: Binary file object or path
+            clear_existing: Whether to clear existing non-sample data
+            upsert: Whether to update changed rows that were imported before
             
         Returns:
             dict with import statistics
         """
         self.errors = []
+        self.rows_read = 0
         self.imported_count = 0
         self.skipped_count = 0
+        self.updated_count = 0
+        self.duplicate_count = 0
+        self.date_fallback_count = 0
+        self.upsert = upsert
+        self._set_date_format(None)
         
         if clear_existing:
-            CrimePoint.objects.filter(is_sample_data=False).delete()
+            # Report progress per deleted batch too, so a long delete isn't taken for a stall
+            delete_crime_points(
+                CrimePoint.objects.filter(is_sample_data=False),
+                progress_callback=lambda deleted: self._report_progress()
+            )
         
         try:
-            # Read CSV
-            csv_content = csv_file.read().decode('utf-8').splitlines()
-            reader = csv.DictReader(csv_content)
-            
-            # Detect column mappings
-            column_map = self._detect_columns(reader.fieldnames)
-            
-            if not column_map.get('latitude') or not column_map.get('longitude'):
-                return {
-                    'success': False,
-                    'error': 'CSV must contain latitude and longitude columns',
-                    'imported': 0,
-                    'skipped': 0
-                }
-            
-            # Process rows
-            for row_num, row in enumerate(reader, start=2):
-                try:
-                    self._import_row(row, column_map)
-                    self.imported_count += 1
-                except Exception as e:
-                    self.skipped_count += 1
-                    self.errors.append(f"Row {row_num}: {str(e)}")
+            failure = self._import_source(source)
+            if failure:
+                return failure
             
             return {
                 'success': True,
+                'rows_read': self.rows_read,
                 'imported': self.imported_count,
                 'skipped': self.skipped_count,
+                'updated': self.updated_count,
+                'duplicates': self.duplicate_count,
+                'date_fallbacks': self.date_fallback_count,  # Rows stamped with the import time
+                'date_format': self.date_format,
                 'errors': self.errors[:10],  # Return first 10 errors
                 'message': f'Successfully imported {self.imported_count} crime records'
             }
@@ -91,11 +180,299 @@ class CSVCrimeDataImporter:
         except Exception as e:
             return {
                 'success': False,
-                'error': f'Failed to process CSV: {str(e)}',
+                'error': f'Failed to process {self.FORMAT_NAME}: {str(e)}',
                 'imported': self.imported_count,
                 'skipped': self.skipped_count
             }
     
+    def _import_source(self, source):
+        """
+        Import every row of a CSV source.
+        
+        Large uncompressed files given as a path are parsed in parallel,
+        unless a sample of rows has quoted fields with line breaks.
+        
+        Returns:
+            None, or an error result dict if the file can't be imported
+        """
+        if self._should_parse_in_parallel(source):
+            fieldnames, data_start = self._read_header(source)
+            column_map = self._detect_columns(fieldnames)
+            
+            if not self._has_coordinates(column_map):
+                return self._missing_coordinates_result()
+            
+            self._import_parallel(source, fieldnames, data_start, column_map)
+            return None
+        
+        # Stream the file instead of materializing it in memory
+        with self._open_text_stream(source) as stream:
+            reader = csv.DictReader(stream)
+            
+            # Detect column mappings
+            column_map = self._detect_columns(reader.fieldnames or [])
+            
+            if not self._has_coordinates(column_map):
+                return self._missing_coordinates_result()
+            
+            # Process rows
+            self._import_rows(enumerate(reader, start=2), column_map)
+        return None
+    
+    def _has_coordinates(self, column_map):
+        return bool(column_map.get('latitude') and column_map.get('longitude'))
+    
+    def _missing_coordinates_result(self):
+        return {
+            'success': False,
+            'error': f'{self.FORMAT_NAME} must contain latitude and longitude columns',
+            'imported': 0,
+            'skipped': 0
+        }
+    
+    @contextmanager
+    def _open_binary_stream(self, source):
+        """Open a path or seekable binary file object, decompressing gzip input."""
+        with ExitStack() as stack:
+            if isinstance(source, (str, os.PathLike)):
+                stream = stack.enter_context(open(source, 'rb'))
+            else:
+                stream = source
+            
+            magic = stream.read(2)
+            stream.seek(0)
+            if magic == GZIP_MAGIC:
+                stream = stack.enter_context(gzip.GzipFile(fileobj=stream, mode='rb'))
+            
+            yield stream
+    
+    @contextmanager
+    def _open_text_stream(self, source):
+        """Wrap a path or binary file object in a streaming UTF-8 reader."""
+        with self._open_binary_stream(source) as stream:
+            text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+            try:
+                yield text_stream
+            finally:
+                # Leave closing the underlying file to its owner
+                text_stream.detach()
+    
+    def _import_rows(self, numbered_rows, column_map):
+        """Validate rows in chunks and bulk insert each valid chunk."""
+        chunk = []
+        
+        # Pick the date format once from the first rows, then replay them
+        if 'date' in column_map:
+            sample = list(itertools.islice(numbered_rows, self.DATE_SAMPLE_SIZE))
+            self._set_date_format(self._detect_date_format(
+                [row.get(column_map['date']) for _, row in sample]
+            ))
+            numbered_rows = itertools.chain(sample, numbered_rows)
+        
+        for row_num, row in numbered_rows:
+            self.rows_read += 1
+            try:
+                chunk.append(self._build_crime_point(self._parse_row(row, column_map)))
+            except Exception as e:
+                self._record_error(row_num, e)
+            
+            if len(chunk) >= self.batch_size:
+                self._flush_chunk(chunk)
+                chunk = []
+            
+            if self.rows_read % self.batch_size == 0:
+                self._report_progress()
+        
+        if chunk:
+            self._flush_chunk(chunk)
+        self._report_progress()
+    
+    def _should_parse_in_parallel(self, source):
+        """
+        Parallel parsing needs an uncompressed file on disk, fork(), and to
+        run on the main thread: forking from a thread of a multi-threaded
+        web worker can copy locks held by other threads and deadlock.
+        """
+        if self.processes < 2 or not isinstance(source, (str, os.PathLike)):
+            return False
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            return False
+        if os.path.getsize(source) < self.PARALLEL_MIN_BYTES:
+            return False
+        with open(source, 'rb') as f:
+            if f.read(2) == GZIP_MAGIC:
+                return False
+        return not self._has_multiline_fields(source)
+    
+    def _has_multiline_fields(self, path):
+        """Check the first PARALLEL_SAMPLE_ROWS rows for quoted line breaks."""
+        with self._open_text_stream(path) as stream:
+            for row in itertools.islice(csv.reader(stream), self.PARALLEL_SAMPLE_ROWS):
+                if any('\n' in field or '\r' in field for field in row):
+                    return True
+        return False
+    
+    def _read_header(self, path):
+        """Return the CSV header fields and the byte offset of the first data row."""
+        with open(path, 'rb') as f:
+            header_line = f.readline()
+            data_start = f.tell()
+        fieldnames = next(csv.reader([header_line.decode('utf-8-sig')]), [])
+        return fieldnames, data_start
+    
+    def _sample_column(self, path, fieldnames, column):
+        """Read one column from the first DATE_SAMPLE_SIZE data rows of a file."""
+        with self._open_text_stream(path) as stream:
+            reader = csv.DictReader(stream)
+            return [row.get(column) for row in itertools.islice(reader, self.DATE_SAMPLE_SIZE)]
+    
+    def _split_byte_ranges(self, path, data_start):
+        """Split the data section into byte ranges that start at line boundaries."""
+        size = os.path.getsize(path)
+        bounds = [data_start]
+        
+        with open(path, 'rb') as f:
+            position = data_start + self.PARALLEL_CHUNK_BYTES
+            while position < size:
+                f.seek(position)
+                f.readline()  # Move to the start of the next line
+                position = f.tell()
+                if position >= size:
+                    break
+                bounds.append(position)
+                position += self.PARALLEL_CHUNK_BYTES
+        
+        bounds.append(size)
+        return list(zip(bounds[:-1], bounds[1:]))
+    
+    def _import_parallel(self, path, fieldnames, data_start, column_map):
+        """
+        Parse byte ranges in a process pool and feed the results, in file
+        order, into the chunked bulk insert.
+        """
+        byte_ranges = deque(self._split_byte_ranges(path, data_start))
+        
+        if 'date' in column_map:
+            self._set_date_format(self._detect_date_format(
+                self._sample_column(path, fieldnames, column_map['date'])
+            ))
+        next_row_num = 2
+        chunk = []
+        
+        executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('fork')
+        )
+        with executor:
+            # Keep a bounded number of ranges in flight so memory stays flat
+            pending = deque()
+            while byte_ranges or pending:
+                while byte_ranges and len(pending) < self.processes * 2:
+                    start, end = byte_ranges.popleft()
+                    pending.append(executor.submit(
+                        _parse_byte_range, type(self), path, start, end,
+                        fieldnames, column_map, self.date_format
+                    ))
+                
+                result = pending.popleft().result()
+                
+                for local_index, message in result['errors']:
+                    if len(self.errors) < self.MAX_ERRORS:
+                        self.errors.append(f"{self.RECORD_LABEL} {next_row_num + local_index}: {message}")
+                self.skipped_count += result['error_count']
+                self.rows_read += result['row_count']
+                self.date_fallback_count += result['date_fallbacks']
+                next_row_num += result['row_count']
+                
+                for values in result['rows']:
+                    chunk.append(self._build_crime_point(values))
+                    if len(chunk) >= self.batch_size:
+                        self._flush_chunk(chunk)
+                        chunk = []
+                
+                self._report_progress()
+        
+        if chunk:
+            self._flush_chunk(chunk)
+        self._report_progress()
+    
+    def _report_progress(self):
+        """Notify the progress callback, if any, of the current counters."""
+        if self.progress_callback:
+            self.progress_callback(self)
+    
+    def _flush_chunk(self, chunk):
+        """
+        Write one chunk of crime points in a single short transaction.
+        
+        Only rows whose content hash is new are inserted; in upsert mode
+        existing rows are updated when their severity or description changed.
+        """
+        # Rows repeated within the chunk: the last occurrence wins
+        by_hash = {point.content_hash: point for point in chunk}
+        self.duplicate_count += len(chunk) - len(by_hash)
+        
+        with transaction.atomic():
+            existing = CrimePoint.objects.filter(
+                content_hash__in=list(by_hash)
+            ).values_list('content_hash', 'id', 'severity', 'description')
+            
+            changed = []
+            for content_hash, pk, severity, description in existing:
+                point = by_hash.pop(content_hash)
+                if self.upsert and (point.severity, point.description) != (severity, description):
+                    point.pk = pk
+                    point.updated_at = timezone.now()
+                    changed.append(point)
+                else:
+                    self.duplicate_count += 1
+            
+            new_points = self._insert_new_points(list(by_hash.values()))
+            if changed:
+                CrimePoint.objects.bulk_update(
+                    changed, ['severity', 'description', 'updated_at'], batch_size=self.batch_size
+                )
+        
+        self.imported_count += len(new_points)
+        self.updated_count += len(changed)
+        
+        if new_points or changed:
+            crime_points_changed.send(sender=CrimePoint, points=new_points + changed)
+    
+    def _insert_new_points(self, new_points):
+        """
+        Insert points whose hash was not found, returning the ones inserted.
+        
+        A concurrent import may insert some of them after the check; the
+        insert then fails on the unique hash, and is retried without the
+        rows that now exist (counted as duplicates), so imported_count is exact.
+        """
+        while new_points:
+            try:
+                with transaction.atomic():
+                    CrimePoint.objects.bulk_create(new_points, batch_size=self.batch_size)
+                return new_points
+            except IntegrityError:
+                taken = set(
+                    CrimePoint.objects.filter(content_hash__in=[p.content_hash for p in new_points])
+                    .values_list('content_hash', flat=True)
+                )
+                if not taken:
+                    raise
+                self.duplicate_count += len(taken)
+                new_points = [p for p in new_points if p.content_hash not in taken]
+                for point in new_points:
+                    point.pk = None  # Ids from the rolled back batches
+        return new_points
+    
+    def _record_error(self, row_num, error):
+        """Count a skipped row, keeping only the first MAX_ERRORS messages."""
+        self.skipped_count += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(f"{self.RECORD_LABEL} {row_num}: {str(error)}")
+    
     def _detect_columns(self, fieldnames):
         """Detect which columns map to our required fields."""
         column_map = {}
@@ -112,8 +489,15 @@ class CSVCrimeDataImporter:
         
         return column_map
     
-    def _import_row(self, row, column_map):
-        """Import a single row from CSV."""
+    def _parse_row(self, row, column_map):
+        """
+        Validate a single CSV row.
+        
+        Returns plain values (no model instance) so rows can be parsed in
+        worker processes: (lat, lon, crime_type, severity, description, occurred_at)
+        
+        occurred_at is None when the row has no usable date.
+        """
         # Extract coordinates
         lat = float(row[column_map['latitude']])
         lon = float(row[column_map['longitude']])
@@ -125,11 +509,10 @@ class CSVCrimeDataImporter:
         # Extract crime type
         crime_type = 'other'
         if 'crime_type' in column_map:
-            raw_type = row[column_map['crime_type']].lower().strip()
-            crime_type = self._normalize_crime_type(raw_type)
+            crime_type = self._normalize_crime_type(row[column_map['crime_type']])
         
         # Extract date
-        occurred_at = datetime.now()
+        occurred_at = None
         if 'date' in column_map:
             date_str = row[column_map['date']]
             occurred_at = self._parse_date(date_str)
@@ -148,60 +531,241 @@ class CSVCrimeDataImporter:
         if 'description' in column_map:
             description = row[column_map['description']][:500]  # Limit length
         
-        # Create crime point
-        CrimePoint.objects.create(
+        return lat, lon, crime_type, severity, description, occurred_at
+    
+    def _build_crime_point(self, values):
+        """Build an unsaved CrimePoint from parsed row values."""
+        lat, lon, crime_type, severity, description, occurred_at = values
+        return CrimePoint(
             latitude=lat,
             longitude=lon,
             crime_type=crime_type,
             severity=severity,
             description=description,
-            occurred_at=occurred_at,
+            occurred_at=occurred_at or timezone.now(),
             is_sample_data=False,
-            source='csv_upload'
+            source=self.SOURCE,
+            # Undated rows are stored at import time but hashed without a date
+            content_hash=CrimePoint.build_content_hash(lat, lon, crime_type, occurred_at, self.SOURCE)
         )
     
     def _normalize_crime_type(self, raw_type):
         """Normalize crime type to our standard categories."""
-        raw_type = raw_type.lower().strip()
+        return self._get_crime_type_normalizer().normalize(raw_type)
+    
+    @classmethod
+    def _get_crime_type_normalizer(cls):
+        """Get or build the normalizer for this class's mapping (shared by instances)."""
+        normalizer = cls.__dict__.get('_crime_type_normalizer')
+        if normalizer is None:
+            normalizer = CrimeTypeNormalizer(cls.CRIME_TYPE_MAPPING, cls.CRIME_TYPE_PRIORITY)
+            cls._crime_type_normalizer = normalizer
+        return normalizer
+    
+    def _detect_date_format(self, date_values):
+        """
+        Pick the date format that parses the most sampled values.
         
-        for our_type, variations in self.CRIME_TYPE_MAPPING.items():
-            for variation in variations:
-                if variation in raw_type:
-                    return our_type
+        Returns 'iso' (handled by datetime.fromisoformat), one of
+        DATE_FORMATS, or None when nothing in the sample parses.
+        """
+        values = [v.strip() for v in date_values if v and v.strip()]
+        best_format, best_count = None, 0
         
-        return 'other'
+        for fmt in ['iso'] + self.DATE_FORMATS:
+            parser = _compile_date_parser(fmt)
+            count = 0
+            for value in values:
+                try:
+                    parser(value)
+                    count += 1
+                except ValueError:
+                    pass
+            if count > best_count:
+                best_format, best_count = fmt, count
+        
+        return best_format
+    
+    def _set_date_format(self, fmt):
+        """Use fmt as the fast path for the rest of the file."""
+        self.date_format = fmt
+        self._date_parser = _compile_date_parser(fmt) if fmt else None
     
     def _parse_date(self, date_str):
-        """Parse date string in various formats."""
-        date_formats = [
-            '%Y-%m-%d',
-            '%m/%d/%Y',
-            '%d/%m/%Y',
-            '%Y-%m-%d %H:%M:%S',
-            '%m/%d/%Y %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S',
-        ]
-        
-        for fmt in date_formats:
+        """
+        Parse a date string, trying the detected format first and every
+        known format only for rows that don't match it.
+        
+        Returns None for unparseable dates (stored as the import time by
+        _build_crime_point) and counts them in date_fallback_count.
+        """
+        date_str = (date_str or '').strip()
+        
+        parsed = None
+        if self._date_parser:
             try:
-                return datetime.strptime(date_str, fmt)
-            except:
-                continue
+                parsed = self._date_parser(date_str)
+            except ValueError:
+                pass
+        
+        if parsed is None and date_str:
+            for fmt in ['iso'] + self.DATE_FORMATS:
+                try:
+                    parsed = _compile_date_parser(fmt)(date_str)
+                    break
+                except ValueError:
+                    continue
         
-        # If all parsing fails, return current time
-        return datetime.now()
+        if parsed is None:
+            self.date_fallback_count += 1
+            return None
+        
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+class CrimeTypeNormalizer:
+    """
+    Map raw offense strings to our crime types in one regex pass.
+    
+    All keywords are combined into a single alternation (longest first, so
+    "armed robbery" matches as a whole). When a string contains keywords of
+    several types, the type ranked first in `priority` wins. Results are
+    memoized per distinct raw value, since real datasets only have a few
+    hundred distinct offense strings.
+    """
+    
+    # Stop memoizing new values past this many distinct strings
+    MAX_CACHE_SIZE = 10000
+    
+    def __init__(self, mapping, priority):
+        self._keyword_types = {}
+        for crime_type, keywords in mapping.items():
+            for keyword in keywords:
+                self._keyword_types[keyword] = crime_type
+        
+        self._rank = {crime_type: i for i, crime_type in enumerate(priority)}
+        keywords = sorted(self._keyword_types, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(k) for k in keywords))
+        self._cache = {}
+    
+    def normalize(self, raw_type):
+        """Return the crime type for a raw offense string ('other' if unknown)."""
+        crime_type = self._cache.get(raw_type)
+        if crime_type is not None:
+            return crime_type
+        
+        crime_type = 'other'
+        best_rank = len(self._rank)
+        for match in self._pattern.finditer(raw_type.lower()):
+            match_type = self._keyword_types[match.group()]
+            rank = self._rank.get(match_type, len(self._rank))
+            if crime_type == 'other' or rank < best_rank:
+                crime_type, best_rank = match_type, rank
+        
+        if len(self._cache) < self.MAX_CACHE_SIZE:
+            self._cache[raw_type] = crime_type
+        return crime_type
+
+
+# strptime directives understood by the precompiled date parsers
+_DATE_DIRECTIVES = {
+    '%Y': ('year', r'(\d{4})'),
+    '%m': ('month', r'(\d{1,2})'),
+    '%d': ('day', r'(\d{1,2})'),
+    '%H': ('hour', r'(\d{1,2})'),
+    '%M': ('minute', r'(\d{1,2})'),
+    '%S': ('second', r'(\d{1,2})'),
+}
+
+_date_parsers = {}
+
+
+def _compile_date_parser(fmt):
+    """
+    Build (once) a fast parser for a date format.
+    
+    'iso' maps to datetime.fromisoformat; strptime-style formats become a
+    precompiled regex. Parsers raise ValueError when a value doesn't match.
+    """
+    if fmt in _date_parsers:
+        return _date_parsers[fmt]
+    
+    if fmt == 'iso':
+        parser = datetime.fromisoformat
+    else:
+        fields = []
+        pattern = ''
+        for token in re.split(r'(%[A-Za-z])', fmt):
+            if token in _DATE_DIRECTIVES:
+                name, regex = _DATE_DIRECTIVES[token]
+                fields.append(name)
+                pattern += regex
+            else:
+                pattern += re.escape(token)
+        matcher = re.compile(pattern + '$').match
+        
+        def parser(value):
+            match = matcher(value)
+            if not match:
+                raise ValueError(f"'{value}' does not match format '{fmt}'")
+            return datetime(**dict(zip(fields, map(int, match.groups()))))
+    
+    _date_parsers[fmt] = parser
+    return parser
+
+
+def _parse_byte_range(importer_class, path, start, end, fieldnames, column_map, date_format):
+    """
+    Parse one line-aligned byte range of a CSV file (runs in a worker process).
+    
+    Returns:
+        dict with the parsed rows, the first MAX_ERRORS errors as
+        (row index within the range, message), and row/error/date fallback counts
+    """
+    importer = importer_class(processes=1)
+    importer._set_date_format(date_format)
+    
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    
+    reader = csv.DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames)
+    parsed_rows = []
+    errors = []
+    error_count = 0
+    row_count = 0
+    
+    for index, row in enumerate(reader):
+        row_count += 1
+        try:
+            parsed_rows.append(importer._parse_row(row, column_map))
+        except Exception as e:
+            error_count += 1
+            if len(errors) < importer.MAX_ERRORS:
+                errors.append((index, str(e)))
+    
+    return {
+        'rows': parsed_rows,
+        'errors': errors,
+        'error_count': error_count,
+        'row_count': row_count,
+        'date_fallbacks': importer.date_fallback_count,
+    }
 
 
-def import_crime_csv(csv_file, clear_existing=False):
+def import_crime_csv(csv_file, clear_existing=False, upsert=False):
     """
     Convenience function to import crime data from CSV.
     
     Args:
         csv_file: File object
         clear_existing: Whether to clear existing data
+        upsert: Whether to update changed rows that were imported before
         
     Returns:
         dict with import results
     """
     importer = CSVCrimeDataImporter()
-    return importer.import_from_csv(csv_file, clear_existing)
+    return importer.import_from_csv(csv_file, clear_existing, upsert)
@@ -3,8 +3,11 @@ Sample data generator for RouteGuard.
 Creates realistic crime data patterns for demonstration purposes.
 """
 from datetime import datetime, timedelta
+import math
 import random
 from ..models import CrimePoint, SafetyZone
+from ..signals import crime_points_changed
+from .bulk_delete import delete_crime_points
 
 
 class SampleDataGenerator:
@@ -46,7 +49,7 @@ class SampleDataGenerator:
         Returns:
             List of created CrimePoint objects
         """
-        created_points = []
+        points = []
         
         # Delete existing sample data for this area
         self._clear_existing_sample_data()
@@ -70,8 +73,7 @@ class SampleDataGenerator:
             hours_ago = random.randint(0, 23)
             occurred_at = datetime.now() - timedelta(days=days_ago, hours=hours_ago)
             
-            # Create crime point
-            crime_point = CrimePoint.objects.create(
+            points.append(CrimePoint(
                 latitude=lat,
                 longitude=lon,
                 crime_type=crime_type,
@@ -80,9 +82,11 @@ class SampleDataGenerator:
                 occurred_at=occurred_at,
                 is_sample_data=True,
                 source='auto_generated'
-            )
-            
-            created_points.append(crime_point)
+            ))
+        
+        created_points = CrimePoint.objects.bulk_create(points)
+        if created_points:
+            crime_points_changed.send(sender=CrimePoint, points=created_points)
         
         # Generate some safety zones
         self._generate_safety_zones()
@@ -97,13 +101,13 @@ class SampleDataGenerator:
         # Convert km to degrees (approximate)
         radius_deg = self.radius_km / 111.0  # 1 degree ≈ 111 km
         
-        # Random angle and distance
-        angle = random.uniform(0, 2 * 3.14159)
-        distance = random.uniform(0, radius_deg)
+        # Random angle; sqrt keeps the density uniform over the disk area
+        angle = random.uniform(0, 2 * math.pi)
+        distance = radius_deg * math.sqrt(random.random())
         
-        # Calculate offset
-        lat_offset = distance * random.uniform(-1, 1)
-        lon_offset = distance * random.uniform(-1, 1)
+        # Longitude degrees shrink with latitude
+        lat_offset = distance * math.sin(angle)
+        lon_offset = distance * math.cos(angle) / max(math.cos(math.radians(self.center_lat)), 0.01)
         
         lat = self.center_lat + lat_offset
         lon = self.center_lon + lon_offset
@@ -153,15 +157,15 @@ class SampleDataGenerator:
         """Clear existing sample data in the area."""
         # Calculate bounding box
         radius_deg = self.radius_km / 111.0
+        lon_radius_deg = radius_deg / max(math.cos(math.radians(self.center_lat)), 0.01)
         
         # Delete sample crime data in the area
-        CrimePoint.objects.filter(
-            is_sample_data=True,
-            latitude__gte=self.center_lat - radius_deg,
-            latitude__lte=self.center_lat + radius_deg,
-            longitude__gte=self.center_lon - radius_deg,
-            longitude__lte=self.center_lon + radius_deg,
-        ).delete()
+        delete_crime_points(CrimePoint.objects.within_bbox(
+            self.center_lat - radius_deg,
+            self.center_lat + radius_deg,
+            self.center_lon - lon_radius_deg,
+            self.center_lon + lon_radius_deg,
+        ).filter(is_sample_data=True))
 
 
 def generate_sample_data_for_location(lat, lon, num_points=100, radius_km=5):
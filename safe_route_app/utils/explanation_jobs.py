@@ -0,0 +1,163 @@
+"""
+Deferred and concurrent AI route explanations.
+Route scores are returned straight away with a token; the explanation is
+generated in a background thread and fetched separately, so a slow model
+call never delays the scores. Job state lives in the 'shared' cache (Redis,
+or a database table without it), since the poll may reach a different
+worker process than the one running the job. A job that takes longer than
+AI_EXPLANATION_TIMEOUT is answered with the rule-based fallback.
+
+Deferred jobs and explain_with_tips run on separate thread pools: model
+calls have no per-call timeout, so jobs stuck on a slow model must not
+hold up the explanation + tips requests that wait for their answers.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .gemini_service import get_gemini_advisor
+
+
+CACHE_KEY_PREFIX = 'ai-explanation-job'
+
+# Only these route fields are kept for the fallback explanation
+FALLBACK_FIELDS = ('score', 'crime_count', 'safety_zone_count', 'time_of_day')
+
+# In-process worker pools by name ('jobs', 'advice'), created on first use
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(name):
+    """Get or create the named in-process worker pool."""
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=settings.AI_EXPLANATION_WORKERS,
+                thread_name_prefix=f'ai-{name}'
+            )
+        return _executors[name]
+
+
+def _cache_key(token):
+    return f"{CACHE_KEY_PREFIX}:{token}"
+
+
+def _job_cache():
+    return caches['shared']
+
+
+def request_explanation(route_data, alternative_routes=None):
+    """
+    Get the explanation for a recommended route, deferring model calls.
+    
+    Returns:
+        (explanation, None) when it is available right away (cached or
+        fallback), else (None, token) for get_explanation_job()
+    """
+    advisor = get_gemini_advisor()
+    explanation = advisor.cached_explanation(route_data, alternative_routes)
+    if explanation is not None:
+        return explanation, None
+    
+    token = uuid.uuid4()
+    _job_cache().set(_cache_key(token), {
+        'status': 'pending',
+        'created_at': time.time(),
+        'route_data': {field: route_data.get(field) for field in FALLBACK_FIELDS if field in route_data},
+    }, _job_lifetime())
+    _get_executor('jobs').submit(run_explanation_job, token, route_data, alternative_routes)
+    return None, token
+
+
+def run_explanation_job(token, route_data, alternative_routes=None):
+    """Generate the explanation and store it unless the job already timed out."""
+    try:
+        explanation, fallback = get_gemini_advisor().explain_route_choice_with_status(
+            route_data, alternative_routes
+        )
+    except Exception as e:
+        print(f"AI explanation error: {e}")
+        return
+    
+    job = _job_cache().get(_cache_key(token))
+    if job is None or job['status'] != 'pending':
+        return
+    _job_cache().set(_cache_key(token), {
+        'status': 'ready',
+        'explanation': explanation,
+        'fallback': fallback,
+    }, _job_lifetime())
+
+
+def get_explanation_job(token):
+    """
+    Current state of a deferred explanation.
+    
+    Returns:
+        dict with 'status' ('pending' or 'ready') and, once ready,
+        'explanation' and 'fallback'; None for unknown or expired tokens
+    """
+    job = _job_cache().get(_cache_key(token))
+    if job is None or job['status'] != 'pending':
+        return job
+    
+    if time.time() - job['created_at'] < settings.AI_EXPLANATION_TIMEOUT:
+        return {'status': 'pending'}
+    
+    # Out of time budget: answer with the rule-based explanation for good
+    job = {
+        'status': 'ready',
+        'explanation': get_gemini_advisor()._fallback_explanation(job['route_data']),
+        'fallback': True,
+    }
+    _job_cache().set(_cache_key(token), job, _job_lifetime())
+    return job
+
+
+def explain_with_tips(route_data, timeout=None):
+    """
+    Explanation and safety tips for a route, requested concurrently.
+    
+    Both model calls share one deadline (AI_EXPLANATION_TIMEOUT by default),
+    so the wait is the slower of the two rather than their sum. A call that
+    misses the deadline or fails is answered with its fallback.
+    
+    Returns:
+        (explanation, safety_tips)
+    """
+    advisor = get_gemini_advisor()
+    if timeout is None:
+        timeout = settings.AI_EXPLANATION_TIMEOUT
+    
+    executor = _get_executor('advice')
+    explanation_future = executor.submit(advisor.explain_route_choice, route_data)
+    tips_future = executor.submit(advisor.generate_safety_tips, route_data)
+    done, not_done = wait([explanation_future, tips_future], timeout=timeout)
+    
+    for future in not_done:
+        # Drops calls still waiting for a worker; running ones finish in the background
+        future.cancel()
+    
+    return (
+        _result_or_fallback(explanation_future, done, advisor._fallback_explanation, route_data),
+        _result_or_fallback(tips_future, done, advisor._fallback_safety_tips, route_data),
+    )
+
+
+def _result_or_fallback(future, done, fallback, route_data):
+    if future in done:
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"AI advice error: {e}")
+    return fallback(route_data)
+
+
+def _job_lifetime():
+    # Long enough for slow clients to fetch the result after the timeout
+    return settings.AI_EXPLANATION_TIMEOUT + 300
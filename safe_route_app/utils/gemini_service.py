@@ -1,35 +1,137 @@
 """
 Gemini AI integration for RouteGuard.
 Provides natural language safety explanations and recommendations.
+The model is reached through a pluggable backend (utils/ai_backends.py)
+behind a circuit breaker.
 """
-import google.generativeai as genai
-from django.conf import settings
+import hashlib
 import json
 
+from django.conf import settings
+from django.core.cache import caches
+
+from .ai_backends import CircuitBreaker, create_backend
+from .lru_cache import LRUCache
+
+
+# Bump when the prompts change so cached answers to old prompts are not reused
+PROMPT_VERSION = 1
+
+CACHE_KEY_PREFIX = 'ai-advice'
+
+
+class AdviceCache:
+    """
+    Two-level cache for model answers: an in-process LRU in front of the
+    'shared' cache (Redis, or a database table without it), so an answer
+    generated by one worker is reused by all of them.
+    """
+    
+    def __init__(self, timeout, max_local_entries, cache_alias='shared'):
+        self.timeout = timeout
+        self.local = LRUCache(max_local_entries, timeout)
+        self.cache_alias = cache_alias
+    
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+    
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+    
+    def set(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value, self.timeout)
+
+
+def route_features(route_data):
+    """
+    Coarse, bucketed view of the route fields the prompts use.
+    
+    Routes with the same features get the same prompt, so their answers
+    can be shared through the cache.
+    """
+    return {
+        'score': _score_bucket(route_data.get('score')),
+        'grade': route_data.get('grade', 'N/A'),
+        'crime_count': _count_bucket(route_data.get('crime_count', 0)),
+        'safety_zone_count': _count_bucket(route_data.get('safety_zone_count', 0)),
+        'time_of_day': route_data.get('time_of_day', 'unknown'),
+        'distance_km': _distance_bucket(route_data.get('distance_km')),
+    }
+
+
+def advice_cache_key(kind, *features):
+    """Cache key for an answer of the given kind ('explanation', 'tips')."""
+    digest = hashlib.sha1(
+        json.dumps(features, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:v{PROMPT_VERSION}:{kind}:{digest}"
+
+
+def _score_bucket(score):
+    """Scores in steps of 5, e.g. 83.4 -> '80-84'."""
+    if not isinstance(score, (int, float)):
+        return 'N/A'
+    low = min(int(score // 5 * 5), 100)
+    return '100' if low == 100 else f"{low}-{low + 4}"
+
+
+# (lower bound, label) of count buckets
+COUNT_BUCKETS = [(51, '51+'), (21, '21-50'), (11, '11-20'), (6, '6-10'), (3, '3-5'), (2, '2'), (1, '1'), (0, '0')]
+
+
+def _count_bucket(count):
+    if not isinstance(count, (int, float)):
+        return '0'
+    for lower, label in COUNT_BUCKETS:
+        if count >= lower:
+            return label
+    return '0'
+
+
+def _distance_bucket(distance_km):
+    """About 0.5 km steps for short trips, coarser for long ones."""
+    if not isinstance(distance_km, (int, float)):
+        return 'N/A'
+    if distance_km < 10:
+        return f"{round(distance_km * 2) / 2:g}"
+    if distance_km < 50:
+        return f"{round(distance_km):g}"
+    return f"{round(distance_km / 5) * 5:g}"
+
 
 class GeminiSafetyAdvisor:
     """
     Use Gemini AI to generate natural language safety explanations.
     """
     
-    def __init__(self):
-        """Initialize Gemini AI with API key from settings."""
-        api_key = settings.GEMINI_API_KEY
+    def __init__(self, backend=None):
+        """
+        Set up the advisor.
         
-        if not api_key:
-            self.enabled = False
-            self.model = None
-        else:
-            try:
-                genai.configure(api_key=api_key)
-                # Use Gemini 2.0 Flash (experimental but available)
-                self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                self.enabled = True
-                print("✅ Gemini AI initialized with gemini-2.0-flash-exp")
-            except Exception as e:
-                print(f"❌ Gemini AI initialization failed: {e}")
-                self.enabled = False
-                self.model = None
+        Args:
+            backend: AIBackend to use (default: chosen by settings.AI_BACKEND)
+        """
+        self.cache = AdviceCache(
+            settings.AI_ADVICE_CACHE_TIMEOUT,
+            settings.AI_ADVICE_LOCAL_CACHE_SIZE
+        )
+        self.breaker = CircuitBreaker(
+            slow_call_seconds=settings.AI_BREAKER_SLOW_CALL_SECONDS,
+            reset_seconds=settings.AI_BREAKER_RESET_SECONDS
+        )
+        self.backend = backend if backend is not None else create_backend()
+        self.enabled = self.backend is not None
+    
+    def _generate(self, prompt):
+        """Model answer for a prompt (raises when the backend fails or the breaker is open)."""
+        return self.breaker.call(self.backend.generate, prompt)
     
     def explain_route_choice(self, route_data, alternative_routes=None):
         """
@@ -42,40 +144,73 @@ class GeminiSafetyAdvisor:
         Returns:
             str: Natural language explanation
         """
+        return self.explain_route_choice_with_status(route_data, alternative_routes)[0]
+    
+    def explain_route_choice_with_status(self, route_data, alternative_routes=None):
+        """
+        Like explain_route_choice, also telling whether the model answered.
+        
+        Returns:
+            (explanation, fallback): fallback is True for the rule-based text
+        """
         if not self.enabled:
-            return self._fallback_explanation(route_data)
+            return self._fallback_explanation(route_data), True
+        
+        features = route_features(route_data)
+        alternative_features = [route_features(alt) for alt in alternative_routes or []]
+        key = advice_cache_key('explanation', features, alternative_features)
+        
+        explanation = self.cache.get(key)
+        if explanation is not None:
+            return explanation, False
         
         try:
-            prompt = self._build_explanation_prompt(route_data, alternative_routes)
-            response = self.model.generate_content(prompt)
-            return response.text
+            prompt = self._build_explanation_prompt(features, alternative_features)
+            explanation = self._generate(prompt)
         except Exception as e:
-            print(f"Gemini AI error: {e}")
+            print(f"AI advisor error: {e}")
+            return self._fallback_explanation(route_data), True
+        
+        self.cache.set(key, explanation)
+        return explanation, False
+    
+    def cached_explanation(self, route_data, alternative_routes=None):
+        """
+        Explanation that can be returned without a model call.
+        
+        Returns:
+            The fallback text when AI is disabled or the breaker is open,
+            a cached answer, or None
+        """
+        if not self.enabled or self.breaker.state == 'open':
             return self._fallback_explanation(route_data)
+        
+        features = route_features(route_data)
+        alternative_features = [route_features(alt) for alt in alternative_routes or []]
+        return self.cache.get(advice_cache_key('explanation', features, alternative_features))
     
-    def _build_explanation_prompt(self, route_data, alternative_routes):
-        """Build the prompt for Gemini AI."""
+    def _build_explanation_prompt(self, features, alternative_features):
+        """Build the prompt for Gemini AI from bucketed route features."""
         
         prompt = f"""You are a safety advisor for a route planning application called RouteGuard. 
 Your job is to explain to users why a particular route was recommended over others.
 
 **Recommended Route:**
-- Safety Score: {route_data.get('score', 'N/A')}/100 (Grade: {route_data.get('grade', 'N/A')})
-- Distance: {route_data.get('distance_km', 'N/A')} km
-- Crime incidents nearby: {route_data.get('crime_count', 0)}
-- Safety zones nearby: {route_data.get('safety_zone_count', 0)}
-- Time of day: {route_data.get('time_of_day', 'unknown')}
-- Details: {route_data.get('details', 'No details available')}
+- Safety Score: {features['score']} out of 100 (Grade: {features['grade']})
+- Distance: about {features['distance_km']} km
+- Crime incidents nearby: {features['crime_count']}
+- Safety zones nearby: {features['safety_zone_count']}
+- Time of day: {features['time_of_day']}
 """
         
-        if alternative_routes:
+        if alternative_features:
             prompt += "\n**Alternative Routes:**\n"
-            for i, alt in enumerate(alternative_routes, 1):
+            for i, alt in enumerate(alternative_features, 1):
                 prompt += f"""
 Route {i}:
-- Safety Score: {alt.get('score', 'N/A')}/100
-- Distance: {alt.get('distance_km', 'N/A')} km
-- Crime incidents: {alt.get('crime_count', 0)}
+- Safety Score: {alt['score']} out of 100
+- Distance: about {alt['distance_km']} km
+- Crime incidents: {alt['crime_count']}
 """
         
         prompt += """
@@ -127,22 +262,31 @@ Generate the explanation now:"""
         if not self.enabled:
             return self._fallback_safety_tips(route_data)
         
+        features = route_features(route_data)
+        key = advice_cache_key('tips', features)
+        
+        tips = self.cache.get(key)
+        if tips is not None:
+            return tips
+        
         try:
             prompt = f"""Generate 3-5 specific safety tips for someone traveling this route:
 
 Route Information:
-- Safety Score: {route_data.get('score', 'N/A')}/100
-- Time of day: {route_data.get('time_of_day', 'unknown')}
-- Crime incidents nearby: {route_data.get('crime_count', 0)}
-- Distance: {route_data.get('distance_km', 'N/A')} km
+- Safety Score: {features['score']} out of 100
+- Time of day: {features['time_of_day']}
+- Crime incidents nearby: {features['crime_count']}
+- Distance: about {features['distance_km']} km
 
 Provide practical, actionable tips. Format as a numbered list."""
             
-            response = self.model.generate_content(prompt)
-            return response.text
+            tips = self._generate(prompt)
         except Exception as e:
-            print(f"Gemini AI error: {e}")
+            print(f"AI advisor error: {e}")
             return self._fallback_safety_tips(route_data)
+        
+        self.cache.set(key, tips)
+        return tips
     
     def _fallback_safety_tips(self, route_data):
         """Generate basic safety tips when AI is not available."""
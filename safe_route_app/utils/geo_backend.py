@@ -0,0 +1,247 @@
+"""
+Pluggable backend for the app's geo queries.
+
+- SpatialGeoBackend: used when the database has the PostGIS geometry
+  columns from utils/spatial_schema.py. It filters with ST_DWithin on the
+  GiST-indexed geography column.
+- GeohashGeoBackend: pure-Python fallback for SQLite and PostgreSQL without
+  PostGIS, pruning crime points through the geohash index (utils/geohash.py).
+
+Both return exactly what a brute-force haversine check against every row
+returns: candidates are always confirmed with the same distance function.
+"""
+from collections import defaultdict
+import math
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from ..models import CrimePoint, SafetyZone, PoliceAuthority
+from . import geohash
+from .spatial_schema import GEOMETRY_COLUMN, has_spatial_columns
+
+
+EARTH_RADIUS_KM = 6371
+METERS_PER_DEGREE = 111000.0
+
+# Route vertices are grouped into boxes of about this size (degrees) when
+# building the candidate search area along a route
+CORRIDOR_CHUNK_DEG = 0.02
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometers."""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dlon / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+def officer_location(officer):
+    """
+    Patrol position if both coordinates are known, else the jurisdiction
+    center (the same rule as the PostGIS geometry column).
+    """
+    if officer.current_lat is not None and officer.current_lng is not None:
+        return officer.current_lat, officer.current_lng
+    return officer.jurisdiction_lat, officer.jurisdiction_lng
+
+
+class GeoBackend:
+    """Geo queries used by scoring and dispatch."""
+
+    name = None
+
+    def crimes_near_route(self, route_coordinates, radius_m):
+        """Crime points within radius_m of any [lat, lon] route vertex."""
+        candidates = self._crime_candidates(route_coordinates, radius_m)
+        return _near_route(candidates, route_coordinates, radius_m, lambda c: (c.latitude, c.longitude))
+
+    def safety_zones_near_route(self, route_coordinates, radius_m):
+        """Active safety zones within radius_m of any route vertex."""
+        candidates = self._zone_candidates(route_coordinates, radius_m)
+        return _near_route(candidates, route_coordinates, radius_m, lambda z: (z.latitude, z.longitude))
+
+    def nearest_on_duty_officers(self, latitude, longitude, max_km):
+        """
+        Verified, on-duty officers within max_km, nearest first.
+
+        Returns:
+            list of (distance_km, PoliceAuthority)
+        """
+        candidates = self._officer_candidates(latitude, longitude, max_km)
+        found = []
+        for officer in candidates:
+            lat, lng = officer_location(officer)
+            if None in (latitude, longitude, lat, lng):
+                continue
+            distance = haversine_km(latitude, longitude, lat, lng)
+            if distance <= max_km:
+                found.append((distance, officer))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def _crime_candidates(self, route_coordinates, radius_m):
+        raise NotImplementedError
+
+    def _zone_candidates(self, route_coordinates, radius_m):
+        raise NotImplementedError
+
+    def _officer_candidates(self, latitude, longitude, max_km):
+        raise NotImplementedError
+
+
+class GeohashGeoBackend(GeoBackend):
+    """Fallback without a spatial database."""
+
+    name = 'geohash'
+
+    def _crime_candidates(self, route_coordinates, radius_m):
+        ranges = []
+        for min_lat, max_lat, min_lon, max_lon in _corridor_boxes(route_coordinates, radius_m):
+            ranges.extend(geohash.cover_bbox(min_lat, max_lat, min_lon, max_lon, max_cells=4))
+        return CrimePoint.objects.in_geohash_ranges(_merge_ranges(ranges))
+
+    def _zone_candidates(self, route_coordinates, radius_m):
+        min_lat, max_lat, min_lon, max_lon = _route_bbox(route_coordinates, radius_m)
+        return SafetyZone.objects.filter(
+            is_active=True,
+            latitude__gte=min_lat,
+            latitude__lte=max_lat,
+            longitude__gte=min_lon,
+            longitude__lte=max_lon
+        )
+
+    def _officer_candidates(self, latitude, longitude, max_km):
+        # Few officers are on duty at once (partial index police_on_duty_idx)
+        return PoliceAuthority.objects.filter(verified_by_admin=True, is_on_duty=True)
+
+
+class SpatialGeoBackend(GeoBackend):
+    """Backend for PostGIS databases with the geometry columns."""
+
+    name = 'spatial'
+
+    def _crime_candidates(self, route_coordinates, radius_m):
+        return CrimePoint.objects.filter(
+            id__in=self._near_route_sql(CrimePoint, route_coordinates, radius_m)
+        )
+
+    def _zone_candidates(self, route_coordinates, radius_m):
+        return SafetyZone.objects.filter(
+            is_active=True,
+            id__in=self._near_route_sql(SafetyZone, route_coordinates, radius_m)
+        )
+
+    def _officer_candidates(self, latitude, longitude, max_km):
+        return PoliceAuthority.objects.filter(
+            verified_by_admin=True,
+            is_on_duty=True,
+            firebase_uid__in=self._near_route_sql(PoliceAuthority, [[latitude, longitude]], max_km * 1000)
+        )
+
+    def _near_route_sql(self, model, route_coordinates, radius_m):
+        """Subquery of primary keys near the route vertices, using the spatial index."""
+        table = model._meta.db_table
+        pk = model._meta.pk.column
+
+        # Vertex distance on a sphere; a small margin keeps rows that the
+        # exact haversine check (different Earth radius) would accept
+        points = ','.join(f'({float(lon)} {float(lat)})' for lat, lon in route_coordinates)
+        return RawSQL(
+            f'SELECT {pk} FROM {table} WHERE ST_DWithin({GEOMETRY_COLUMN}, '
+            f'ST_GeogFromText(%s), %s, false)',
+            [f'SRID=4326;MULTIPOINT({points})', radius_m * 1.001]
+        )
+
+
+def _near_route(candidates, route_coordinates, radius_m, location):
+    """Keep the candidates within radius_m of any route vertex (haversine)."""
+    radius_km = radius_m / 1000
+    cell = radius_m / METERS_PER_DEGREE
+    vertices = defaultdict(list)
+    for lat, lon in route_coordinates:
+        vertices[(math.floor(lat / cell), math.floor(lon / cell))].append((lat, lon))
+
+    # Neighboring latitude cells are enough; longitude degrees are shorter,
+    # so the longitude search widens with latitude
+    found = []
+    for item in candidates:
+        lat, lon = location(item)
+        if lat is None or lon is None:
+            continue
+        cy = math.floor(lat / cell)
+        span = math.ceil(1 / max(math.cos(math.radians(min(abs(lat) + cell, 89.9))), 0.01))
+        cx = math.floor(lon / cell)
+        if any(
+            haversine_km(v_lat, v_lon, lat, lon) <= radius_km
+            for dy in (-1, 0, 1)
+            for dx in range(-span, span + 1)
+            for v_lat, v_lon in vertices.get((cy + dy, cx + dx), ())
+        ):
+            found.append(item)
+    return found
+
+
+def _route_bbox(route_coordinates, radius_m):
+    lats = [lat for lat, _ in route_coordinates]
+    lons = [lon for _, lon in route_coordinates]
+    return _pad_box(min(lats), max(lats), min(lons), max(lons), radius_m)
+
+
+def _corridor_boxes(route_coordinates, radius_m):
+    """Padded bounding boxes of consecutive groups of route vertices."""
+    boxes = []
+    box = None
+    for lat, lon in route_coordinates:
+        if box is not None:
+            grown = [min(box[0], lat), max(box[1], lat), min(box[2], lon), max(box[3], lon)]
+            if max(grown[1] - grown[0], grown[3] - grown[2]) <= CORRIDOR_CHUNK_DEG:
+                box = grown
+                continue
+            boxes.append(_pad_box(*box, radius_m))
+        box = [lat, lat, lon, lon]
+    if box is not None:
+        boxes.append(_pad_box(*box, radius_m))
+    return boxes
+
+
+def _pad_box(min_lat, max_lat, min_lon, max_lon, radius_m):
+    pad_lat = radius_m / METERS_PER_DEGREE * 1.01
+    widest = max(abs(min_lat), abs(max_lat)) + pad_lat
+    pad_lon = pad_lat / max(math.cos(math.radians(min(widest, 89.9))), 0.01)
+    return min_lat - pad_lat, max_lat + pad_lat, min_lon - pad_lon, max_lon + pad_lon
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return [tuple(r) for r in merged]
+
+
+# Backend chosen for this process (created on first use)
+_geo_backend = None
+
+
+def get_geo_backend():
+    """
+    Get or create the geo backend.
+
+    settings.GEO_BACKEND: 'auto' (spatial when the geometry columns exist),
+    'spatial' or 'geohash'.
+    """
+    global _geo_backend
+    if _geo_backend is None:
+        choice = settings.GEO_BACKEND
+        if choice == 'geohash' or (choice == 'auto' and not has_spatial_columns(connection)):
+            _geo_backend = GeohashGeoBackend()
+        else:
+            _geo_backend = SpatialGeoBackend()
+    return _geo_backend
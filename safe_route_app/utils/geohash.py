@@ -0,0 +1,93 @@
+"""
+Integer geohashes for indexed spatial lookups without PostGIS.
+
+A geohash interleaves longitude and latitude bits (longitude first), so
+nearby points share leading bits and every geohash prefix is a contiguous
+range of integers (a Z-order curve). Stored in an indexed BIGINT column, a
+bounding box turns into a handful of B-tree range scans on both SQLite and
+PostgreSQL, and integer ranges don't depend on the database collation the
+way string prefixes would.
+
+This module must not import models: migrations use it to backfill.
+"""
+import math
+
+
+# Bits per axis; 2 * 30 = 60 bits fit a signed BIGINT (~2 cm at the equator)
+BITS = 30
+TOTAL_BITS = 2 * BITS
+
+# Upper bound on the number of cells used to cover one bounding box
+MAX_COVER_CELLS = 16
+
+
+def encode(latitude, longitude):
+    """Geohash of a point as a 60-bit integer."""
+    return _interleave(
+        _quantize(longitude, -180.0, 180.0, BITS),
+        _quantize(latitude, -90.0, 90.0, BITS)
+    )
+
+
+def cover_bbox(min_lat, max_lat, min_lon, max_lon, max_cells=MAX_COVER_CELLS):
+    """
+    Integer ranges of geohash cells covering a bounding box.
+
+    Picks the finest level at which at most max_cells cells cover the box
+    and merges cells that are consecutive on the curve.
+
+    Returns:
+        list of (low, high) half-open ranges; matching rows can still lie
+        outside the box, so keep an exact latitude/longitude filter too
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+    if min_lat > max_lat or min_lon > max_lon:
+        return []
+
+    level = 0
+    for candidate in range(BITS, -1, -1):
+        x0, x1 = _quantize(min_lon, -180.0, 180.0, candidate), _quantize(max_lon, -180.0, 180.0, candidate)
+        y0, y1 = _quantize(min_lat, -90.0, 90.0, candidate), _quantize(max_lat, -90.0, 90.0, candidate)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= max_cells:
+            level = candidate
+            break
+
+    cells = sorted(
+        _interleave(x, y)
+        for x in range(x0, x1 + 1)
+        for y in range(y0, y1 + 1)
+    )
+
+    # A cell at this level covers 2^shift consecutive full-precision values
+    shift = TOTAL_BITS - 2 * level
+    ranges = []
+    for cell in cells:
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1][1] = cell + 1
+        else:
+            ranges.append([cell, cell + 1])
+
+    return [(low << shift, high << shift) for low, high in ranges]
+
+
+def _quantize(value, lower, upper, bits):
+    cells = 1 << bits
+    index = math.floor((value - lower) / (upper - lower) * cells)
+    return min(max(index, 0), cells - 1)
+
+
+def _interleave(x, y):
+    """Interleave bits, x (longitude) taking the higher bit of each pair."""
+    return (_spread_bits(x) << 1) | _spread_bits(y)
+
+
+def _spread_bits(value):
+    """Insert a zero bit between each of the lower 32 bits."""
+    value &= 0xFFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
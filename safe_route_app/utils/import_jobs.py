@@ -0,0 +1,229 @@
+"""
+Background crime data imports.
+Uploads are saved to storage and imported outside the HTTP request so large
+files are not killed by the gunicorn worker timeout.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import os
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import ImportJob
+from .json_importer import get_importer_class
+
+
+# Shared in-process worker pool (created on first use)
+_executor = None
+
+# Jobs submitted to this process's pool and not finished yet
+_queued_job_ids = set()
+_queued_lock = threading.Lock()
+
+
+def _get_executor():
+    """Get or create the in-process import worker pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CRIME_IMPORT_WORKERS,
+            thread_name_prefix='crime-import'
+        )
+    return _executor
+
+
+def create_import_job(uploaded_file, clear_existing=False, requested_by='', upsert=False):
+    """
+    Save an upload and queue it for background import.
+
+    Args:
+        uploaded_file: Django UploadedFile
+        clear_existing: Whether to clear existing non-sample data
+        upsert: Whether to update changed rows that were imported before
+        requested_by: Firebase UID of the uploader (optional)
+
+    Returns:
+        The created ImportJob
+    """
+    file_name = os.path.basename(uploaded_file.name or 'upload.csv')
+    file_path = default_storage.save(f'crime_imports/{uuid.uuid4().hex}_{file_name}', uploaded_file)
+
+    job = ImportJob.objects.create(
+        file_name=file_name,
+        file_path=file_path,
+        clear_existing=clear_existing,
+        upsert=upsert,
+        requested_by=requested_by or ''
+    )
+
+    # With no in-process workers, jobs wait for the process_import_jobs command
+    if settings.CRIME_IMPORT_WORKERS > 0:
+        transaction.on_commit(lambda: _queue_job(job.id))
+
+    return job
+
+
+def _queue_job(job_id):
+    """Submit a job to the in-process pool, unless it is already queued here."""
+    with _queued_lock:
+        if job_id in _queued_job_ids:
+            return
+        _queued_job_ids.add(job_id)
+    _get_executor().submit(_run_queued_job, job_id)
+
+
+def _run_queued_job(job_id):
+    try:
+        run_import_job(job_id)
+    finally:
+        with _queued_lock:
+            _queued_job_ids.discard(job_id)
+
+
+def run_import_job(job_id, processes=1):
+    """
+    Run a pending import job to completion.
+
+    Safe to call from several workers: only the one that moves the job
+    from pending to running actually imports it.
+
+    Args:
+        job_id: ImportJob id
+        processes: Parser processes for large CSV files. Web workers keep
+            the default of 1; process_import_jobs may fork more
+
+    Returns:
+        The ImportJob, or None if it was missing or already claimed
+    """
+    close_old_connections()
+    try:
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(id=job_id, status='pending').update(
+            status='running',
+            started_at=now,
+            heartbeat_at=now
+        )
+        if not claimed:
+            return None
+
+        job = ImportJob.objects.get(id=job_id)
+        importer_class = get_importer_class(job.file_name)
+        importer = importer_class(
+            progress_callback=lambda imp: _save_progress(job, imp),
+            processes=processes
+        )
+
+        try:
+            try:
+                # A local path lets the importer parse large files in parallel
+                local_path = default_storage.path(job.file_path)
+            except NotImplementedError:
+                local_path = None
+
+            if local_path:
+                result = importer.import_file(local_path, job.clear_existing, job.upsert)
+            else:
+                with default_storage.open(job.file_path, 'rb') as upload:
+                    result = importer.import_file(upload, job.clear_existing, job.upsert)
+        except Exception as e:
+            result = {'success': False, 'error': f'Failed to open upload: {str(e)}'}
+
+        # Only while still running: if the job was failed as stale meanwhile,
+        # that status (and the deleted upload) stands
+        finished = ImportJob.objects.filter(id=job_id, status='running').update(
+            status='completed' if result.get('success') else 'failed',
+            rows_read=importer.rows_read,
+            imported_count=importer.imported_count,
+            skipped_count=importer.skipped_count,
+            updated_count=importer.updated_count,
+            duplicate_count=importer.duplicate_count,
+            date_fallback_count=importer.date_fallback_count,
+            errors=importer.errors,
+            error_message=result.get('error', ''),
+            finished_at=timezone.now()
+        )
+        if finished:
+            _delete_upload(job.file_path)
+
+        job.refresh_from_db()
+        return job
+    finally:
+        close_old_connections()
+
+
+def fail_stale_import_jobs():
+    """
+    Mark running jobs whose worker stopped reporting progress (crashed or
+    was killed) as failed, so clients polling them get a final status.
+
+    Returns:
+        Number of jobs marked failed
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.CRIME_IMPORT_STALE_SECONDS)
+    stale_jobs = list(
+        ImportJob.objects.filter(status='running', heartbeat_at__lt=cutoff)
+        .values_list('id', 'file_path')
+    )
+
+    failed = 0
+    for job_id, file_path in stale_jobs:
+        # Conditional update: a worker that reports progress meanwhile keeps its job
+        if ImportJob.objects.filter(id=job_id, status='running', heartbeat_at__lt=cutoff).update(
+            status='failed',
+            error_message='Import stopped responding (worker crashed or was restarted)',
+            finished_at=timezone.now()
+        ):
+            _delete_upload(file_path)
+            failed += 1
+    return failed
+
+
+def requeue_stale_pending_jobs():
+    """
+    Queue pending jobs again in this process's pool when they have waited
+    longer than CRIME_IMPORT_STALE_SECONDS: the in-process queue they were
+    submitted to is lost when a web worker restarts. A job queued in
+    several processes still runs once (see run_import_job).
+
+    Returns:
+        Number of jobs queued
+    """
+    # Without in-process workers, pending jobs wait for process_import_jobs
+    if settings.CRIME_IMPORT_WORKERS <= 0:
+        return 0
+
+    cutoff = timezone.now() - timedelta(seconds=settings.CRIME_IMPORT_STALE_SECONDS)
+    job_ids = list(
+        ImportJob.objects.filter(status='pending', created_at__lt=cutoff)
+        .order_by('created_at')
+        .values_list('id', flat=True)
+    )
+    for job_id in job_ids:
+        _queue_job(job_id)
+    return len(job_ids)
+
+
+def _delete_upload(file_path):
+    """The upload is no longer needed once the job has finished."""
+    try:
+        default_storage.delete(file_path)
+    except Exception as e:
+        print(f"Could not delete import file {file_path}: {e}")
+
+
+def _save_progress(job, importer):
+    """Persist the importer counters so the status endpoint can report them."""
+    ImportJob.objects.filter(id=job.id, status='running').update(
+        rows_read=importer.rows_read,
+        imported_count=importer.imported_count,
+        skipped_count=importer.skipped_count,
+        updated_count=importer.updated_count,
+        duplicate_count=importer.duplicate_count,
+        date_fallback_count=importer.date_fallback_count,
+        heartbeat_at=timezone.now()
+    )
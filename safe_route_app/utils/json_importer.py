@@ -0,0 +1,304 @@
+"""
+GeoJSON and newline-delimited JSON importers for crime data.
+Many open-data portals publish incidents in these formats. Files are parsed
+incrementally, so memory stays flat even for multi-GB feeds, and they reuse
+the column mapping and normalization rules of the CSV importer.
+"""
+import itertools
+import json
+import re
+
+from .csv_importer import CSVCrimeDataImporter
+
+
+class JSONRecordImporter(CSVCrimeDataImporter):
+    """
+    Base for importers that read one JSON object per incident.
+
+    Each object is flattened into a CSV-like row (string values, geometry
+    coordinates as latitude/longitude) and goes through the same pipeline.
+    Unlike CSV columns, keys can differ from record to record, so they are
+    mapped to our fields per record.
+    """
+
+    # Distinct key sets whose column mapping is memoized
+    MAX_KEY_SETS = 1000
+
+    def _iter_records(self, stream):
+        """Yield (record number, JSON object) pairs from a text stream."""
+        raise NotImplementedError
+
+    def _import_source(self, source):
+        with self._open_text_stream(source) as stream:
+            rows = self._iter_rows(stream)
+
+            # Reject feeds without coordinates from a sample of records
+            sample = list(itertools.islice(rows, self.DATE_SAMPLE_SIZE))
+            if not sample:
+                return None
+
+            sample_keys = dict.fromkeys(key for _, row in sample for key in row)
+            if not self._has_coordinates(self._detect_columns(list(sample_keys))):
+                return self._missing_coordinates_result()
+
+            # Rows are renamed to our field names, so every field is always present
+            column_map = {field: field for field in self.COLUMN_MAPPINGS}
+            self._import_rows(self._map_rows(itertools.chain(sample, rows)), column_map)
+        return None
+
+    def _map_rows(self, numbered_rows):
+        """
+        Rename each row's keys to our field names. Fields a record doesn't
+        have are empty, so a missing date is counted as a date fallback.
+        """
+        column_maps = {}
+        for row_num, row in numbered_rows:
+            keys = tuple(row)
+            column_map = column_maps.get(keys)
+            if column_map is None:
+                column_map = self._detect_columns(list(keys))
+                if len(column_maps) < self.MAX_KEY_SETS:
+                    column_maps[keys] = column_map
+
+            yield row_num, {
+                field: row[column_map[field]] if field in column_map else ''
+                for field in self.COLUMN_MAPPINGS
+            }
+
+    def _iter_rows(self, stream):
+        """Flatten records into rows, counting undecodable records as skipped."""
+        for record_num, record in self._iter_records(stream):
+            if isinstance(record, Exception):
+                self.rows_read += 1
+                self._record_error(record_num, record)
+                continue
+            try:
+                yield record_num, self._flatten_record(record)
+            except Exception as e:
+                self.rows_read += 1
+                self._record_error(record_num, e)
+
+    def _flatten_record(self, record):
+        """
+        Turn a flat object or a GeoJSON Feature with a Point geometry
+        into a row of strings.
+        """
+        if not isinstance(record, dict):
+            raise ValueError('Expected a JSON object')
+
+        if record.get('type') == 'Feature':
+            properties = record.get('properties') or {}
+            geometry = record.get('geometry') or {}
+            if geometry.get('type') != 'Point':
+                raise ValueError(f"Unsupported geometry: {geometry.get('type')}")
+            lon, lat = geometry['coordinates'][:2]
+            properties = dict(properties, latitude=lat, longitude=lon)
+        else:
+            properties = record
+
+        return {
+            str(key): '' if value is None else str(value)
+            for key, value in properties.items()
+            if not isinstance(value, (dict, list))
+        }
+
+
+class NDJSONCrimeDataImporter(JSONRecordImporter):
+    """
+    Import crime data from newline-delimited JSON: one flat object or
+    GeoJSON Feature per line.
+    """
+
+    FORMAT_NAME = 'NDJSON'
+    RECORD_LABEL = 'Line'
+    SOURCE = 'ndjson_upload'
+
+    def _iter_records(self, stream):
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except ValueError as e:
+                yield line_num, e
+
+
+class GeoJSONCrimeDataImporter(JSONRecordImporter):
+    """
+    Import crime data from a GeoJSON FeatureCollection.
+    Features are decoded one at a time instead of loading the whole document.
+    """
+
+    FORMAT_NAME = 'GeoJSON'
+    RECORD_LABEL = 'Feature'
+    SOURCE = 'geojson_upload'
+
+    def _iter_records(self, stream):
+        reader = _JSONStreamReader(stream)
+        reader.expect('{')
+
+        while True:
+            reader.skip_whitespace()
+            if reader.peek() == '}':
+                return
+
+            key = reader.decode_value()
+            reader.expect(':')
+
+            if key != 'features':
+                reader.decode_value()  # Other members (type, crs, ...) are small
+            else:
+                reader.expect('[')
+                feature_num = 0
+                while True:
+                    reader.skip_whitespace()
+                    if reader.peek() == ']':
+                        reader.advance()
+                        break
+                    feature_num += 1
+                    try:
+                        yield feature_num, reader.decode_value()
+                    except _InvalidValue as e:
+                        yield feature_num, e
+                    reader.skip_whitespace()
+                    if reader.peek() == ',':
+                        reader.advance()
+
+            reader.skip_whitespace()
+            if reader.peek() == ',':
+                reader.advance()
+
+
+class _InvalidValue(ValueError):
+    """A complete but malformed JSON value; the reader has moved past it."""
+
+
+class _JSONStreamReader:
+    """
+    Minimal incremental JSON reader: decodes one value at a time from a
+    text stream with json.JSONDecoder.raw_decode, refilling a small buffer.
+    
+    Objects and arrays are first delimited by matching brackets, so a
+    malformed value is skipped (as _InvalidValue) instead of being mistaken
+    for a value cut off by the end of the buffer.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    # Largest single value we buffer before giving up on the input
+    MAX_VALUE_SIZE = 16 * 1024 * 1024
+
+    # Brackets and string delimiters outside strings, and string ends inside them
+    _STRUCTURE_RE = re.compile(r'[{}\[\]"]')
+    _STRING_END_RE = re.compile(r'["\\]')
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Read more input, dropping the consumed part of the buffer."""
+        if len(self.buffer) - self.pos > self.MAX_VALUE_SIZE:
+            raise ValueError(f'GeoJSON value larger than {self.MAX_VALUE_SIZE} characters')
+        chunk = self.stream.read(self.READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _fill_or_fail(self, index):
+        """Read more input for a scan at index; return the index in the new buffer."""
+        offset = index - self.pos
+        if not self._fill():
+            raise ValueError('Unexpected end of GeoJSON input')
+        return self.pos + offset
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def peek(self):
+        self.skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise ValueError('Unexpected end of GeoJSON input')
+        return self.buffer[self.pos]
+
+    def advance(self):
+        self.pos += 1
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' in GeoJSON input, found '{self.buffer[self.pos]}'")
+        self.advance()
+
+    def _container_end(self):
+        """Buffer the object or array at pos and return the index just past it."""
+        index = self.pos
+        depth = 0
+        in_string = False
+        while True:
+            pattern = self._STRING_END_RE if in_string else self._STRUCTURE_RE
+            match = pattern.search(self.buffer, index)
+            # An escape needs its next character in the buffer too
+            if match is None or match.end() == len(self.buffer) and match.group() == '\\':
+                index = self._fill_or_fail(index)
+                continue
+
+            char = match.group()
+            index = match.end()
+            if char == '\\':
+                index += 1
+            elif char == '"':
+                in_string = not in_string
+            elif char in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return index
+
+    def decode_value(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        if self.peek() in '{[':
+            end = self._container_end()
+            start, self.pos = self.pos, end
+            try:
+                value, value_end = self.decoder.raw_decode(self.buffer[:end], start)
+            except json.JSONDecodeError as e:
+                raise _InvalidValue(f'Invalid JSON: {e.msg}') from e
+            if value_end != end:
+                raise _InvalidValue('Invalid JSON: unbalanced brackets')
+            return value
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next read
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def get_importer_class(file_name):
+    """Pick the importer for an uploaded file from its name (.gz is transparent)."""
+    name = (file_name or '').lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+
+    if name.endswith(('.ndjson', '.jsonl', '.geojsonl', '.geojsons')):
+        return NDJSONCrimeDataImporter
+    if name.endswith(('.geojson', '.json')):
+        return GeoJSONCrimeDataImporter
+    return CSVCrimeDataImporter
@@ -0,0 +1,310 @@
+"""
+Synthetic city scenarios for capacity testing.
+Creates users, police officers (on duty with current positions), active and
+finished trips with location trails, emergency alerts and safety news with
+bulk inserts. Everything is drawn from one seeded random.Random, so the same
+seed always produces the same scenario.
+"""
+from datetime import timedelta
+import math
+import random
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import UserProfile, PoliceAuthority, TravelHistory, EmergencyAlert, SafetyNews
+from .bulk_delete import chunked_delete
+
+
+# All scenario accounts share this prefix so they can be removed again
+SCENARIO_UID_PREFIX = 'scenario-'
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Kavya', 'Rohan', 'Meera']
+LAST_NAMES = ['Sharma', 'Iyer', 'Reddy', 'Nair', 'Gupta', 'Rao', 'Singh', 'Das', 'Menon', 'Patel']
+RANKS = ['Constable', 'Head Constable', 'Sub-Inspector', 'Inspector']
+NEWS_TITLES = [
+    'Road closure near {area}',
+    'Increased patrols in {area}',
+    'Chain snatching reported in {area}',
+    'Street lights repaired in {area}',
+    'Festival crowd advisory for {area}',
+]
+SAFETY_GRADES = ['A', 'B', 'C', 'D', 'F']
+
+
+class CityScenarioGenerator:
+    """
+    Generate a full synthetic city around a center point.
+    """
+
+    def __init__(self, center_lat, center_lon, radius_km=10, seed=0, batch_size=2000):
+        """
+        Initialize generator for a specific city.
+
+        Args:
+            center_lat: City center latitude
+            center_lon: City center longitude
+            radius_km: City radius (km)
+            seed: Random seed; the same seed gives the same scenario
+            batch_size: Rows per INSERT
+        """
+        self.center_lat = center_lat
+        self.center_lon = center_lon
+        self.radius_km = radius_km
+        self.seed = seed
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.uid_prefix = f"{SCENARIO_UID_PREFIX}{seed}-"
+
+    def generate(self, users=1000, officers=50, active_trips=200, completed_trips=0,
+                 alert_rate=0.05, news=20, trail_points=30, on_duty_share=0.7, clear_existing=True):
+        """
+        Generate and insert a scenario.
+
+        Args:
+            users: Number of regular users
+            officers: Number of verified police officers
+            active_trips: Trips still in progress (no end time)
+            completed_trips: Finished trips
+            alert_rate: Share of active trips that raised an emergency alert
+            news: Number of safety news posts
+            trail_points: Location history points per trip
+            on_duty_share: Share of officers on duty with a current position
+            clear_existing: Delete this seed's previous scenario first
+
+        Returns:
+            dict with the number of rows created per model
+        """
+        if clear_existing:
+            clear_scenario(self.seed)
+
+        now = timezone.now()
+        with transaction.atomic():
+            user_profiles = self._create_users(users)
+            police = self._create_officers(officers, on_duty_share, now)
+            on_duty = [officer for officer in police if officer.is_on_duty]
+
+            travels = self._create_trips(user_profiles, active_trips, trail_points, now, active=True)
+            travels += self._create_trips(user_profiles, completed_trips, trail_points, now, active=False)
+
+            alert_count = round(active_trips * alert_rate)
+            alerts = self._create_alerts(travels[:active_trips], alert_count, on_duty, now)
+            news_posts = self._create_news(police, news, now)
+
+        return {
+            'users': len(user_profiles),
+            'officers': len(police),
+            'on_duty': len(on_duty),
+            'active_trips': min(active_trips, len(travels)),
+            'completed_trips': len(travels) - min(active_trips, len(travels)),
+            'alerts': len(alerts),
+            'news': len(news_posts),
+        }
+
+    def _create_users(self, count):
+        profiles = [
+            self._build_profile(f"{self.uid_prefix}user-{i:07d}")
+            for i in range(count)
+        ]
+        return UserProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+
+    def _create_officers(self, count, on_duty_share, now):
+        profiles = [
+            self._build_profile(f"{self.uid_prefix}officer-{i:06d}")
+            for i in range(count)
+        ]
+        UserProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+
+        rng = self.rng
+        police = []
+        for i, profile in enumerate(profiles):
+            station_lat, station_lng = self._random_location()
+            on_duty = rng.random() < on_duty_share
+            current_lat = current_lng = None
+            if on_duty:
+                current_lat, current_lng = self._random_location_near(station_lat, station_lng, 2.0)
+
+            police.append(PoliceAuthority(
+                firebase_uid=profile.firebase_uid,
+                user_profile=profile,
+                badge_number=f"SCN{self.seed}-{i:06d}",
+                station_name=f"Station {i % max(count // 10, 1) + 1}",
+                rank=rng.choice(RANKS),
+                jurisdiction_area=f"Sector {i % 25 + 1}",
+                jurisdiction_lat=station_lat,
+                jurisdiction_lng=station_lng,
+                jurisdiction_radius=rng.choice([3000, 5000, 8000]),
+                verified_by_admin=True,
+                verified_at=now - timedelta(days=rng.randint(1, 365)),
+                is_on_duty=on_duty,
+                current_lat=current_lat,
+                current_lng=current_lng
+            ))
+        return PoliceAuthority.objects.bulk_create(police, batch_size=self.batch_size)
+
+    def _create_trips(self, user_profiles, count, trail_points, now, active):
+        if not user_profiles or count <= 0:
+            return []
+
+        rng = self.rng
+        travels = []
+        for _ in range(count):
+            user = rng.choice(user_profiles)
+            start_lat, start_lng = self._random_location()
+            end_lat, end_lng = self._random_location()
+            duration = rng.randint(10, 90)
+
+            if active:
+                # Somewhere along the way right now
+                start_time = now - timedelta(minutes=rng.uniform(1, duration))
+                end_time = None
+                progress = min((now - start_time).total_seconds() / (duration * 60), 1.0)
+            else:
+                start_time = now - timedelta(days=rng.uniform(1, 29))
+                end_time = start_time + timedelta(minutes=duration)
+                progress = 1.0
+
+            travels.append(TravelHistory(
+                id=self._uuid(),
+                user=user,
+                start_latitude=start_lat,
+                start_longitude=start_lng,
+                start_address='',
+                end_latitude=end_lat,
+                end_longitude=end_lng,
+                end_address='',
+                distance_km=round(self._distance_km(start_lat, start_lng, end_lat, end_lng), 2),
+                duration_minutes=duration,
+                safety_score=rng.choice(SAFETY_GRADES),
+                route_data={'location_history': self._build_trail(
+                    start_lat, start_lng, end_lat, end_lng, start_time, duration, progress, trail_points
+                )},
+                video_enabled=True,
+                start_time=start_time,
+                end_time=end_time,
+                expires_at=start_time + timedelta(days=30)
+            ))
+        return TravelHistory.objects.bulk_create(travels, batch_size=self.batch_size)
+
+    def _create_alerts(self, travels, count, on_duty, now):
+        rng = self.rng
+        alerts = []
+        alert_times = []
+        for travel in rng.sample(travels, min(count, len(travels))):
+            last = travel.route_data['location_history'][-1]
+            officer = None
+            status = 'active'
+            if on_duty and rng.random() < 0.6:
+                officer = rng.choice(on_duty)
+                status = rng.choice(['active', 'active', 'responded'])
+
+            alert_time = now - timedelta(minutes=rng.uniform(0, 30))
+            alerts.append(EmergencyAlert(
+                id=self._uuid(),
+                user=travel.user,
+                travel_history=travel,
+                alert_latitude=last['lat'],
+                alert_longitude=last['lng'],
+                alert_address='',
+                status=status,
+                assigned_officer=officer,
+                response_time=alert_time + timedelta(minutes=2) if status == 'responded' else None
+            ))
+            alert_times.append(alert_time)
+
+        alerts = EmergencyAlert.objects.bulk_create(alerts, batch_size=self.batch_size)
+
+        # alert_time is auto_now_add, so spread it out afterwards
+        for alert, alert_time in zip(alerts, alert_times):
+            alert.alert_time = alert_time
+        EmergencyAlert.objects.bulk_update(alerts, ['alert_time'], batch_size=self.batch_size)
+        return alerts
+
+    def _create_news(self, police, count, now):
+        if not police or count <= 0:
+            return []
+
+        rng = self.rng
+        posts = []
+        for _ in range(count):
+            area = f"Sector {rng.randint(1, 25)}"
+            posts.append(SafetyNews(
+                title=rng.choice(NEWS_TITLES).format(area=area),
+                content=f"Synthetic advisory for {area}.",
+                author=rng.choice(police),
+                priority=rng.choice(['low', 'low', 'medium', 'high', 'critical']),
+                region_tag=area,
+                is_active=True,
+                expires_at=now + timedelta(days=rng.randint(1, 14))
+            ))
+        return SafetyNews.objects.bulk_create(posts, batch_size=self.batch_size)
+
+    def _build_profile(self, firebase_uid):
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        return UserProfile(
+            firebase_uid=firebase_uid,
+            email=f"{firebase_uid}@scenario.test",
+            phone=f"+91{rng.randint(7000000000, 9999999999)}",
+            full_name=f"{first} {last}",
+            emergency_contact_1_name=f"{rng.choice(FIRST_NAMES)} {last}",
+            emergency_contact_1_phone=f"+91{rng.randint(7000000000, 9999999999)}"
+        )
+
+    def _build_trail(self, start_lat, start_lng, end_lat, end_lng, start_time, duration, progress, points):
+        """Location history along the straight line, in the update_tracking format."""
+        rng = self.rng
+        points = max(points, 1)
+        heading = math.degrees(math.atan2(end_lng - start_lng, end_lat - start_lat)) % 360
+        trail = []
+        for i in range(points):
+            fraction = progress * (i + 1) / points
+            lat, lng = self._random_location_near(
+                start_lat + (end_lat - start_lat) * fraction,
+                start_lng + (end_lng - start_lng) * fraction,
+                0.03
+            )
+            trail.append({
+                'lat': lat,
+                'lng': lng,
+                'accuracy': round(rng.uniform(5, 30), 1),
+                'speed': round(rng.uniform(0, 15), 1),
+                'heading': round(heading, 1),
+                'timestamp': (start_time + timedelta(minutes=duration * fraction)).isoformat()
+            })
+        return trail
+
+    def _random_location(self):
+        """Uniform location inside the city disk."""
+        return self._random_location_near(self.center_lat, self.center_lon, self.radius_km)
+
+    def _random_location_near(self, lat, lng, radius_km):
+        angle = self.rng.uniform(0, 2 * math.pi)
+        distance = radius_km * math.sqrt(self.rng.random())
+        return (
+            lat + distance * math.sin(angle) / 111.0,
+            lng + distance * math.cos(angle) / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        )
+
+    def _uuid(self):
+        """UUID drawn from the seeded generator, so ids repeat across runs."""
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    @staticmethod
+    def _distance_km(lat1, lng1, lat2, lng2):
+        dy = (lat2 - lat1) * 111.0
+        dx = (lng2 - lng1) * 111.0 * math.cos(math.radians((lat1 + lat2) / 2))
+        return math.hypot(dx, dy)
+
+
+def clear_scenario(seed=None):
+    """
+    Delete scenario data (all seeds, or one seed). Trips, alerts, officers
+    and news cascade from the user profiles.
+
+    Returns:
+        Number of user profiles deleted
+    """
+    prefix = SCENARIO_UID_PREFIX if seed is None else f"{SCENARIO_UID_PREFIX}{seed}-"
+    return chunked_delete(UserProfile.objects.filter(firebase_uid__startswith=prefix), batch_size=500)
@@ -3,7 +3,7 @@ Safety scoring algorithm for RouteGuard.
 Calculates safety scores for routes based on crime data and contextual factors.
 """
 from datetime import datetime
-from ..models import CrimePoint, SafetyZone
+from .geo_backend import get_geo_backend
 import math
 
 
@@ -113,37 +113,12 @@ class SafetyScorer:
         }
     
     def _get_crimes_near_route(self, route_coordinates):
-        """Find all crimes within SEARCH_RADIUS of the route using simple distance calculation."""
-        crimes_nearby = []
-        
-        # Get all crimes (in production, you'd want to limit this to a bounding box)
-        all_crimes = CrimePoint.objects.all()
-        
-        for crime in all_crimes:
-            # Check if crime is near any point on the route
-            for lat, lon in route_coordinates:
-                distance = self._haversine_distance(lat, lon, crime.latitude, crime.longitude)
-                if distance * 1000 <= self.SEARCH_RADIUS:  # Convert km to meters
-                    crimes_nearby.append(crime)
-                    break  # Don't count the same crime multiple times
-        
-        return crimes_nearby
+        """Find all crimes within SEARCH_RADIUS of any point on the route."""
+        return get_geo_backend().crimes_near_route(route_coordinates, self.SEARCH_RADIUS)
     
     def _get_safety_zones_near_route(self, route_coordinates):
         """Find all safety zones near the route."""
-        zones_nearby = []
-        
-        all_zones = SafetyZone.objects.filter(is_active=True)
-        
-        for zone in all_zones:
-            # Check if zone is near any point on the route
-            for lat, lon in route_coordinates:
-                distance = self._haversine_distance(lat, lon, zone.latitude, zone.longitude)
-                if distance * 1000 <= self.SEARCH_RADIUS:  # Convert km to meters
-                    zones_nearby.append(zone)
-                    break
-        
-        return zones_nearby
+        return get_geo_backend().safety_zones_near_route(route_coordinates, self.SEARCH_RADIUS)
     
     def _haversine_distance(self, lat1, lon1, lat2, lon2):
         """
@@ -0,0 +1,117 @@
+"""
+Geometry columns for PostGIS databases.
+
+When the database has PostGIS, crime points, safety zones and police
+officers get a `geom` geography column generated by the database itself
+from their latitude/longitude, plus a GiST index. Nothing here needs
+GeoDjango or GDAL; the app keeps plain latitude/longitude fields and reads
+the geometry through raw SQL. Other databases (including SQLite) use the
+geohash backend instead.
+
+This module must not import models: migrations use it.
+"""
+from django.db import DatabaseError, transaction
+
+
+GEOMETRY_COLUMN = 'geom'
+
+# Officers are located at their patrol position when both coordinates are
+# known, else at their jurisdiction center (same rule as
+# geo_backend.officer_location)
+_HAS_PATROL_POSITION = 'current_lat IS NOT NULL AND current_lng IS NOT NULL'
+
+# (table, longitude expression, latitude expression)
+SPATIAL_TABLES = [
+    ('safe_route_app_crimepoint', 'longitude', 'latitude'),
+    ('safe_route_app_safetyzone', 'longitude', 'latitude'),
+    (
+        'safe_route_app_policeauthority',
+        f'CASE WHEN {_HAS_PATROL_POSITION} THEN current_lng ELSE jurisdiction_lng END',
+        f'CASE WHEN {_HAS_PATROL_POSITION} THEN current_lat ELSE jurisdiction_lat END',
+    ),
+]
+
+
+def spatial_flavor(connection):
+    """
+    Spatial extension available on a connection.
+
+    Returns:
+        'postgis' or None
+    """
+    if connection.vendor != 'postgresql':
+        return None
+
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+            found = cursor.fetchone() is not None
+    except DatabaseError:
+        return None
+    return 'postgis' if found else None
+
+
+def has_spatial_columns(connection):
+    """Whether the geometry columns were installed on this database."""
+    flavor = spatial_flavor(connection)
+    if flavor is None:
+        return False
+
+    with connection.cursor() as cursor:
+        columns = [
+            column.name
+            for column in connection.introspection.get_table_description(cursor, SPATIAL_TABLES[0][0])
+        ]
+    return GEOMETRY_COLUMN in columns
+
+
+def install_spatial_columns(connection):
+    """
+    Add the geometry columns and spatial indexes if the database supports them.
+
+    Returns:
+        The spatial flavor that was set up, or None
+    """
+    flavor = spatial_flavor(connection)
+    if flavor is None or has_spatial_columns(connection):
+        return flavor
+
+    with connection.cursor() as cursor:
+        for table, lng_expr, lat_expr in SPATIAL_TABLES:
+            for statement in _postgis_statements(table, lng_expr, lat_expr):
+                cursor.execute(statement)
+    return flavor
+
+
+def reinstall_spatial_column(connection, table):
+    """
+    Recreate one table's geometry column, e.g. after its location expression
+    changed (a generated column's expression can't be altered in place).
+    """
+    if not has_spatial_columns(connection):
+        return
+
+    lng_expr, lat_expr = next((lng, lat) for name, lng, lat in SPATIAL_TABLES if name == table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS {GEOMETRY_COLUMN}')
+        for statement in _postgis_statements(table, lng_expr, lat_expr):
+            cursor.execute(statement)
+
+
+def drop_spatial_columns(connection):
+    """Remove the geometry columns again (migration rollback)."""
+    if not has_spatial_columns(connection):
+        return
+
+    with connection.cursor() as cursor:
+        for table, _, _ in SPATIAL_TABLES:
+            cursor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS {GEOMETRY_COLUMN}')
+
+
+def _postgis_statements(table, lng_expr, lat_expr):
+    # Geography, so ST_DWithin works in meters
+    return [
+        f'ALTER TABLE {table} ADD COLUMN {GEOMETRY_COLUMN} geography(Point, 4326) '
+        f'GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint({lng_expr}, {lat_expr}), 4326)::geography) STORED',
+        f'CREATE INDEX {table}_geom_gist ON {table} USING GIST ({GEOMETRY_COLUMN})',
+    ]
@@ -0,0 +1,158 @@
+"""
+Crime density tiles for the map (XYZ / Web Mercator tiling).
+Each tile is a GRID_SIZE x GRID_SIZE grid of crime counts, aggregated in the
+database and served as a compact little-endian uint16 array (row 0 is the
+northern edge). Tiles are cached server-side and invalidated per affected
+tile when crime points change.
+"""
+import hashlib
+import math
+import struct
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Value
+from django.db.models.functions import Floor, Ln, Tan, Radians, Pi
+from django.dispatch import receiver
+
+from ..models import CrimePoint
+from ..signals import crime_points_changed
+
+
+GRID_SIZE = 64
+MAX_COUNT = 0xFFFF
+
+MIN_ZOOM = 0
+MAX_ZOOM = 18
+
+# Web Mercator latitude limit
+MAX_LATITUDE = 85.0511287798
+
+# Past this many affected tiles in one change, the whole tile set is
+# invalidated by bumping the cache generation instead
+MAX_TILES_PER_INVALIDATION = 2000
+
+GENERATION_KEY = 'crime-tile:generation'
+
+
+def tile_bounds(z, x, y):
+    """
+    Bounds of an XYZ tile in degrees.
+
+    Returns:
+        (west, south, east, north)
+    """
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def tile_for_point(lat, lon, z):
+    """XYZ tile containing a point at a zoom level."""
+    n = 2 ** z
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def is_valid_tile(z, x, y):
+    return MIN_ZOOM <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def render_tile(z, x, y):
+    """
+    Count crimes per grid cell of a tile with one GROUP BY query.
+
+    Returns:
+        bytes: GRID_SIZE * GRID_SIZE little-endian uint16 counts
+    """
+    west, south, east, north = tile_bounds(z, x, y)
+    n = 2 ** z
+
+    # Cell indices inside the tile from the Web Mercator projection, in SQL
+    merc_y = Ln(Tan(Pi() / 4 + Radians('latitude') / 2))
+    cell_y = (Value(1.0) - merc_y / Pi()) / 2 * float(n * GRID_SIZE) - float(y * GRID_SIZE)
+    cell_x = (F('longitude') + 180.0) / 360.0 * float(n * GRID_SIZE) - float(x * GRID_SIZE)
+
+    rows = (
+        CrimePoint.objects
+        .within_bbox(south, north, west, east)
+        .filter(latitude__lt=north, longitude__lt=east)
+        .annotate(cell_x=Floor(cell_x), cell_y=Floor(cell_y))
+        .values('cell_x', 'cell_y')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+    counts = [0] * (GRID_SIZE * GRID_SIZE)
+    for row in rows:
+        # Rounding at the tile edges can land one cell outside
+        cx = min(max(int(row['cell_x']), 0), GRID_SIZE - 1)
+        cy = min(max(int(row['cell_y']), 0), GRID_SIZE - 1)
+        index = cy * GRID_SIZE + cx
+        counts[index] = min(counts[index] + row['count'], MAX_COUNT)
+
+    return struct.pack(f'<{len(counts)}H', *counts)
+
+
+def get_tile(z, x, y):
+    """
+    Get a tile from the cache, rendering it on a miss.
+
+    Returns:
+        (data bytes, etag)
+    """
+    key = _tile_key(z, x, y)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = render_tile(z, x, y)
+    etag = '"' + hashlib.md5(data).hexdigest() + '"'
+    cache.set(key, (data, etag), settings.CRIME_TILE_CACHE_TIMEOUT)
+    return data, etag
+
+
+def invalidate_tiles_for_points(points):
+    """Drop the cached tiles that contain any of the given points, at every zoom."""
+    tiles = set()
+    for point in points:
+        for z in range(MIN_ZOOM, MAX_ZOOM + 1):
+            tiles.add((z,) + tile_for_point(point.latitude, point.longitude, z))
+        if len(tiles) > MAX_TILES_PER_INVALIDATION:
+            _bump_generation()
+            return
+
+    if tiles:
+        generation = _get_generation()
+        cache.delete_many([_tile_key(z, x, y, generation) for z, x, y in tiles])
+
+
+@receiver(crime_points_changed)
+def _on_crime_points_changed(sender, points, **kwargs):
+    invalidate_tiles_for_points(points)
+
+
+def _tile_key(z, x, y, generation=None):
+    if generation is None:
+        generation = _get_generation()
+    return f'crime-tile:{generation}:{z}:{x}:{y}'
+
+
+def _get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def _bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
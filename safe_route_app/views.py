@@ -3,7 +3,9 @@ Views for RouteGuard application.
 Handles all API endpoints and page rendering.
 """
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.urls import reverse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
@@ -14,9 +16,14 @@ import random
 
 from .utils.scorer import calculate_safety_score
 from .utils.data_generator import generate_sample_data_for_location
-from .utils.csv_importer import import_crime_csv
-from .utils.gemini_service import explain_route, get_gemini_advisor
-from .models import CrimePoint, SafetyZone
+from .utils.clustering import get_crime_clusters
+from .utils.columnar import encode_items
+from .utils.tiles import get_tile, is_valid_tile, GRID_SIZE
+from .utils.import_jobs import create_import_job, fail_stale_import_jobs, requeue_stale_pending_jobs
+from .utils.crime_export import EXPORT_FORMATS, parse_export_filters, export_crime_points
+from .utils.gemini_service import get_gemini_advisor
+from .utils.explanation_jobs import request_explanation, get_explanation_job, explain_with_tips
+from .models import CrimePoint, SafetyZone, ImportJob
 
 
 from .views_auth import get_firebase_config
@@ -65,8 +72,12 @@ def calculate_safe_route(request):
             ...
         ],
         "recommended_index": 0,
-        "ai_explanation": "..."
+        "ai_explanation": "...",
+        "ai_explanation_url": null
     }
+    
+    When no explanation is ready yet, ai_explanation is empty and
+    ai_explanation_url points to get_ai_explanation_status.
     """
     try:
         data = json.loads(request.body)
@@ -108,12 +119,13 @@ def calculate_safe_route(request):
         # Find the safest route (highest score)
         recommended_index = max(range(len(scored_routes)), key=lambda i: scored_routes[i]['score'])
         
-        # Generate AI explanation
+        # AI explanation: returned now if cached, else generated in the background
         ai_explanation = ""
+        explanation_token = None
         try:
             recommended_route = scored_routes[recommended_index]
             alternative_routes = [r for i, r in enumerate(scored_routes) if i != recommended_index]
-            ai_explanation = explain_route(recommended_route, alternative_routes)
+            ai_explanation, explanation_token = request_explanation(recommended_route, alternative_routes)
         except Exception as e:
             print(f"AI explanation error: {e}")
             ai_explanation = "Route analysis complete. Check the safety scores for details."
@@ -122,7 +134,11 @@ def calculate_safe_route(request):
             'success': True,
             'routes': scored_routes,
             'recommended_index': recommended_index,
-            'ai_explanation': ai_explanation,
+            'ai_explanation': ai_explanation or "",
+            'ai_explanation_url': (
+                reverse('safe_route_app:ai_explanation_status', args=[explanation_token])
+                if explanation_token else None
+            ),
             'timestamp': current_time.isoformat()
         })
         
@@ -135,26 +151,42 @@ def calculate_safe_route(request):
 @require_http_methods(["GET"])
 def get_crime_data(request):
     """
-    Get crime data for a specific area.
+    Get crime data for a specific area, clustered for the map zoom level.
     
     Query parameters:
     - lat: Center latitude
     - lon: Center longitude
     - radius: Radius in meters (default: 5000)
+    - zoom: Map zoom level (default: 14)
+    - format=columnar: parallel arrays instead of objects (see utils/columnar.py)
     
-    Returns:
+    Returns raw points when the area holds few crimes:
     {
+        "mode": "points",
         "crimes": [
             {"lat": 12.34, "lon": 56.78, "type": "theft", "severity": 2, ...},
             ...
         ],
-        "count": 42
+        "count": 42,
+        "total": 42
+    }
+    
+    Otherwise grid clusters:
+    {
+        "mode": "clusters",
+        "clusters": [
+            {"lat": 12.34, "lon": 56.78, "count": 120, "dominant_type": "theft", "risk": 260, "types": {...}},
+            ...
+        ],
+        "count": 35,
+        "total": 4210
     }
     """
     try:
         lat = float(request.GET.get('lat', 0))
         lon = float(request.GET.get('lon', 0))
         radius = int(request.GET.get('radius', 5000))
+        zoom = int(request.GET.get('zoom', 14))
         
         if not lat or not lon:
             return JsonResponse({'error': 'Latitude and longitude required'}, status=400)
@@ -163,31 +195,23 @@ def get_crime_data(request):
         # 1 degree ≈ 111 km
         radius_deg = (radius / 1000) / 111.0
         
-        # Query crimes within bounding box
-        crimes = CrimePoint.objects.filter(
-            latitude__gte=lat - radius_deg,
-            latitude__lte=lat + radius_deg,
-            longitude__gte=lon - radius_deg,
-            longitude__lte=lon + radius_deg
-        )[:200]  # Limit to 200 points for performance
-        
-        # Serialize crime data
-        crime_data = []
-        for crime in crimes:
-            crime_data.append({
-                'lat': crime.latitude,
-                'lon': crime.longitude,
-                'type': crime.crime_type,
-                'severity': crime.severity,
-                'occurred_at': crime.occurred_at.isoformat(),
-                'is_sample': crime.is_sample_data
-            })
+        result = get_crime_clusters(
+            lat - radius_deg, lat + radius_deg,
+            lon - radius_deg, lon + radius_deg,
+            zoom
+        )
+        key = 'crimes' if result['mode'] == 'points' else 'clusters'
+        count = len(result[key])
+        result[key] = encode_items(request, result[key], time_fields=('occurred_at',))
         
-        return JsonResponse({
+        response = JsonResponse({
             'success': True,
-            'crimes': crime_data,
-            'count': len(crime_data)
+            **result,
+            'zoom': zoom,
+            'count': count
         })
+        patch_vary_headers(response, ['Accept'])
+        return response
         
     except ValueError:
         return JsonResponse({'error': 'Invalid coordinates'}, status=400)
@@ -195,6 +219,70 @@ def get_crime_data(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@require_http_methods(["GET"])
+def get_crime_tile(request, z, x, y):
+    """
+    Crime density tile for the map (XYZ tiling, Web Mercator).
+    
+    Returns:
+    application/octet-stream with GRID_SIZE x GRID_SIZE little-endian uint16
+    crime counts, row by row from the northern edge (size in X-Tile-Grid-Size)
+    """
+    if not is_valid_tile(z, x, y):
+        return JsonResponse({'error': 'Invalid tile'}, status=404)
+    
+    try:
+        data, etag = get_tile(z, x, y)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(data, content_type='application/octet-stream')
+        response['X-Tile-Grid-Size'] = str(GRID_SIZE)
+    
+    # Tiles hold no per-user data, so browsers and shared caches may keep them
+    response['ETag'] = etag
+    response['Cache-Control'] = (
+        f'public, max-age={settings.CRIME_TILE_MAX_AGE}, '
+        f'stale-while-revalidate={settings.CRIME_TILE_CACHE_TIMEOUT}'
+    )
+    return response
+
+
+@require_http_methods(["GET"])
+def export_crime_data(request):
+    """
+    Stream crime points as CSV or NDJSON, oldest first.
+    
+    Query parameters:
+    - format: csv (default) or ndjson
+    - min_lat, max_lat, min_lon, max_lon: bounding box
+    - type: crime type(s), comma separated
+    - since, until: ISO date or datetime (until is exclusive)
+    - after: "<occurred_at>,<id>" of the last row received, to resume
+    
+    Rows are read in keyset pages (see utils/crime_export.py), so exports
+    of any size use constant memory.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+    
+    try:
+        filters = parse_export_filters(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    response = StreamingHttpResponse(
+        export_crime_points(export_format, filters),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="crime_data.{export_format}"'
+    return response
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def generate_sample_data(request):
@@ -242,35 +330,117 @@ def generate_sample_data(request):
 @require_http_methods(["POST"])
 def upload_crime_csv(request):
     """
-    Upload crime data from CSV file.
+    Upload crime data from a CSV, GeoJSON or NDJSON file (optionally .gz).
+    The import runs in the background; poll the returned status URL.
     
-    Expected: multipart/form-data with 'csv_file' field
-    Optional: 'clear_existing' boolean
+    Expected: multipart/form-data with 'csv_file' field (the format is
+    picked from the file name)
+    Optional: 'clear_existing' boolean, 'upsert' boolean (update rows
+    that were imported before instead of skipping them)
     
-    Returns:
+    Returns (202):
     {
         "success": true,
-        "imported": 150,
-        "skipped": 5,
-        "errors": [...]
+        "job_id": "...",
+        "status": "pending",
+        "status_url": "/api/import-jobs/<job_id>/"
     }
     """
     try:
         if 'csv_file' not in request.FILES:
-            return JsonResponse({'error': 'No CSV file provided'}, status=400)
+            return JsonResponse({'error': 'No file provided'}, status=400)
         
         csv_file = request.FILES['csv_file']
         clear_existing = request.POST.get('clear_existing', 'false').lower() == 'true'
+        upsert = request.POST.get('upsert', 'false').lower() == 'true'
         
-        # Import CSV
-        result = import_crime_csv(csv_file, clear_existing)
+        # Queue the import
+        job = create_import_job(csv_file, clear_existing, request.session.get('firebase_uid', ''), upsert)
         
-        return JsonResponse(result)
+        return JsonResponse({
+            'success': True,
+            'job_id': str(job.id),
+            'status': job.status,
+            'status_url': reverse('safe_route_app:import_job_status', args=[job.id])
+        }, status=202)
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@require_http_methods(["GET"])
+def get_import_job_status(request, job_id):
+    """
+    Get progress of a background crime data import.
+    
+    Returns:
+    {
+        "job_id": "...",
+        "status": "running",
+        "rows_read": 120000,
+        "imported": 119500,
+        "skipped": 500,
+        "updated": 0,
+        "duplicates": 0,
+        "date_fallbacks": 0,
+        "errors": [...]
+    }
+    """
+    # Give jobs whose worker died a final status instead of "running" forever,
+    # and pick up pending jobs whose worker restarted before starting them
+    fail_stale_import_jobs()
+    requeue_stale_pending_jobs()
+    
+    try:
+        job = ImportJob.objects.get(id=job_id)
+    except ImportJob.DoesNotExist:
+        return JsonResponse({'error': 'Import job not found'}, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        'job_id': str(job.id),
+        'file_name': job.file_name,
+        'status': job.status,
+        'rows_read': job.rows_read,
+        'imported': job.imported_count,
+        'skipped': job.skipped_count,
+        'updated': job.updated_count,
+        'duplicates': job.duplicate_count,
+        'date_fallbacks': job.date_fallback_count,
+        'errors': job.errors[:10],
+        'error': job.error_message,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    })
+
+
+@require_http_methods(["GET"])
+def get_ai_explanation_status(request, token):
+    """
+    Get a deferred route explanation (see calculate_safe_route).
+    
+    Returns:
+    {
+        "status": "ready",
+        "explanation": "...",
+        "fallback": false
+    }
+    
+    or {"status": "pending"} while it is being generated. After
+    AI_EXPLANATION_TIMEOUT seconds the rule-based explanation is returned
+    with "fallback": true.
+    """
+    job = get_explanation_job(token)
+    if job is None:
+        return JsonResponse({'error': 'Explanation not found or expired'}, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        **job
+    })
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def get_ai_explanation(request):
@@ -292,6 +462,9 @@ def get_ai_explanation(request):
         "explanation": "...",
         "safety_tips": "..."
     }
+    
+    Either text falls back to the rule-based version when the model does
+    not answer within AI_EXPLANATION_TIMEOUT seconds.
     """
     try:
         data = json.loads(request.body)
@@ -308,9 +481,8 @@ def get_ai_explanation(request):
                 'explanation': 'AI explanations require a valid Gemini API key'
             }, status=503)
         
-        # Generate explanation and tips
-        explanation = advisor.explain_route_choice(route_data)
-        safety_tips = advisor.generate_safety_tips(route_data)
+        # Generate explanation and tips concurrently, under one deadline
+        explanation, safety_tips = explain_with_tips(route_data)
         
         return JsonResponse({
             'success': True,
@@ -4,7 +4,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 import os
-from .firebase_config import verify_firebase_token
+from .firebase_config import verify_firebase_token, prefetch_signing_certificates
 from .models import UserProfile, PoliceAuthority
 
 def get_firebase_config():
@@ -19,12 +19,15 @@ def get_firebase_config():
 
 def login_page(request):
     """Render login page with Firebase config"""
+    # The token verification certificates load while the user signs in
+    prefetch_signing_certificates()
     return render(request, 'auth/login.html', {
         'firebase_config': get_firebase_config()
     })
 
 def register_page(request):
     """Render register page with Firebase config"""
+    prefetch_signing_certificates()
     return render(request, 'auth/register.html', {
         'firebase_config': get_firebase_config()
     })
@@ -141,7 +144,7 @@ def get_current_user(request):
         return JsonResponse({'authenticated': False})
     
     try:
-        user_profile = UserProfile.objects.get(firebase_uid=firebase_uid)
+        user_profile = request.identity.get_profile()
         return JsonResponse({
             'authenticated': True,
             'uid': user_profile.firebase_uid,
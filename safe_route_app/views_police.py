@@ -5,10 +5,16 @@ from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+import hmac
 import json
 from datetime import datetime
 
-from .models import PoliceAuthority, UserProfile, EmergencyAlert
+from .models import PoliceAuthority, UserProfile, EmergencyAlert, CrimePoint
+from .utils.crime_ingest import ingest_incidents, MAX_INCIDENTS_PER_REQUEST
+from .utils.columnar import encode_items
 
 
 def police_dashboard(request):
@@ -40,7 +46,7 @@ def get_police_info(request):
         return JsonResponse({'authenticated': True, 'is_police': False}, status=403)
     
     try:
-        police = PoliceAuthority.objects.select_related('user_profile').get(firebase_uid=firebase_uid)
+        police = request.identity.get_police()
         
         return JsonResponse({
             'authenticated': True,
@@ -81,24 +87,22 @@ def update_police_location(request):
         longitude = data.get('longitude')
         is_on_duty = data.get('is_on_duty', True)
         
-        police = PoliceAuthority.objects.get(firebase_uid=firebase_uid)
+        updates = {'is_on_duty': is_on_duty, 'last_updated': timezone.now()}
         
         # Update live location
         if latitude and longitude:
-            police.current_lat = latitude
-            police.current_lng = longitude
-            
-        police.is_on_duty = is_on_duty
-        police.save()
+            updates['current_lat'] = latitude
+            updates['current_lng'] = longitude
+        
+        # Sent every few seconds while on duty: a single UPDATE, no read
+        if not PoliceAuthority.objects.filter(firebase_uid=firebase_uid).update(**updates):
+            return JsonResponse({'error': 'Police profile not found'}, status=404)
         
         return JsonResponse({
             'success': True,
             'message': 'Location/Status updated successfully',
-            'is_on_duty': police.is_on_duty
+            'is_on_duty': is_on_duty
         })
-        
-    except PoliceAuthority.DoesNotExist:
-        return JsonResponse({'error': 'Police profile not found'}, status=404)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -107,6 +111,7 @@ def update_police_location(request):
 def get_nearby_police(request):
     """
     Get all active police officers for user map
+    (format=columnar for parallel arrays, see utils/columnar.py)
     """
     # Optional: Filter by lat/lng bounds if provided
     try:
@@ -123,7 +128,9 @@ def get_nearby_police(request):
                     'type': 'police_car' # placeholder for icon type
                 })
         
-        return JsonResponse({'success': True, 'police': police_data})
+        response = JsonResponse({'success': True, 'police': encode_items(request, police_data)})
+        patch_vary_headers(response, ['Accept'])
+        return response
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -140,7 +147,7 @@ def get_active_alerts(request):
         return JsonResponse({'error': 'Unauthorized'}, status=401)
     
     try:
-        police = PoliceAuthority.objects.get(firebase_uid=firebase_uid)
+        police = request.identity.get_police()
         
         # Get alerts assigned to this officer or in their jurisdiction
         # Get alerts assigned to this officer, OR unassigned (broadcast)
@@ -191,7 +198,7 @@ def get_alert_history(request):
         return JsonResponse({'error': 'Unauthorized'}, status=401)
     
     try:
-        police = PoliceAuthority.objects.get(firebase_uid=firebase_uid)
+        police = request.identity.get_police()
         
         # Get resolved alerts
         alerts = EmergencyAlert.objects.filter(
@@ -231,7 +238,6 @@ def add_crime_report(request):
     
     try:
         data = json.loads(request.body)
-        from .models import CrimePoint
         
         crime = CrimePoint.objects.create(
             crime_type=data.get('type'),
@@ -249,6 +255,71 @@ def add_crime_report(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _is_partner_feed(request):
+    """Check the X-Feed-Key header against the configured partner feed keys."""
+    feed_key = request.headers.get('X-Feed-Key', '')
+    return bool(feed_key) and any(
+        hmac.compare_digest(feed_key, key) for key in settings.CRIME_FEED_API_KEYS
+    )
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def add_crime_reports_bulk(request):
+    """
+    Bulk crime ingestion for police and partner agency feeds.
+    Police use their session; partner feeds send an X-Feed-Key header.
+    
+    Expected POST data:
+    {
+        "incidents": [
+            {"latitude": 12.34, "longitude": 56.78, "type": "theft", "severity": 2,
+             "description": "...", "occurred_at": "2024-01-08T22:30:00"},
+            ...
+        ]
+    }
+    
+    Returns:
+    {
+        "success": true,
+        "created": 98, "duplicates": 1, "errors": 1,
+        "results": [{"index": 0, "status": "created", "id": 123}, ...]
+    }
+    """
+    firebase_uid = request.session.get('firebase_uid')
+    is_police = request.session.get('is_police', False)
+    is_partner = _is_partner_feed(request)
+    
+    if not is_partner and (not firebase_uid or not is_police):
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+    
+    try:
+        data = json.loads(request.body)
+        incidents = data.get('incidents') if isinstance(data, dict) else data
+        
+        if not isinstance(incidents, list) or not incidents:
+            return JsonResponse({'error': 'No incidents provided'}, status=400)
+        if len(incidents) > MAX_INCIDENTS_PER_REQUEST:
+            return JsonResponse({
+                'error': f'At most {MAX_INCIDENTS_PER_REQUEST} incidents per request'
+            }, status=413)
+        
+        results = ingest_incidents(incidents, source='partner_feed' if is_partner else 'police_report')
+        
+        statuses = [r['status'] for r in results]
+        return JsonResponse({
+            'success': True,
+            'created': statuses.count('created'),
+            'duplicates': statuses.count('duplicate'),
+            'errors': statuses.count('error'),
+            'results': results
+        })
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def post_news_update(request):
@@ -262,7 +333,7 @@ def post_news_update(request):
         return JsonResponse({'error': 'Unauthorized'}, status=401)
     
     try:
-        police = PoliceAuthority.objects.get(firebase_uid=firebase_uid)
+        police = request.identity.get_police()
         data = json.loads(request.body)
         from .models import SafetyNews
         
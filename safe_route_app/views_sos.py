@@ -8,9 +8,9 @@ from django.views.decorators.http import require_http_methods
 import json
 from datetime import datetime, timedelta
 from django.utils import timezone
-import math
 
-from .models import EmergencyAlert, UserProfile, PoliceAuthority
+from .models import EmergencyAlert, UserProfile
+from .utils.geo_backend import get_geo_backend
 
 
 def find_nearest_police(latitude, longitude):
@@ -21,43 +21,9 @@ def find_nearest_police(latitude, longitude):
     2. If none, search within 30km
     3. If none, return None (trigger fallback)
     """
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        if not all([lat1, lon1, lat2, lon2]):
-            return float('inf')
-            
-        R = 6371  # Earth radius in km
-        
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = (math.sin(dlat / 2) ** 2 + 
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-             math.sin(dlon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
-    
-    # Get all verified and ON-DUTY police officers
-    # We strictly only want officers who are currently working
-    police_officers = PoliceAuthority.objects.filter(
-        verified_by_admin=True,
-        is_on_duty=True
-    )
-    
-    if not police_officers.exists():
-        return None
-
-    # Calculate distances for all on-duty officers
-    # Prefer current location (patrolling), fallback to jurisdiction center
-    candidates = []
-    for officer in police_officers:
-        # Use current location if available, else jurisdiction
-        target_lat = officer.current_lat if officer.current_lat else officer.jurisdiction_lat
-        target_lng = officer.current_lng if officer.current_lng else officer.jurisdiction_lng
-        
-        dist = haversine_distance(latitude, longitude, target_lat, target_lng)
-        candidates.append((dist, officer))
-    
-    # Sort by distance
-    candidates.sort(key=lambda x: x[0])
+    # Verified, ON-DUTY officers within 30km, nearest first
+    # (current location when patrolling, else jurisdiction center)
+    candidates = get_geo_backend().nearest_on_duty_officers(latitude, longitude, 30.0)
     
     # Priority 1: Within 10km
     tier1 = [c for c in candidates if c[0] <= 10.0]
@@ -93,7 +59,7 @@ def trigger_sos(request):
             return JsonResponse({'error': 'Missing coordinates'}, status=400)
         
         # Get user profile
-        user = UserProfile.objects.get(firebase_uid=firebase_uid)
+        user = request.identity.get_profile()
         
         # Find nearest police officer
         nearest_officer = find_nearest_police(latitude, longitude)
@@ -179,17 +145,19 @@ def update_sos_location(request):
         if not all([alert_id, latitude, longitude]):
             return JsonResponse({'error': 'Missing required fields'}, status=400)
         
-        # Verify alert belongs to user
-        alert = EmergencyAlert.objects.get(
+        # Update the alert if it belongs to the user, in a single UPDATE
+        # (sent every few seconds during an emergency)
+        updated = EmergencyAlert.objects.filter(
             id=alert_id,
-            user__firebase_uid=firebase_uid,
+            user_id=firebase_uid,
             status='active'
+        ).update(
+            alert_latitude=latitude,
+            alert_longitude=longitude,
+            updated_at=timezone.now()
         )
-        
-        # Update alert location
-        alert.alert_latitude = latitude
-        alert.alert_longitude = longitude
-        alert.save()
+        if not updated:
+            raise EmergencyAlert.DoesNotExist
         
         # TODO: Update Firestore real-time location
         
@@ -278,12 +246,12 @@ def resolve_sos(request):
         is_authorized = False
         
         # 1. Check if user is owner
-        if alert.user.firebase_uid == firebase_uid:
+        if alert.user_id == firebase_uid:
             is_authorized = True
             
         # 2. Check if user is police
         if not is_authorized:
-            if PoliceAuthority.objects.filter(firebase_uid=firebase_uid).exists():
+            if request.identity.has_police_profile:
                 is_authorized = True
                 if resolved_by == 'user':
                     resolved_by = 'police'
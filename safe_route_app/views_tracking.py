@@ -8,8 +8,10 @@ from django.views.decorators.http import require_http_methods
 import json
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 
 from .models import TravelHistory, UserProfile
+from .utils.columnar import encode_items
 
 
 @csrf_exempt
@@ -26,7 +28,7 @@ def start_tracking(request):
     try:
         data = json.loads(request.body)
         
-        user = UserProfile.objects.get(firebase_uid=firebase_uid)
+        user = request.identity.get_profile()
         
         # Convert safety score (0-100) to grade (A-F)
         raw_score = data.get('safety_score', 0)
@@ -81,9 +83,9 @@ def update_tracking(request):
         data = json.loads(request.body)
         travel_id = data.get('travel_id')
         
-        travel = TravelHistory.objects.get(
+        travel = TravelHistory.objects.only('id', 'route_data').get(
             id=travel_id,
-            user__firebase_uid=firebase_uid
+            user_id=firebase_uid
         )
         
         # Update route data with new location
@@ -105,7 +107,7 @@ def update_tracking(request):
             route_data['location_history'] = route_data['location_history'][-100:]
         
         travel.route_data = route_data
-        travel.save()
+        travel.save(update_fields=['route_data'])
         
         # TODO: Update Firestore for real-time sync with police dashboard
         
@@ -135,9 +137,10 @@ def end_tracking(request):
         data = json.loads(request.body)
         travel_id = data.get('travel_id')
         
-        travel = TravelHistory.objects.get(
+        # Load only what the duration needs; the rest of the row is left as is
+        travel = TravelHistory.objects.only('id', 'start_time').get(
             id=travel_id,
-            user__firebase_uid=firebase_uid
+            user_id=firebase_uid
         )
         
         travel.end_time = timezone.now()
@@ -148,7 +151,7 @@ def end_tracking(request):
             duration = (travel.end_time - travel.start_time).total_seconds() / 60
             travel.duration_minutes = int(duration)
         
-        travel.save()
+        travel.save(update_fields=['end_time', 'distance_km', 'duration_minutes'])
         
         return JsonResponse({
             'success': True,
@@ -167,6 +170,7 @@ def end_tracking(request):
 def get_active_travels(request):
     """
     Get all active travels (for police dashboard)
+    (format=columnar for parallel arrays, see utils/columnar.py)
     """
     firebase_uid = request.session.get('firebase_uid')
     is_police = request.session.get('is_police', False)
@@ -204,11 +208,13 @@ def get_active_travels(request):
                 'safety_score': travel.safety_score
             })
         
-        return JsonResponse({
+        response = JsonResponse({
             'success': True,
-            'travels': travels_data,
+            'travels': encode_items(request, travels_data, time_fields=('start_time',)),
             'count': len(travels_data)
         })
+        patch_vary_headers(response, ['Accept'])
+        return response
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)